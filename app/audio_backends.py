@@ -0,0 +1,414 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Wymienne wyjścia audio dla silnika audio.
+
+    pygame - mikser SDL (urządzenie otwierane raz, odtwarzanie z RAM)
+    alsa   - podproces `aplay` zasilany surowym PCM
+    pulse  - podproces `pacat` (PulseAudio / PipeWire)
+    file   - zapis każdego odtworzenia do pliku WAV (testy, nagrania)
+    null   - tylko pomiar czasu, bez wyjścia (symulacja, benchmarki)
+
+Możliwości platformy sprawdzane są raz, przy starcie silnika - wybór
+wyjścia nie jest powtarzany przy każdym odtworzeniu.
+"""
+
+import os
+import sys
+import time
+import wave
+import shutil
+import threading
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .startup_profile import is_available, optional_import
+
+# pygame importowany dopiero przy otwarciu wyjścia (import trwa ~150 ms)
+PYGAME_AVAILABLE = is_available("pygame")
+
+# Wybór wyjścia: auto lub nazwa wyjścia
+AUDIO_BACKEND = os.environ.get("BARKING_DOG_AUDIO_BACKEND", "auto").lower()
+
+# Katalog wyjścia "file"
+AUDIO_SINK_DIR = Path(os.environ.get("BARKING_DOG_AUDIO_SINK_DIR", Path(__file__).parent / "sounds" / "sink"))
+
+# Kolejność prób w trybie auto
+AUTO_ORDER = ("pygame", "pulse", "alsa", "null")
+
+
+def is_simulated_platform() -> bool:
+    """Kontener lub iOS - brak fizycznego wyjścia audio (tryb symulacji)"""
+    is_container = os.path.exists('/.dockerenv') or os.environ.get('CONTAINER') == 'docker'
+    return os.environ.get('PLATFORM_HINT') == 'ios' or (is_container and sys.platform.startswith('linux'))
+
+
+class AudioBackend:
+    """
+    Interfejs wyjścia audio. Dźwięki przekazywane są jako bufory PCM int16
+    (ramki x kanały) w formacie ustalonym przy otwarciu.
+    """
+
+    name = "base"
+    # Czy wyjście wydaje fizyczny dźwięk
+    audible = True
+
+    def __init__(self, device: Optional[str] = None):
+        # Urządzenie wyjścia (np. hw:1,0 dla ALSA, nazwa ujścia PulseAudio); None - domyślne
+        self.device = device
+        self.sample_rate = 0
+        self.channels = 0
+        self.buffer_size = 0
+
+    def probe(self) -> Tuple[bool, str]:
+        """Czy wyjście może działać na tej platformie. Zwraca (dostępne, opis)."""
+        return True, ""
+
+    def open(self, sample_rate: int, channels: int, buffer_size: int) -> bool:
+        """Otwiera wyjście; może zmienić format na obsługiwany przez urządzenie"""
+        self.sample_rate, self.channels, self.buffer_size = sample_rate, channels, buffer_size
+        return True
+
+    def prepare(self, pcm) -> Any:
+        """Przygotowuje bufor do odtwarzania (np. obiekt pygame.Sound). Wynik trafia do play()."""
+        return pcm
+
+    def play(self, key: str, prepared: Any) -> None:
+        """Rozpoczyna odtwarzanie (nie czeka na koniec)"""
+        raise NotImplementedError
+
+    def is_busy(self) -> Optional[bool]:
+        """
+        Czy wyjście nadal odtwarza dźwięk (sygnał końca odtwarzania).
+        None - wyjście tego nie wie; koniec wyznacza długość bufora PCM.
+        """
+        return None
+
+    def stop(self) -> None:
+        """Przerywa bieżące odtwarzanie"""
+
+    def close(self) -> None:
+        """Zamyka wyjście"""
+
+    @property
+    def output_latency_ms(self) -> float:
+        """Opóźnienie bufora wyjściowego (dodawane do zmierzonego czasu startu)"""
+        return 0.0
+
+    def describe(self) -> Dict[str, Any]:
+        return {"name": self.name, "device": self.device, "audible": self.audible}
+
+
+class PygameBackend(AudioBackend):
+    """Mikser pygame/SDL - urządzenie otwierane raz, dźwięki jako pygame.mixer.Sound"""
+
+    name = "pygame"
+
+    def __init__(self, device: Optional[str] = None):
+        super().__init__(device)
+        self._channel = None
+        self._pygame = None
+
+    def probe(self) -> Tuple[bool, str]:
+        if not PYGAME_AVAILABLE:
+            return False, "brak modułu pygame"
+        # Bez importu - wersja znana dopiero, gdy moduł jest już załadowany
+        pygame = sys.modules.get("pygame")
+        return True, ("pygame " + pygame.version.ver) if pygame is not None else "moduł pygame dostępny"
+
+    def open(self, sample_rate: int, channels: int, buffer_size: int) -> bool:
+        if is_simulated_platform():
+            # Wybrane jawnie w kontenerze/iOS - mikser bez urządzenia
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+            self.audible = False
+        elif os.environ.get('SDL_AUDIODRIVER', '') == 'dummy':
+            # Usuń wymuszenie dummy, jeśli zostało odziedziczone ze środowiska
+            del os.environ['SDL_AUDIODRIVER']
+        pygame = self._pygame = optional_import("pygame")
+        if pygame is None:
+            print("Wyjście pygame: nie udało się zaimportować modułu")
+            return False
+        pygame.mixer.pre_init(frequency=sample_rate, size=-16, channels=channels, buffer=buffer_size,
+                              devicename=self.device)
+        try:
+            pygame.mixer.init()
+        except Exception as e:
+            print(f"Wyjście pygame: brak urządzenia ({e})")
+            return False
+        mixer_init = pygame.mixer.get_init()
+        if not mixer_init:
+            return False
+        # Mikser mógł przyjąć inny format niż żądany
+        self.sample_rate, _, self.channels = mixer_init
+        self.buffer_size = buffer_size
+        self._channel = pygame.mixer.Channel(0)
+        return True
+
+    def prepare(self, pcm) -> Any:
+        return self._pygame.mixer.Sound(buffer=pcm.tobytes())
+
+    def play(self, key: str, prepared: Any) -> None:
+        self._channel.play(prepared)
+
+    def is_busy(self) -> Optional[bool]:
+        return self._channel is not None and self._channel.get_busy()
+
+    def stop(self) -> None:
+        if self._channel is not None:
+            self._channel.stop()
+
+    def close(self) -> None:
+        if self._pygame is not None and self._pygame.mixer.get_init():
+            self._pygame.mixer.quit()
+
+    @property
+    def output_latency_ms(self) -> float:
+        return self.buffer_size / float(self.sample_rate) * 1000.0 if self.sample_rate else 0.0
+
+
+class SubprocessBackend(AudioBackend):
+    """Wyjście przez zewnętrzny odtwarzacz czytający surowy PCM ze standardowego wejścia"""
+
+    command = ""
+
+    def __init__(self, device: Optional[str] = None):
+        super().__init__(device)
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def player_args(self) -> List[str]:
+        raise NotImplementedError
+
+    def prepare(self, pcm) -> Any:
+        # Widok na bufor PCM - bez kopii (bufor może być współdzielony przez kilka stref)
+        return memoryview(pcm).cast("B")
+
+    def play(self, key: str, prepared: Any) -> None:
+        self.stop()
+        process = subprocess.Popen(self.player_args(), stdin=subprocess.PIPE,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with self._lock:
+            self._process = process
+        # Zapis do potoku w tle - odtwarzacz czyta dane w tempie odtwarzania
+        threading.Thread(target=self._feed, args=(process, prepared), daemon=True).start()
+
+    @staticmethod
+    def _feed(process: subprocess.Popen, data: bytes) -> None:
+        try:
+            process.stdin.write(data)
+            process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass  # odtwarzanie przerwane
+        process.wait()
+
+    def is_busy(self) -> Optional[bool]:
+        process = self._process
+        return process is not None and process.poll() is None
+
+    def stop(self) -> None:
+        with self._lock:
+            process, self._process = self._process, None
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+    close = stop
+
+
+class AlsaBackend(SubprocessBackend):
+    """ALSA przez `aplay`"""
+
+    name = "alsa"
+    command = "aplay"
+
+    def probe(self) -> Tuple[bool, str]:
+        if shutil.which(self.command) is None:
+            return False, "brak programu aplay"
+        try:
+            with open("/proc/asound/cards") as f:
+                cards = f.read()
+        except OSError:
+            return False, "brak /proc/asound/cards"
+        if "no soundcards" in cards or not cards.strip():
+            return False, "brak kart dźwiękowych ALSA"
+        return True, cards.strip().splitlines()[0].strip()
+
+    def player_args(self) -> List[str]:
+        device = ["-D", self.device] if self.device else []
+        return [self.command, "-q", *device, "-t", "raw", "-f", "S16_LE",
+                "-r", str(self.sample_rate), "-c", str(self.channels), "-"]
+
+
+class PulseBackend(SubprocessBackend):
+    """PulseAudio (lub PipeWire z warstwą zgodności) przez `pacat`"""
+
+    name = "pulse"
+    command = "pacat"
+
+    def probe(self) -> Tuple[bool, str]:
+        if shutil.which(self.command) is None:
+            return False, "brak programu pacat"
+        if shutil.which("pactl") is None:
+            return True, "pacat (bez pactl - serwer niesprawdzony)"
+        try:
+            result = subprocess.run(["pactl", "info"], capture_output=True, timeout=2, check=False)
+        except (subprocess.TimeoutExpired, OSError) as e:
+            return False, f"pactl info: {e}"
+        if result.returncode != 0:
+            return False, "serwer PulseAudio niedostępny"
+        if self.device:
+            try:
+                sinks = subprocess.run(["pactl", "list", "short", "sinks"], capture_output=True,
+                                       text=True, timeout=2, check=False).stdout
+            except (subprocess.TimeoutExpired, OSError) as e:
+                return False, f"pactl list: {e}"
+            if self.device not in sinks.split():
+                return False, f"brak ujścia {self.device}"
+        return True, "serwer PulseAudio dostępny"
+
+    def player_args(self) -> List[str]:
+        device = [f"--device={self.device}"] if self.device else []
+        return [self.command, "--raw", *device, "--format=s16le", f"--rate={self.sample_rate}",
+                f"--channels={self.channels}", "--latency-msec=50"]
+
+    @property
+    def output_latency_ms(self) -> float:
+        return 50.0
+
+
+class WavFileSink(AudioBackend):
+    """
+    Zapisuje każde odtworzenie jako kolejny plik WAV (deterministyczne testy).
+    Urządzeniem jest katalog docelowy (domyślnie BARKING_DOG_AUDIO_SINK_DIR).
+    """
+
+    name = "file"
+    audible = False
+
+    def __init__(self, device: Optional[str] = None):
+        super().__init__(device)
+        self.directory = Path(device) if device else AUDIO_SINK_DIR
+        self.written = 0
+        self.last_written_at: Optional[float] = None
+
+    def probe(self) -> Tuple[bool, str]:
+        # Bez skutków ubocznych - katalog tworzony dopiero przy otwarciu wyjścia
+        existing = self.directory
+        while not existing.exists() and existing.parent != existing:
+            existing = existing.parent
+        if not existing.is_dir():
+            return False, f"{existing} nie jest katalogiem"
+        if not os.access(existing, os.W_OK | os.X_OK):
+            return False, f"brak prawa zapisu do {existing}"
+        return True, str(self.directory)
+
+    def open(self, sample_rate: int, channels: int, buffer_size: int) -> bool:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            print(f"Wyjście file: nie można utworzyć katalogu {self.directory} ({e.strerror})")
+            return False
+        return super().open(sample_rate, channels, buffer_size)
+
+    def play(self, key: str, prepared: Any) -> None:
+        self.last_written_at = time.time()
+        self.written += 1
+        target = self.directory / f"{self.written:06d}_{Path(key).stem}.wav"
+        with wave.open(str(target), "wb") as wav_file:
+            wav_file.setnchannels(self.channels)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(self.sample_rate)
+            wav_file.writeframes(prepared.tobytes())
+
+    def describe(self) -> Dict[str, Any]:
+        info = super().describe()
+        info.update({"directory": str(self.directory), "written": self.written,
+                     "last_written_at": self.last_written_at})
+        return info
+
+
+class NullSink(AudioBackend):
+    """Brak wyjścia - odtworzenie jest tylko zliczane (symulacja, benchmarki)"""
+
+    name = "null"
+    audible = False
+
+    def __init__(self, device: Optional[str] = None):
+        super().__init__(device)
+        self.played = 0
+        self.last_key: Optional[str] = None
+        self.last_played_at: Optional[float] = None
+
+    def play(self, key: str, prepared: Any) -> None:
+        self.played += 1
+        self.last_key = key
+        self.last_played_at = time.time()
+
+    def describe(self) -> Dict[str, Any]:
+        info = super().describe()
+        info.update({"played": self.played, "last": Path(self.last_key).name if self.last_key else None,
+                     "last_played_at": self.last_played_at})
+        return info
+
+
+BACKENDS = {
+    "pygame": PygameBackend,
+    "alsa": AlsaBackend,
+    "pulse": PulseBackend,
+    "file": WavFileSink,
+    "null": NullSink,
+}
+
+
+def probe_backends() -> Dict[str, Dict[str, Any]]:
+    """Sprawdza wszystkie wyjścia (raz, przy starcie). Zwraca nazwa -> {available, detail}."""
+    results = {}
+    for name, backend_class in BACKENDS.items():
+        try:
+            available, detail = backend_class().probe()
+        except Exception as e:
+            available, detail = False, str(e)
+        results[name] = {"available": available, "detail": detail}
+    return results
+
+
+def select_backend(sample_rate: int, channels: int, buffer_size: int,
+                   requested: str = AUDIO_BACKEND) -> Tuple[Optional[AudioBackend], Dict[str, Dict[str, Any]]]:
+    """
+    Wybiera i otwiera wyjście audio.
+    W trybie auto na platformie bez fizycznego wyjścia (kontener/iOS) wybierane jest null.
+
+    Returns:
+        (otwarte wyjście lub None, wyniki sprawdzenia wszystkich wyjść)
+    """
+    probes = probe_backends()
+    if requested != "auto":
+        if requested not in BACKENDS:
+            print(f"Nieznane wyjście audio: {requested} (dostępne: auto, {', '.join(BACKENDS)}) - używam auto")
+            requested = "auto"
+        else:
+            order = (requested,)
+    if requested == "auto":
+        order = ("null",) if is_simulated_platform() else AUTO_ORDER
+
+    for name in order:
+        if not probes[name]["available"]:
+            continue
+        backend = BACKENDS[name]()
+        if backend.open(sample_rate, channels, buffer_size):
+            probes[name]["selected"] = True
+            return backend, probes
+        probes[name].update({"available": False, "detail": "nie udało się otworzyć"})
+    return None, probes
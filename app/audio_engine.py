@@ -0,0 +1,560 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Długo żyjący silnik audio.
+
+Urządzenie wyjściowe otwierane jest raz przy starcie, a wszystkie dźwięki
+z bazy są dekodowane do buforów PCM w pamięci. Odtworzenie to tylko
+przekazanie gotowego bufora do wyjścia audio (app/audio_backends.py) -
+bez ponownej inicjalizacji i czytania pliku z dysku.
+
+Wyrównanie głośności (app/loudness.py) i głośność globalna nakładane są
+na bufor PCM raz, przy jego przygotowaniu - odtworzenie nie kosztuje nic
+więcej. Po zmianie głośności bufor jest skalowany ponownie przy pierwszym
+odtworzeniu (jedno mnożenie tablicy).
+
+Z bankiem próbek (app/sample_bank.py) bufory nie są dekodowane do pamięci
+procesu - to widoki na wspólny plik mapowany w pamięci (wyrównanie głośności
+zapisane w banku), dzielone przez wszystkie procesy serwera.
+
+Sekwencje szczeknięć (app/sequence.py) sklejane są z tych buforów w jeden
+i odtwarzane jednym wywołaniem wyjścia audio.
+"""
+
+import os
+import math
+import time
+import wave
+import asyncio
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Set, Tuple
+
+from .startup_profile import is_available, optional_import
+
+# numpy i soundfile importowane przy pierwszym dekodowaniu (poza ścieżką startu serwera)
+NUMPY_AVAILABLE = is_available("numpy")
+SOUNDFILE_AVAILABLE = is_available("soundfile")
+
+from .audio_backends import AudioBackend, probe_backends, select_backend
+from .audio_zones import ZONES_CONFIG, select_zones
+from .loudness import LOUDNESS_NORMALIZE, LOUDNESS_TARGET, MAX_GAIN_DB, TRUE_PEAK_MAX, normalization_gain_db
+from .models import AudioStatus, SoundRecord, SoundsDatabase
+from .sample_bank import SAMPLE_BANK_ENABLED, SampleBank, bank_item
+from .sequence import SequenceCache, render_sequence
+
+# Domyślny format miksera (zgodny z plikami z tools/optimize.py)
+DEFAULT_SAMPLE_RATE = 22050
+DEFAULT_CHANNELS = 2
+DEFAULT_BUFFER_SIZE = 512
+
+# Limit pamięci na wstępnie zdekodowane bufory (pozostałe dekodowane przy pierwszym użyciu)
+PRELOAD_MAX_MB = float(os.environ.get("BARKING_DOG_PRELOAD_MAX_MB", "128"))
+
+# Wzmocnienie traktowane jako 1.0 (różnica poniżej 0.0001 dB) - np. po zaokrągleniu zapisanym w banku próbek
+UNITY_GAIN_TOLERANCE = 1e-5
+
+# Głośność globalna przy starcie (0-1, mnożnik amplitudy) - zmieniana przez POST /audio/volume
+DEFAULT_VOLUME = min(1.0, max(0.0, float(os.environ.get("BARKING_DOG_VOLUME", "1.0"))))
+
+
+def decode_to_pcm(path: str, sample_rate: int, channels: int) -> "np.ndarray":
+    """
+    Dekoduje plik audio do tablicy int16 o kształcie (ramki, kanały)
+    w formacie miksera (częstotliwość próbkowania i liczba kanałów).
+    """
+    np = optional_import("numpy")
+    sf = optional_import("soundfile") if SOUNDFILE_AVAILABLE else None
+    if sf is not None:
+        data, sr = sf.read(path, dtype="int16", always_2d=True)
+    else:
+        # Bez soundfile obsługujemy tylko 16-bitowe pliki WAV
+        with wave.open(path, "rb") as wav_file:
+            if wav_file.getsampwidth() != 2:
+                raise ValueError("Obsługiwane są tylko 16-bitowe pliki WAV (brak soundfile)")
+            sr = wav_file.getframerate()
+            raw = wav_file.readframes(wav_file.getnframes())
+            data = np.frombuffer(raw, dtype="<i2").reshape(-1, wav_file.getnchannels())
+
+    # Dopasuj częstotliwość próbkowania (interpolacja liniowa)
+    if sr != sample_rate and len(data) > 0:
+        n_out = int(round(len(data) * sample_rate / float(sr)))
+        src_x = np.arange(len(data), dtype=np.float64)
+        dst_x = np.linspace(0, len(data) - 1, n_out)
+        data = np.stack(
+            [np.interp(dst_x, src_x, data[:, ch]) for ch in range(data.shape[1])],
+            axis=1,
+        ).round().astype(np.int16)
+
+    # Dopasuj liczbę kanałów
+    if data.shape[1] != channels:
+        if data.shape[1] == 1:
+            data = np.repeat(data, channels, axis=1)
+        elif channels == 1:
+            data = data.mean(axis=1, keepdims=True).astype(np.int16)
+        else:
+            data = data[:, :channels]
+
+    return np.ascontiguousarray(data, dtype=np.int16)
+
+
+def apply_gain(pcm: "np.ndarray", gain: float) -> "np.ndarray":
+    """Bufor int16 przeskalowany o wzmocnienie liniowe (z przycięciem); przy 1.0 - ten sam bufor"""
+    if abs(gain - 1.0) < UNITY_GAIN_TOLERANCE:
+        return pcm
+    np = optional_import("numpy")
+    scaled = pcm.astype(np.float32)
+    scaled *= gain
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, -32768, 32767, out=scaled)
+    return scaled.astype(np.int16)
+
+
+class LatencyStats:
+    """Statystyki opóźnienia od żądania do pierwszej ramki audio"""
+
+    def __init__(self):
+        self.count = 0
+        self.last_ms: Optional[float] = None
+        self.min_ms: Optional[float] = None
+        self.max_ms: Optional[float] = None
+        self.total_ms = 0.0
+
+    def record(self, latency_ms: float) -> None:
+        """Zapisz pojedynczy pomiar"""
+        self.count += 1
+        self.last_ms = latency_ms
+        self.total_ms += latency_ms
+        self.min_ms = latency_ms if self.min_ms is None else min(self.min_ms, latency_ms)
+        self.max_ms = latency_ms if self.max_ms is None else max(self.max_ms, latency_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Zwraca statystyki jako słownik (dla API)"""
+        return {
+            "count": self.count,
+            "last_ms": round(self.last_ms, 2) if self.last_ms is not None else None,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "min_ms": round(self.min_ms, 2) if self.min_ms is not None else None,
+            "max_ms": round(self.max_ms, 2) if self.max_ms is not None else None,
+        }
+
+
+class AudioEngine:
+    """
+    Silnik audio otwierający wyjście raz i odtwarzający dźwięki z RAM.
+    Bufory PCM są kluczowane ścieżką pliku.
+    """
+
+    def __init__(self, sample_rate: int = DEFAULT_SAMPLE_RATE,
+                 channels: int = DEFAULT_CHANNELS,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 bank_path: Optional[Path] = None):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.buffer_size = buffer_size
+        self.driver: Optional[str] = None
+        self.simulated = False
+        self.backend: Optional[AudioBackend] = None
+        self.probes: Dict[str, Dict[str, Any]] = {}
+        self.zone_probes: Dict[str, Dict[str, Any]] = {}
+        self.latency = LatencyStats()
+        self._buffers: Dict[str, "np.ndarray"] = {}
+        self._sounds: Dict[str, Any] = {}
+        self._memory_bytes = 0
+        # Głośność: globalna, poziom docelowy i pomiary plików (LUFS, dBTP) - klucz to ścieżka
+        self.volume = DEFAULT_VOLUME
+        self.loudness_target = LOUDNESS_TARGET
+        self.normalize = LOUDNESS_NORMALIZE
+        self._loudness: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+        # Wzmocnienie nałożone na przygotowany bufor i rozmiar jego przeskalowanej kopii
+        self._gains: Dict[str, float] = {}
+        self._scaled_bytes: Dict[str, int] = {}
+        # Bank próbek (tworzony po otwarciu wyjścia - zna format miksera) i bufory z niego mapowane
+        self.bank_path = bank_path if SAMPLE_BANK_ENABLED else None
+        self.bank: Optional[SampleBank] = None
+        self._mapped: Set[str] = set()
+        self._mapped_bytes = 0
+        # Wzmocnienie zapisane w buforze (bank) - przygotowanie nakłada tylko różnicę
+        self._baked: Dict[str, float] = {}
+        # Wyrenderowane sekwencje szczeknięć (/warn/sequence)
+        self.sequences = SequenceCache()
+        self._lock = threading.Lock()
+        # Numer bieżącego odtworzenia i koniec bufora PCM (time.monotonic())
+        self.play_seq = 0
+        self._play_deadline = 0.0
+
+    @property
+    def is_ready(self) -> bool:
+        """Czy wyjście audio zostało otwarte"""
+        return self.backend is not None
+
+    @property
+    def output_latency_ms(self) -> float:
+        """Opóźnienie wnoszone przez bufor wyjścia"""
+        return self.backend.output_latency_ms if self.backend is not None else 0.0
+
+    def start(self) -> bool:
+        """
+        Otwiera wyjście audio (jednorazowo).
+        Sprawdzenie możliwości platformy i wybór wyjścia wykonywane są tylko tutaj.
+        """
+        if self.is_ready:
+            return True
+
+        if not NUMPY_AVAILABLE:
+            print("Silnik audio: brak numpy - używam odtwarzania awaryjnego")
+            return False
+
+        backend = None
+        if ZONES_CONFIG:
+            # Tryb wielostrefowy (BARKING_DOG_ZONES)
+            backend, self.zone_probes = select_zones(self.sample_rate, self.channels, self.buffer_size)
+            if backend is None:
+                print("Silnik audio: żadna strefa nie jest dostępna - używam pojedynczego wyjścia")
+        if backend is None:
+            backend, self.probes = select_backend(self.sample_rate, self.channels, self.buffer_size)
+        else:
+            self.probes = probe_backends()
+        for name, probe in self.probes.items():
+            print(f"Silnik audio: wyjście {name:<6} {'dostępne' if probe['available'] else 'niedostępne'}"
+                  f"{' - ' + probe['detail'] if probe['detail'] else ''}")
+        if backend is None:
+            print("Silnik audio: brak dostępnego wyjścia audio")
+            return False
+
+        # Wyjście mogło przyjąć inny format niż żądany
+        self.sample_rate, self.channels = backend.sample_rate, backend.channels
+        self.backend = backend
+        self.driver = backend.name
+        self.simulated = not backend.audible
+        if self.bank_path is not None:
+            self.bank = SampleBank(self.bank_path, self.sample_rate, self.channels)
+
+        if self.simulated:
+            print(f"Silnik audio: {self.driver} (SYMULACJA bez dźwięku)")
+        else:
+            print(f"Silnik audio: {self.driver} ({self.sample_rate} Hz, {self.channels} kan., bufor {self.buffer_size})")
+        return True
+
+    def set_loudness(self, info: SoundRecord) -> None:
+        """Zapamiętuje pomiar głośności pliku (z bazy) - wzmocnienie liczone jest z niego przy przygotowaniu"""
+        self._loudness[info.path] = (info.loudness_lufs, info.true_peak_dbtp)
+
+    def normalization_gain(self, path: str) -> float:
+        """Wzmocnienie liniowe wyrównujące plik do poziomu docelowego (1.0 - bez pomiaru lub wyłączone)"""
+        if not self.normalize:
+            return 1.0
+        loudness, peak = self._loudness.get(path, (None, None))
+        return 10.0 ** (normalization_gain_db(loudness, peak, self.loudness_target) / 20.0)
+
+    def sound_gain(self, path: str) -> float:
+        """Wzmocnienie liniowe bufora: wyrównanie do poziomu docelowego razy głośność globalna"""
+        return self.volume * self.normalization_gain(path)
+
+    def _render(self, path: str, gain: float) -> "np.ndarray":
+        """Bufor do zapisu w banku: zdekodowany plik z nałożonym wzmocnieniem"""
+        return apply_gain(decode_to_pcm(path, self.sample_rate, self.channels), gain)
+
+    def _bank_view(self, path: str) -> Tuple[Optional["np.ndarray"], float]:
+        """Bufor z banku próbek (dopisuje plik, jeśli go brak lub się zmienił) i zapisane w nim wzmocnienie"""
+        item = bank_item(path, self.normalization_gain(path))
+        if item is None:
+            return None, 1.0
+        try:
+            if not self.bank.is_current(item):
+                self.bank.sync([item], self._render)
+        except Exception as e:
+            print(f"Bank próbek: nie udało się zapisać {Path(path).name} ({e}) - dekoduję do pamięci procesu")
+            return None, 1.0
+        if not self.bank.is_current(item):
+            return None, 1.0
+        return self.bank.view_with_gain(path)
+
+    def _prepare(self, path: str, pcm: "np.ndarray") -> None:
+        """Przygotowuje bufor dla wyjścia z bieżącym wzmocnieniem (bez części zapisanej już w buforze)"""
+        gain = self.sound_gain(path)
+        scaled = apply_gain(pcm, gain / self._baked.get(path, 1.0))
+        sound = self.backend.prepare(scaled)
+        scaled_bytes = scaled.nbytes if scaled is not pcm else 0
+        with self._lock:
+            if self._buffers.get(path) is not pcm:
+                # Bufor zwolniony lub podmieniony w międzyczasie
+                return
+            self._sounds[path] = sound
+            self._gains[path] = gain
+            self._memory_bytes += scaled_bytes - self._scaled_bytes.get(path, 0)
+            self._scaled_bytes[path] = scaled_bytes
+
+    def load(self, path: str, info: Optional[SoundRecord] = None) -> bool:
+        """Dekoduje pojedynczy plik do bufora PCM w pamięci (`info` - rekord z pomiarem głośności)"""
+        if not self.is_ready:
+            return False
+        if info is not None:
+            self.set_loudness(info)
+        if path in self._buffers:
+            return True
+
+        pcm, baked = self._bank_view(path) if self.bank is not None else (None, 1.0)
+        mapped = pcm is not None
+        if not mapped:
+            pcm = decode_to_pcm(path, self.sample_rate, self.channels)
+        with self._lock:
+            self._buffers[path] = pcm
+            self._baked[path] = baked
+            if mapped:
+                # Strony pliku banku - wspólne dla procesów, poza pamięcią prywatną procesu
+                self._mapped.add(path)
+                self._mapped_bytes += pcm.nbytes
+            else:
+                self._memory_bytes += pcm.nbytes
+        self._prepare(path, pcm)
+        return True
+
+    def unload(self, path: str) -> None:
+        """Zwalnia bufor PCM pliku (np. usuniętego lub zmienionego)"""
+        self.sequences.discard(path)
+        with self._lock:
+            pcm = self._buffers.pop(path, None)
+            self._sounds.pop(path, None)
+            self._gains.pop(path, None)
+            self._baked.pop(path, None)
+            if pcm is None:
+                return
+            if path in self._mapped:
+                self._mapped.discard(path)
+                self._mapped_bytes -= pcm.nbytes
+            else:
+                self._memory_bytes -= pcm.nbytes
+            self._memory_bytes -= self._scaled_bytes.pop(path, 0)
+
+    def preload(self, database: SoundsDatabase, keep: tuple = ()) -> int:
+        """
+        Dekoduje wszystkie poprawne dźwięki z bazy do pamięci.
+        Bufory plików, których nie ma już w bazie (poza `keep`), są zwalniane.
+        Zwraca liczbę buforów w pamięci.
+        """
+        if not self.is_ready:
+            return 0
+
+        start = time.perf_counter()
+        wanted = set()
+        # Kopia wpisów - preload działa w wątku, a bazę zmienia w tym czasie pętla zdarzeń
+        for info in list(database.get_all_sounds().values()):
+            if info.status == AudioStatus.OK:
+                wanted.add(info.path)
+                self.set_loudness(info)
+        wanted.update(keep)
+        for path in [p for p in self._loudness if p not in wanted]:
+            del self._loudness[path]
+
+        for path in [p for p in self._buffers if p not in wanted]:
+            self.unload(path)
+
+        if self.bank is not None:
+            # Jedna synchronizacja banku dla całej bazy - dekodowane są tylko pliki nowe lub zmienione
+            items = [item for item in (bank_item(path, self.normalization_gain(path)) for path in sorted(wanted))
+                     if item is not None]
+            try:
+                sync = self.bank.sync(items, self._render, complete=True)
+                print(f"Bank próbek: {self.bank.describe()['sounds']} dźwięków, zapisano {sync['written']}, "
+                      f"usunięto {sync['removed']}{' (przepisany)' if sync['compacted'] else ''}")
+            except Exception as e:
+                print(f"Bank próbek: synchronizacja nie powiodła się ({e}) - dekoduję do pamięci procesu")
+            # Bufory spoza banku lub z innym wzmocnieniem niż aktualny wpis - mapowane ponownie
+            for path, key, gain in items:
+                if path in self._buffers and self.bank.is_current((path, key, gain)) and (
+                        path not in self._mapped or self._baked.get(path) != gain):
+                    self.unload(path)
+
+        budget = PRELOAD_MAX_MB * 1024 * 1024
+        for path in sorted(wanted):
+            if self.get_memory_bytes() >= budget:
+                print(f"Silnik audio: osiągnięto limit {PRELOAD_MAX_MB:.0f} MB - pozostałe pliki będą dekodowane przy pierwszym użyciu")
+                break
+            try:
+                self.load(path)
+            except Exception as e:
+                print(f"Silnik audio: nie udało się zdekodować {Path(path).name}: {e}")
+
+        elapsed = (time.perf_counter() - start) * 1000.0
+        print(f"Silnik audio: w pamięci {len(self._buffers)} buforów "
+              f"({self.get_memory_bytes() / (1024 * 1024):.2f} MB prywatnie, "
+              f"{self._mapped_bytes / (1024 * 1024):.2f} MB z banku próbek), czas {elapsed:.0f} ms")
+        return len(self._buffers)
+
+    def play(self, path: str, requested_at: Optional[float] = None) -> Optional[float]:
+        """
+        Odtwarza bufor z pamięci (dekoduje go, jeśli nie był wstępnie załadowany).
+
+        Args:
+            path: Ścieżka pliku (klucz bufora)
+            requested_at: Moment przyjęcia żądania (time.perf_counter())
+
+        Returns:
+            Opóźnienie od żądania do pierwszej ramki w ms lub None, gdy silnik nie może odtworzyć pliku
+        """
+        if not self.is_ready:
+            return None
+
+        if path not in self._sounds:
+            try:
+                self.load(path)
+            except Exception as e:
+                print(f"Silnik audio: nie udało się zdekodować {Path(path).name}: {e}")
+                return None
+
+        if requested_at is None:
+            requested_at = time.perf_counter()
+
+        if self._gains.get(path) != self.sound_gain(path):
+            # Głośność zmieniła się od przygotowania bufora
+            self._prepare(path, self._buffers[path])
+
+        return self._start(path, self._sounds[path], len(self._buffers[path]), requested_at)
+
+    def play_sequence(self, paths: List[str], gaps: List[int],
+                      requested_at: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Odtwarza kilka dźwięków jako jeden bufor PCM (app/sequence.py) - bez przerw między odtworzeniami.
+
+        Args:
+            paths: Ścieżki kolejnych szczeknięć
+            gaps: Przerwy między nimi w ramkach (ujemne - nakładanie z przenikaniem)
+            requested_at: Moment przyjęcia żądania (time.perf_counter())
+
+        Returns:
+            latency_ms, frames, cached i render_ms lub None, gdy silnik nie może odtworzyć sekwencji
+        """
+        if not self.is_ready:
+            return None
+        if requested_at is None:
+            requested_at = time.perf_counter()
+        for path in paths:
+            if path not in self._buffers:
+                try:
+                    self.load(path)
+                except Exception as e:
+                    print(f"Silnik audio: nie udało się zdekodować {Path(path).name}: {e}")
+                    return None
+
+        gains = tuple(self.sound_gain(path) for path in paths)
+        key = (tuple(paths), tuple(gaps), gains)
+        item = self.sequences.get(key)
+        render_ms = 0.0
+        if item is None:
+            start = time.perf_counter()
+            parts = [apply_gain(self._buffers[path], gain / self._baked.get(path, 1.0))
+                     for path, gain in zip(paths, gains)]
+            pcm = render_sequence(parts, gaps)
+            item = (pcm, self.backend.prepare(pcm))
+            self.sequences.put(key, *item)
+            render_ms = (time.perf_counter() - start) * 1000.0
+
+        pcm, prepared = item
+        label = f"sekwencja-{Path(paths[0]).stem}-x{len(paths)}"
+        latency_ms = self._start(label, prepared, len(pcm), requested_at)
+        return {"latency_ms": latency_ms, "frames": len(pcm), "cached": render_ms == 0.0, "render_ms": render_ms}
+
+    def _start(self, key: str, prepared: Any, frames: int, requested_at: float) -> float:
+        """Przekazuje przygotowany bufor do wyjścia; zwraca opóźnienie do pierwszej ramki w ms"""
+        self.backend.play(key, prepared)
+        self.play_seq += 1
+        self._play_deadline = (time.monotonic() + frames / float(self.sample_rate)
+                               + self.output_latency_ms / 1000.0)
+        # Pierwsza ramka trafia na wyjście po opróżnieniu bufora wyjścia
+        latency_ms = (time.perf_counter() - requested_at) * 1000.0 + self.output_latency_ms
+        self.latency.record(latency_ms)
+        return latency_ms
+
+    def stop(self) -> None:
+        """Zatrzymuje bieżące odtwarzanie"""
+        if self.backend is not None:
+            self.backend.stop()
+        self._play_deadline = 0.0
+
+    async def wait_finished(self, play_seq: int, poll_interval: float = 0.02) -> None:
+        """
+        Czeka na koniec odtworzenia `play_seq` (zwrócone przez play() przez atrybut play_seq).
+        Sygnał końca pochodzi z wyjścia audio; wyjścia bez takiego sygnału (null, file)
+        kończą się po długości bufora PCM. Kończy się też, gdy zaczęło się kolejne
+        odtworzenie lub wywołano stop().
+        """
+        while play_seq == self.play_seq:
+            busy = self.backend.is_busy() if self.backend is not None else False
+            remaining = self._play_deadline - time.monotonic()
+            if busy is None:
+                if remaining <= 0:
+                    return
+                await asyncio.sleep(remaining)
+            elif not busy:
+                return
+            else:
+                await asyncio.sleep(poll_interval)
+
+    def set_volume(self, volume: Optional[float] = None, target: Optional[float] = None,
+                   normalize: Optional[bool] = None) -> None:
+        """
+        Zmienia głośność globalną (0-1), poziom docelowy (LUFS) lub wyrównanie głośności.
+        Bufory skalowane są ponownie przy ich najbliższym odtworzeniu.
+        """
+        if volume is not None:
+            if not 0.0 <= volume <= 1.0:
+                raise ValueError("Głośność musi być z zakresu 0-1")
+            self.volume = volume
+        if target is not None:
+            self.loudness_target = target
+        if normalize is not None:
+            self.normalize = normalize
+
+    def get_volume(self) -> Dict[str, Any]:
+        """Ustawienia głośności (dla API)"""
+        gains = [normalization_gain_db(loudness, peak, self.loudness_target)
+                 for loudness, peak in self._loudness.values() if loudness is not None]
+        return {
+            "volume": self.volume,
+            "volume_db": round(20.0 * math.log10(self.volume), 2) if self.volume > 0 else None,
+            "normalize": self.normalize,
+            "target_lufs": self.loudness_target,
+            "true_peak_max_dbtp": TRUE_PEAK_MAX,
+            "max_gain_db": MAX_GAIN_DB,
+            "measured_sounds": len(gains),
+            "gain_db_min": round(min(gains), 2) if gains else None,
+            "gain_db_max": round(max(gains), 2) if gains else None,
+        }
+
+    def get_memory_bytes(self) -> int:
+        """Łączny rozmiar buforów PCM w pamięci"""
+        return self._memory_bytes
+
+    def get_status(self) -> Dict[str, Any]:
+        """Stan silnika (dla API)"""
+        return {
+            "ready": self.is_ready,
+            "driver": self.driver,
+            "simulated": self.simulated,
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "buffer_size": self.buffer_size,
+            "output_latency_ms": round(self.output_latency_ms, 2),
+            "preloaded_sounds": len(self._buffers),
+            "preloaded_mb": round(self.get_memory_bytes() / (1024 * 1024), 2),
+            "mapped_mb": round(self._mapped_bytes / (1024 * 1024), 2),
+            "sample_bank": self.bank.describe() if self.bank is not None else None,
+            "sequences": self.sequences.describe(),
+            "volume": self.volume,
+            "normalize": self.normalize,
+            "latency": self.latency.to_dict(),
+            "backend": self.backend.describe() if self.backend is not None else None,
+        }
@@ -0,0 +1,243 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Tryb wielostrefowy - jeden /warn odtwarza dźwięk na kilku wyjściach naraz.
+
+Strefy konfiguruje BARKING_DOG_ZONES (JSON), np.:
+
+    {"salon": {"backend": "alsa", "device": "hw:0,0"},
+     "ogrod": {"backend": "pulse", "device": "bluez_sink.00_11_22_33_44_55.a2dp_sink", "latency_ms": 180}}
+
+Bufor PCM dekodowany jest raz i współdzielony przez strefy. Każda strefa ma
+własną kompensację opóźnienia (`latency_ms`, np. dla głośnika Bluetooth):
+strefy o mniejszym opóźnieniu startują później, tak aby dźwięk zabrzmiał
+wszędzie w tym samym momencie.
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .audio_backends import AUDIO_SINK_DIR, BACKENDS, AudioBackend
+
+ZONES_CONFIG = os.environ.get("BARKING_DOG_ZONES", "")
+
+
+class AudioZone:
+    """Strefa: wyjście audio z kompensacją opóźnienia i statystyką odtworzeń"""
+
+    def __init__(self, name: str, backend: AudioBackend, latency_ms: float = 0.0):
+        self.name = name
+        self.backend = backend
+        self.latency_ms = latency_ms
+        # Opóźnienie startu względem najwolniejszej strefy (wyliczane przy tworzeniu grupy)
+        self.delay_ms = 0.0
+        self.plays = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_started_at: Optional[float] = None
+        self.last_offset_ms: Optional[float] = None
+
+    @property
+    def total_latency_ms(self) -> float:
+        """Opóźnienie od startu do dźwięku: bufor wyjścia + kompensacja strefy"""
+        return self.backend.output_latency_ms + self.latency_ms
+
+    def start(self, key: str, prepared: Any, started: float) -> None:
+        """Uruchamia odtwarzanie w strefie; `started` - moment odtworzenia grupy (perf_counter)"""
+        try:
+            self.backend.play(key, prepared)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            print(f"Strefa {self.name}: błąd odtwarzania: {e}")
+            return
+        self.last_offset_ms = (time.perf_counter() - started) * 1000.0
+        self.last_started_at = time.time()
+        self.plays += 1
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "backend": self.backend.describe(),
+            "latency_ms": self.latency_ms,
+            "total_latency_ms": round(self.total_latency_ms, 2),
+            "delay_ms": round(self.delay_ms, 2),
+            "plays": self.plays,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "last_started_at": self.last_started_at,
+            "last_offset_ms": round(self.last_offset_ms, 2) if self.last_offset_ms is not None else None,
+            "busy": self.backend.is_busy(),
+        }
+
+
+class MultiZoneBackend(AudioBackend):
+    """
+    Wyjście złożone z kilku stref. Dla silnika audio zachowuje się jak jedno wyjście:
+    opóźnienie wyjścia to opóźnienie najwolniejszej strefy, a pozostałe strefy
+    startują z przesunięciem wyrównującym moment zabrzmienia dźwięku.
+    """
+
+    name = "zones"
+
+    def __init__(self, zones: List[AudioZone]):
+        super().__init__()
+        self.zones = zones
+        self.audible = any(zone.backend.audible for zone in zones)
+        self.sample_rate = zones[0].backend.sample_rate
+        self.channels = zones[0].backend.channels
+        self.buffer_size = zones[0].backend.buffer_size
+        self.last_skew_ms: Optional[float] = None
+        self._cancel = threading.Event()
+        self._dispatcher: Optional[threading.Thread] = None
+
+        target = self.output_latency_ms
+        for zone in zones:
+            zone.delay_ms = target - zone.total_latency_ms
+
+    def open(self, sample_rate: int, channels: int, buffer_size: int) -> bool:
+        # Strefy są otwierane przy budowaniu grupy (select_zones)
+        return True
+
+    def prepare(self, pcm) -> Any:
+        # Jeden zdekodowany bufor - każde wyjście dostaje własny uchwyt do tych samych danych
+        return {zone.name: zone.backend.prepare(pcm) for zone in self.zones}
+
+    def play(self, key: str, prepared: Any) -> None:
+        self._cancel.set()
+        self._cancel = threading.Event()
+        started = time.perf_counter()
+        delayed = sorted((zone for zone in self.zones if zone.delay_ms > 0), key=lambda zone: zone.delay_ms)
+        for zone in self.zones:
+            if zone.delay_ms <= 0:
+                zone.start(key, prepared[zone.name], started)
+        if delayed:
+            self._dispatcher = threading.Thread(target=self._dispatch,
+                                                args=(delayed, key, prepared, started, self._cancel), daemon=True)
+            self._dispatcher.start()
+        else:
+            self._update_skew()
+
+    def _dispatch(self, zones: List[AudioZone], key: str, prepared: Any, started: float,
+                  cancel: threading.Event) -> None:
+        """Uruchamia strefy z przesunięciem (w kolejności rosnącego opóźnienia)"""
+        for zone in zones:
+            wait = started + zone.delay_ms / 1000.0 - time.perf_counter()
+            if wait > 0 and cancel.wait(wait):
+                return
+            zone.start(key, prepared[zone.name], started)
+        self._update_skew()
+
+    def _update_skew(self) -> None:
+        """Rozrzut momentów zabrzmienia dźwięku między strefami (ms)"""
+        audible = [zone.last_offset_ms + zone.total_latency_ms
+                   for zone in self.zones if zone.last_offset_ms is not None]
+        self.last_skew_ms = max(audible) - min(audible) if audible else None
+
+    def is_busy(self) -> Optional[bool]:
+        if self._dispatcher is not None and self._dispatcher.is_alive():
+            return True
+        states = [zone.backend.is_busy() for zone in self.zones]
+        if any(states):
+            return True
+        return None if None in states else False
+
+    def stop(self) -> None:
+        self._cancel.set()
+        for zone in self.zones:
+            zone.backend.stop()
+
+    def close(self) -> None:
+        self.stop()
+        for zone in self.zones:
+            zone.backend.close()
+
+    @property
+    def output_latency_ms(self) -> float:
+        return max(zone.total_latency_ms for zone in self.zones)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "audible": self.audible,
+            "last_skew_ms": round(self.last_skew_ms, 2) if self.last_skew_ms is not None else None,
+            "zones": [zone.describe() for zone in self.zones],
+        }
+
+
+def parse_zones(config: str) -> Dict[str, Dict[str, Any]]:
+    """Parsuje konfigurację stref (JSON: nazwa -> {backend, device, latency_ms})"""
+    zones = json.loads(config)
+    if not isinstance(zones, dict) or not all(isinstance(spec, dict) for spec in zones.values()):
+        raise ValueError("BARKING_DOG_ZONES: oczekiwano obiektu JSON {nazwa: {backend, device, latency_ms}}")
+    return zones
+
+
+def select_zones(sample_rate: int, channels: int, buffer_size: int,
+                 config: str = ZONES_CONFIG) -> Tuple[Optional[MultiZoneBackend], Dict[str, Dict[str, Any]]]:
+    """
+    Sprawdza i otwiera wyjścia wszystkich stref (raz, przy starcie).
+    Strefy niedostępne są pomijane i raportowane.
+
+    Returns:
+        (grupa stref lub None, gdy żadna strefa nie działa; wyniki dla każdej strefy)
+    """
+    try:
+        specs = parse_zones(config)
+    except ValueError as e:
+        print(f"Strefy audio: błędna konfiguracja ({e})")
+        return None, {}
+
+    zones: List[AudioZone] = []
+    results: Dict[str, Dict[str, Any]] = {}
+    # pygame zmienia format miksera - otwierany jako pierwszy, pozostałe strefy przyjmują jego format
+    for name, spec in sorted(specs.items(), key=lambda item: item[1].get("backend") != "pygame"):
+        backend_name = spec.get("backend", "null")
+        device = spec.get("device")
+        if backend_name == "file" and not device:
+            device = str(Path(AUDIO_SINK_DIR) / name)
+        result = results[name] = {"backend": backend_name, "device": device, "available": False, "detail": ""}
+        if backend_name not in BACKENDS:
+            result["detail"] = f"nieznane wyjście {backend_name}"
+            continue
+        if backend_name == "pygame" and any(zone.backend.name == "pygame" for zone in zones):
+            result["detail"] = "mikser pygame obsługuje tylko jedną strefę"
+            continue
+
+        backend = BACKENDS[backend_name](device)
+        try:
+            available, result["detail"] = backend.probe()
+            if available and not backend.open(sample_rate, channels, buffer_size):
+                available, result["detail"] = False, "nie udało się otworzyć"
+        except Exception as e:
+            available, result["detail"] = False, str(e)
+        if not available:
+            continue
+
+        sample_rate, channels = backend.sample_rate, backend.channels
+        result["available"] = True
+        zones.append(AudioZone(name, backend, float(spec.get("latency_ms", 0.0))))
+
+    for name, result in results.items():
+        state = "aktywna" if result["available"] else "niedostępna"
+        print(f"Strefa {name}: {result['backend']} {result['device'] or ''} - {state}"
+              f"{' (' + result['detail'] + ')' if result['detail'] else ''}")
+    if not zones:
+        return None, results
+    return MultiZoneBackend(zones), results
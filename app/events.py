@@ -0,0 +1,165 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Rozsyłanie zdarzeń odtwarzania do klientów (Server-Sent Events i WebSocket).
+
+Każdy subskrybent ma własny bufor o stałej pojemności. Publikacja tylko dopisuje
+zdarzenie do buforów i budzi oczekujących - nie czeka na żadnego klienta, więc
+wolne połączenie nie blokuje pętli zdarzeń ani pozostałych subskrybentów.
+Gdy bufor jest pełny, najstarsze zdarzenie jest odrzucane, a klient dostaje
+przy następnym odczycie liczbę utraconych zdarzeń (może wtedy odczytać stan
+przez /playback/state). Zdarzenie serializowane jest raz - wszyscy subskrybenci
+dostają te same bajty.
+"""
+
+import os
+import json
+import time
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+# Pojemność bufora jednego subskrybenta (zdarzenia)
+EVENTS_BUFFER = int(os.environ.get("BARKING_DOG_EVENTS_BUFFER", "64"))
+# Największa liczba jednoczesnych subskrybentów na proces
+EVENTS_MAX_SUBSCRIBERS = int(os.environ.get("BARKING_DOG_EVENTS_MAX_SUBSCRIBERS", "2000"))
+# Odstęp komunikatów podtrzymujących bezczynne połączenie (wykrywa też rozłączonych klientów)
+EVENTS_KEEPALIVE_SECONDS = float(os.environ.get("BARKING_DOG_EVENTS_KEEPALIVE", "15"))
+
+SSE_KEEPALIVE = b": ping\n\n"
+
+
+class Event:
+    """Zdarzenie z gotową postacią dla SSE i WebSocket (bez numeru - komunikaty dla jednego klienta)"""
+
+    __slots__ = ("id", "type", "data", "sse", "text")
+
+    def __init__(self, event_id: Optional[int], event_type: str, data: Dict[str, Any]):
+        self.id = event_id
+        self.type = event_type
+        self.data = data
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        sse_id = f"id: {event_id}\n" if event_id is not None else ""
+        self.sse = f"{sse_id}event: {event_type}\ndata: {payload}\n\n".encode("utf-8")
+        self.text = f'{{"id":{json.dumps(event_id)},"event":{json.dumps(event_type)},"data":{payload}}}'
+
+
+def dropped_event(count: int) -> Event:
+    """Informacja dla klienta, że jego bufor się przepełnił i zdarzenia przepadły"""
+    return Event(None, "dropped", {"count": count})
+
+
+class Subscriber:
+    """Ograniczony bufor zdarzeń jednego klienta"""
+
+    __slots__ = ("buffer", "maxsize", "dropped", "_wakeup")
+
+    def __init__(self, maxsize: int = EVENTS_BUFFER):
+        self.maxsize = max(1, maxsize)
+        self.buffer: Deque[Event] = deque()
+        self.dropped = 0
+        self._wakeup = asyncio.Event()
+
+    def put(self, event: Event) -> bool:
+        """Dopisuje zdarzenie (bez czekania). Zwraca False, gdy odrzucono najstarsze zdarzenie."""
+        kept = True
+        if len(self.buffer) >= self.maxsize:
+            self.buffer.popleft()
+            self.dropped += 1
+            kept = False
+        self.buffer.append(event)
+        self._wakeup.set()
+        return kept
+
+    async def get(self, timeout: Optional[float] = None) -> Tuple[List[Event], int]:
+        """
+        Czeka na zdarzenia (najwyżej timeout sekund) i zabiera wszystkie z bufora.
+        Zwraca (zdarzenia, liczba odrzuconych od poprzedniego odczytu); pusta lista po upływie czasu.
+        """
+        if not self.buffer:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        events = list(self.buffer)
+        self.buffer.clear()
+        dropped, self.dropped = self.dropped, 0
+        return events, dropped
+
+
+class EventHub:
+    """
+    Rozgłaszanie zdarzeń do subskrybentów jednego procesu.
+    publish() można wołać z dowolnego wątku - dostarczenie odbywa się w pętli zdarzeń serwera.
+    """
+
+    def __init__(self, buffer_size: int = EVENTS_BUFFER, max_subscribers: int = EVENTS_MAX_SUBSCRIBERS):
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: Set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._next_id = 0
+        self.published = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def full(self) -> bool:
+        return len(self._subscribers) >= self.max_subscribers
+
+    def subscribe(self) -> Subscriber:
+        """Nowy subskrybent (wywołanie w pętli zdarzeń)"""
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber(self.buffer_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def publish(self, event_type: str, **data: Any) -> None:
+        """Publikuje zdarzenie; bez subskrybentów nic nie jest serializowane"""
+        if not self._subscribers or self._loop is None:
+            return
+        data.setdefault("time", time.time())
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._deliver(event_type, data)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._deliver, event_type, data)
+
+    def _deliver(self, event_type: str, data: Dict[str, Any]) -> None:
+        self._next_id += 1
+        event = Event(self._next_id, event_type, data)
+        self.published += 1
+        for subscriber in self._subscribers:
+            if not subscriber.put(event):
+                self.dropped += 1
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "max_subscribers": self.max_subscribers,
+            "buffer_size": self.buffer_size,
+            "keepalive_seconds": EVENTS_KEEPALIVE_SECONDS,
+            "published": self.published,
+            "dropped": self.dropped,
+        }
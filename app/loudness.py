@@ -0,0 +1,183 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pomiar głośności plików audio i wzmocnienie wyrównujące je do poziomu docelowego.
+
+Głośność zintegrowana liczona jest jak w ITU-R BS.1770 (LUFS): filtr ważący K,
+bloki 400 ms z krokiem 100 ms, bramka bezwzględna -70 LUFS i względna -10 LU.
+Filtr nakładany jest w dziedzinie częstotliwości (odpowiedź obu sekcji
+bikwadratowych w punktach FFT) - całość to kilka operacji NumPy bez pętli
+po próbkach. Plik mono liczony jest jak odtwarzany przez mikser (na obu kanałach).
+
+True peak to szczyt sygnału nadpróbkowanego 4x (interpolacja przez FFT),
+wychwytujący przesterowania między próbkami.
+
+Wynik pomiaru trafia do SoundInfo i indeksu metadanych; wzmocnienie nakładane
+jest na bufor PCM w silniku audio - zmiana poziomu nie wymaga ponownego kodowania plików.
+"""
+
+import os
+import math
+import wave
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .startup_profile import is_available, optional_import
+
+# Poziom docelowy głośności (LUFS) i limit szczytu po wzmocnieniu (dBTP)
+LOUDNESS_TARGET = float(os.environ.get("BARKING_DOG_LOUDNESS_TARGET", "-20"))
+TRUE_PEAK_MAX = float(os.environ.get("BARKING_DOG_TRUE_PEAK_MAX", "-1"))
+
+# Największe wzmocnienie cichego pliku (dB) - nie podbijamy szumu nagrań prawie bez dźwięku
+MAX_GAIN_DB = float(os.environ.get("BARKING_DOG_LOUDNESS_MAX_GAIN", "12"))
+
+# 0 - bez wyrównania głośności (tylko głośność globalna)
+LOUDNESS_NORMALIZE = os.environ.get("BARKING_DOG_LOUDNESS_NORMALIZE", "1") != "0"
+
+BLOCK_SECONDS = 0.4
+STEP_SECONDS = 0.1
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+TRUE_PEAK_OVERSAMPLE = 4
+
+# Nadpróbkowanie w blokach (ograniczona pamięć przy długich plikach); zakładka tłumi efekty brzegowe FFT
+TRUE_PEAK_BLOCK = 1 << 15
+TRUE_PEAK_MARGIN = 256
+
+
+def read_float(path: Path) -> Tuple["np.ndarray", int]:
+    """Plik jako tablica float32 (ramki, kanały) w zakresie [-1, 1] i częstotliwość próbkowania"""
+    np = optional_import("numpy")
+    sf = optional_import("soundfile") if is_available("soundfile") else None
+    if sf is not None:
+        data, sr = sf.read(str(path), dtype="float32", always_2d=True)
+        return data, sr
+    # Bez soundfile obsługujemy tylko 16-bitowe pliki WAV
+    with wave.open(str(path), "rb") as wav_file:
+        if wav_file.getsampwidth() != 2:
+            raise ValueError("Obsługiwane są tylko 16-bitowe pliki WAV (brak soundfile)")
+        raw = wav_file.readframes(wav_file.getnframes())
+        data = np.frombuffer(raw, dtype="<i2").reshape(-1, wav_file.getnchannels())
+        return data.astype(np.float32) / 32768.0, wav_file.getframerate()
+
+
+@lru_cache(maxsize=8)
+def _k_weighting_response(n: int, sr: int) -> "np.ndarray":
+    """
+    Zespolona odpowiedź filtru K (półka +4 dB i górnoprzepustowy 38 Hz) w punktach rfft długości n.
+    Zależy tylko od (n, sr) - pliki biblioteki mają zwykle wspólne wartości, więc liczona jest raz.
+    """
+    np = optional_import("numpy")
+    # Współczynniki z prototypów analogowych (jak w BS.1770 dla 48 kHz, przeliczone na sr)
+    sections = []
+    f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = math.tan(math.pi * f0 / sr)
+    vh = 10.0 ** (gain_db / 20.0)
+    vb = vh ** 0.4996667741545416
+    a0 = 1.0 + k / q + k * k
+    sections.append(((vh + vb * k / q + k * k) / a0, 2.0 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0,
+                     2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0))
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * f0 / sr)
+    a0 = 1.0 + k / q + k * k
+    sections.append((1.0, -2.0, 1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0))
+
+    z = np.exp(-1j * np.pi * np.arange(n // 2 + 1) / (n / 2.0))
+    response = np.ones(n // 2 + 1, dtype=np.complex128)
+    for b0, b1, b2, a1, a2 in sections:
+        response *= (b0 + b1 * z + b2 * z * z) / (1.0 + a1 * z + a2 * z * z)
+    response.flags.writeable = False
+    return response
+
+
+def integrated_loudness(data: "np.ndarray", sr: int) -> Optional[float]:
+    """Głośność zintegrowana w LUFS (None - cisza poniżej bramki bezwzględnej)"""
+    np = optional_import("numpy")
+    frames = len(data)
+    if frames == 0:
+        return None
+    # Zera na końcu - ogon filtru nie zawija się na początek sygnału (splot kołowy FFT)
+    n = 1 << int(math.ceil(math.log2(frames + sr // 2)))
+    spectrum = np.fft.rfft(data, n=n, axis=0) * _k_weighting_response(n, sr)[:, None]
+    weighted = np.fft.irfft(spectrum, n=n, axis=0)[:frames]
+
+    # Średnia energia bloków 400 ms (krok 100 ms) z sum skumulowanych - bez pętli po blokach
+    block = min(frames, int(round(BLOCK_SECONDS * sr)))
+    step = max(1, int(round(STEP_SECONDS * sr)))
+    cumulative = np.concatenate([np.zeros((1, data.shape[1])), np.cumsum(weighted * weighted, axis=0)])
+    starts = np.arange(0, frames - block + 1, step)
+    energy = (cumulative[starts + block] - cumulative[starts]) / block
+    # Mono gra na obu kanałach miksera - liczony jak dwa identyczne kanały
+    channel_weight = 2.0 if data.shape[1] == 1 else 1.0
+    z = energy.sum(axis=1) * channel_weight
+
+    with np.errstate(divide="ignore"):
+        block_loudness = -0.691 + 10.0 * np.log10(z)
+    gated = z[block_loudness > ABSOLUTE_GATE]
+    if gated.size == 0:
+        return None
+    relative = -0.691 + 10.0 * math.log10(gated.mean()) + RELATIVE_GATE
+    gated = z[(block_loudness > ABSOLUTE_GATE) & (block_loudness > relative)]
+    return -0.691 + 10.0 * math.log10(gated.mean())
+
+
+def true_peak(data: "np.ndarray") -> Optional[float]:
+    """Szczyt nadpróbkowany 4x w dBTP (None - sama cisza)"""
+    np = optional_import("numpy")
+    frames = len(data)
+    if frames == 0:
+        return None
+    peak = float(np.abs(data).max())
+    for start in range(0, frames, TRUE_PEAK_BLOCK):
+        low = max(0, start - TRUE_PEAK_MARGIN)
+        high = min(frames, start + TRUE_PEAK_BLOCK + TRUE_PEAK_MARGIN)
+        segment = data[low:high]
+        upsampled = np.fft.irfft(np.fft.rfft(segment, axis=0), n=len(segment) * TRUE_PEAK_OVERSAMPLE, axis=0)
+        first = (start - low) * TRUE_PEAK_OVERSAMPLE
+        last = (min(frames, start + TRUE_PEAK_BLOCK) - low) * TRUE_PEAK_OVERSAMPLE
+        peak = max(peak, float(np.abs(upsampled[first:last]).max()) * TRUE_PEAK_OVERSAMPLE)
+    if peak <= 0.0:
+        return None
+    return 20.0 * math.log10(peak)
+
+
+def measure_loudness(path: Path) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Głośność zintegrowana (LUFS) i true peak (dBTP) pliku, zaokrąglone do 0.01.
+    Bez numpy zwraca (None, None) - plik odtwarzany jest wtedy bez wyrównania.
+    """
+    if not is_available("numpy"):
+        return None, None
+    data, sr = read_float(path)
+    loudness = integrated_loudness(data, sr)
+    peak = true_peak(data)
+    return (round(loudness, 2) if loudness is not None else None,
+            round(peak, 2) if peak is not None else None)
+
+
+def normalization_gain_db(loudness: Optional[float], peak: Optional[float],
+                          target: float = LOUDNESS_TARGET) -> float:
+    """
+    Wzmocnienie (dB) doprowadzające plik do poziomu docelowego.
+    Ograniczone tak, aby szczyt nie przekroczył TRUE_PEAK_MAX, a ciche pliki
+    nie były podbijane bardziej niż o MAX_GAIN_DB. Plik bez pomiaru - 0 dB.
+    """
+    if loudness is None:
+        return 0.0
+    gain = min(target - loudness, MAX_GAIN_DB)
+    if peak is not None:
+        gain = min(gain, TRUE_PEAK_MAX - peak)
+    return gain
@@ -0,0 +1,231 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Metryki w formacie tekstowym Prometheusa (bez zależności od prometheus_client).
+
+Pomiar to wyszukanie binarne kubełka i kilka dodawań pod blokadą, więc
+narzut na żądanie jest pomijalny także na Pi Zero. Tekst metryk budowany
+jest dopiero przy odczycie /metrics. Wartości zmieniające się poza
+pomiarem (rozmiar biblioteki, stan odtwarzania) odczytują kolektory
+wywoływane przy odczycie.
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Kubełki czasu (sekundy) - od pojedynczych ms do skanu dużej biblioteki
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SCAN_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Bazowa metryka z etykietami"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class _ValueMetric(Metric):
+    """Metryka z jedną wartością na serię - ustawianą bezpośrednio lub odczytywaną przy renderowaniu"""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                 read: Callable[[], Dict[LabelValues, float]] = None):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._read = read
+
+    def render(self) -> List[str]:
+        if self._read is not None:
+            values = list(self._read().items())
+        else:
+            with self._lock:
+                values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values
+        ]
+
+
+class Counter(_ValueMetric):
+    """Licznik rosnący"""
+
+    kind = "counter"
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+
+class Gauge(_ValueMetric):
+    """Wartość chwilowa"""
+
+    kind = "gauge"
+
+    def set(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(Metric):
+    """Histogram ze stałymi kubełkami (kumulowanymi dopiero przy renderowaniu)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # etykiety -> [liczniki kubełków (+ kubełek +Inf), suma, liczba]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *label_values: str) -> "_Timer":
+        """Menedżer kontekstu mierzący czas bloku"""
+        return _Timer(self, label_values)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        lines = self.header()
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, label_values: LabelValues):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+        return False
+
+
+class MetricsRegistry:
+    """Zbiór metryk renderowanych razem"""
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = (), read=None) -> Counter:
+        return self.register(Counter(name, documentation, labels, read))
+
+    def gauge(self, name: str, documentation: str, labels: Tuple[str, ...] = (), read=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labels, read))
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> bytes:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class RequestMetricsMiddleware:
+    """
+    Middleware ASGI mierzący czas żądań per szablon trasy (np. /sounds/{filename}),
+    więc nazwy plików nie mnożą serii metryk.
+    """
+
+    def __init__(self, app, histogram: Histogram, counter: Counter):
+        self.app = app
+        self.histogram = histogram
+        self.counter = counter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            if route is not None and hasattr(route, "path"):
+                name = route.path
+            elif scope.get("endpoint") is not None:
+                name = getattr(scope["endpoint"], "__name__", "unknown")
+            else:
+                name = "unmatched"
+            self.histogram.observe(time.perf_counter() - start, name, scope["method"])
+            self.counter.inc(name, scope["method"], str(status[0]))
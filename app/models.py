@@ -13,9 +13,25 @@
 # limitations under the License.
 
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List, Tuple, Union
 from enum import Enum
-import random
+import os
+import sys
+import time
+import threading
+
+from .selection import SoundSelector
+
+def format_size(size_bytes: Optional[int]) -> str:
+    """Rozmiar w naturalnej jednostce (B/KB/MB)"""
+    if size_bytes is None:
+        return "N/A"
+    if size_bytes < 1024:
+        return f"{size_bytes} B"
+    elif size_bytes < 1024 * 1024:
+        return f"{size_bytes / 1024:.1f} KB"
+    else:
+        return f"{size_bytes / (1024 * 1024):.2f} MB"
 
 class AudioStatus(str, Enum):
     """Status pliku audio"""
@@ -36,22 +52,12 @@ class SoundInfo(BaseModel):
     path: str = Field(..., description="Ścieżka do pliku")
     status: AudioStatus = Field(..., description="Status pliku")
     error: Optional[str] = Field(None, description="Opis błędu jeśli status=error")
+    loudness_lufs: Optional[float] = Field(None, description="Głośność zintegrowana (BS.1770) w LUFS")
+    true_peak_dbtp: Optional[float] = Field(None, description="Szczyt nadpróbkowany 4x w dBTP")
     
     def get_formatted_size(self) -> str:
         """Zwraca rozmiar pliku w naturalnej jednostce (B/KB/MB)"""
-        if self.size_bytes is None:
-            return "N/A"
-        
-        bytes_size = self.size_bytes
-        
-        if bytes_size < 1024:
-            return f"{bytes_size} B"
-        elif bytes_size < 1024 * 1024:
-            kb_size = bytes_size / 1024
-            return f"{kb_size:.1f} KB"
-        else:
-            mb_size = bytes_size / (1024 * 1024)
-            return f"{mb_size:.2f} MB"
+        return format_size(self.size_bytes)
     
     def get_size_mb(self) -> float:
         """Zwraca rozmiar w MB (dla kompatybilności wstecznej)"""
@@ -73,114 +79,283 @@ class SoundInfo(BaseModel):
             AudioType: lambda v: v.value
         }
 
-class SoundsDatabase(BaseModel):
-    """Model globalnej bazy danych dźwięków"""
-    database: Dict[str, SoundInfo] = Field(default_factory=dict, description="Baza danych dźwięków")
-    total_files: int = Field(0, description="Łączna liczba plików")
-    total_duration: float = Field(0.0, description="Łączna długość w sekundach") 
-    total_size_bytes: int = Field(0, description="Łączny rozmiar w bajtach")
-    wav_count: int = Field(0, description="Liczba plików WAV")
-    mp3_count: int = Field(0, description="Liczba plików MP3")
-    last_random_sound: Optional[str] = Field(None, description="Ostatnio wylosowany dźwięk")
+# Wspólne egzemplarze powtarzalnych wartości rekordów (częstotliwości próbkowania)
+_SHARED_VALUES: Dict[Any, Any] = {}
+
+# Typ i status rekordu jako napisy (wartości enumów) - jeden obiekt na wartość
+_TYPE_VALUES = {member.value: member.value for member in AudioType}
+_STATUS_VALUES = {member.value: member.value for member in AudioStatus}
+
+
+def _shared(value):
+    """Zwraca współdzielony egzemplarz wartości - tysiące rekordów trzyma jeden obiekt"""
+    if value is None:
+        return None
+    return _SHARED_VALUES.setdefault(value, value)
+
+
+class SoundRecord:
+    """
+    Zwarty wpis bazy dźwięków (wewnętrzny) - odpowiednik SoundInfo bez narzutu Pydantic.
+
+    Sloty zamiast słownika atrybutów, typ, status i częstotliwość jako współdzielone
+    obiekty, ścieżka internowana (kolejne skany i odświeżenia trzymają jeden napis).
+    Do modelu SoundInfo zamieniany jest dopiero przy budowaniu odpowiedzi API.
+    """
+
+    __slots__ = ("length", "sample_rate", "size_bytes", "type", "status", "error", "path",
+                 "loudness_lufs", "true_peak_dbtp")
+
+    def __init__(self, path: str, type: Union[AudioType, str], status: Union[AudioStatus, str],
+                 length: Optional[float] = None, sample_rate: Optional[int] = None,
+                 size_bytes: Optional[int] = None, error: Optional[str] = None,
+                 loudness_lufs: Optional[float] = None, true_peak_dbtp: Optional[float] = None):
+        self.path = sys.intern(path)
+        try:
+            self.type = _TYPE_VALUES[type]
+            self.status = _STATUS_VALUES[status]
+        except KeyError as e:
+            raise ValueError(f"Nieznany typ lub status pliku: {e}") from None
+        self.length = length
+        self.sample_rate = _shared(sample_rate)
+        self.size_bytes = size_bytes
+        self.error = error
+        self.loudness_lufs = loudness_lufs
+        self.true_peak_dbtp = true_peak_dbtp
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SoundRecord":
+        """Rekord z pól SoundInfo (np. wpisu indeksu metadanych)"""
+        return cls(data["path"], data["type"], data["status"], data.get("length"), data.get("sample_rate"),
+                   data.get("size_bytes"), data.get("error"), data.get("loudness_lufs"), data.get("true_peak_dbtp"))
+
+    @classmethod
+    def from_model(cls, info: "SoundInfo") -> "SoundRecord":
+        return cls(info.path, info.type, info.status, info.length, info.sample_rate, info.size_bytes, info.error,
+                   info.loudness_lufs, info.true_peak_dbtp)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Pola w kolejności i formacie SoundInfo (JSON odpowiedzi i indeksu)"""
+        return {
+            "length": self.length,
+            "sample_rate": self.sample_rate,
+            "size_bytes": self.size_bytes,
+            "type": self.type,
+            "path": self.path,
+            "status": self.status,
+            "error": self.error,
+            "loudness_lufs": self.loudness_lufs,
+            "true_peak_dbtp": self.true_peak_dbtp,
+        }
+
+    def to_model(self) -> SoundInfo:
+        """Model odpowiedzi API"""
+        return SoundInfo(**self.to_dict())
+
+    def get_formatted_size(self) -> str:
+        return format_size(self.size_bytes)
+
+    def _key(self) -> tuple:
+        return (self.length, self.sample_rate, self.size_bytes, self.type, self.status, self.error, self.path,
+                self.loudness_lufs, self.true_peak_dbtp)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, SoundRecord):
+            return NotImplemented
+        return self._key() == other._key()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"SoundRecord({self.path!r}, {self.type}, {self.status}, length={self.length})"
+
+
+class SoundsDatabase:
+    """
+    Globalna baza danych dźwięków (zwarte rekordy SoundRecord, nazwa pliku -> rekord).
+    Indeks poprawnych plików (w silniku wyboru) i statystyki aktualizowane są przyrostowo
+    przy każdej zmianie, dzięki czemu losowanie i odczyt statystyk mają koszt O(1).
+    Modele Pydantic powstają dopiero w odpowiedziach API.
+    """
+
+    def __init__(self, database: Optional[Dict[str, Union[SoundRecord, SoundInfo]]] = None):
+        self.database: Dict[str, SoundRecord] = {}
+        self.total_files = 0
+        self.total_duration = 0.0
+        self.total_size_bytes = 0
+        self.wav_count = 0
+        self.mp3_count = 0
+        self._last_random_sound: Optional[str] = None
+        # Historia wyboru wspólna dla procesów serwera (SharedPlaybackState) - None: tylko ten proces
+        self.shared_history = None
+
+        # Silnik wyboru - przechowuje też indeks plików ze statusem OK
+        self._selector = SoundSelector()
+        # Suma długości w mikrosekundach - liczby całkowite nie kumulują błędów zaokrągleń
+        self._duration_us = 0
+        # Numer wersji zawartości - rośnie tylko przy faktycznej zmianie wpisów lub ich kolejności
+        self._version = 0
+        # Identyfikator instancji - wersje z różnych uruchomień się nie mylą (ETag)
+        self._epoch = os.urandom(4).hex()
+        # Wartości wyliczone dla danej wersji: klucz -> (wersja, wartość)
+        self._cache: Dict[str, Any] = {}
+
+        for filename, sound_info in (database or {}).items():
+            self.add_sound(filename, sound_info)
     
-    def add_sound(self, filename: str, sound_info: SoundInfo) -> None:
-        """Dodaj plik dźwiękowy do bazy danych"""
-        self.database[filename] = sound_info
-        self._update_stats()
+    def add_sound(self, filename: str, sound_info: Union[SoundRecord, SoundInfo]) -> None:
+        """Dodaj plik dźwiękowy do bazy danych (model SoundInfo zamieniany jest na rekord)"""
+        record = sound_info if isinstance(sound_info, SoundRecord) else SoundRecord.from_model(sound_info)
+        previous = self.database.get(filename)
+        if previous == record:
+            return
+        self._version += 1
+        if previous is not None:
+            self._account(previous, -1)
+        self.database[filename] = record
+        self._account(record, 1)
+        
+        # Silnik wyboru dowiaduje się tylko o zmianie statusu - podmiana pliku nie rusza jego stanu
+        was_valid = previous is not None and previous.status == AudioStatus.OK
+        is_valid = record.status == AudioStatus.OK
+        if is_valid and not was_valid:
+            self._selector.add(filename)
+        elif was_valid and not is_valid:
+            self._selector.remove(filename)
     
     def remove_sound(self, filename: str) -> bool:
         """Usuń plik dźwiękowy z bazy danych"""
         if filename in self.database:
-            del self.database[filename]
-            self._update_stats()
+            self._version += 1
+            record = self.database.pop(filename)
+            self._account(record, -1)
+            if record.status == AudioStatus.OK:
+                self._selector.remove(filename)
             return True
         return False
     
-    def get_sound(self, filename: str) -> Optional[SoundInfo]:
+    def get_sound(self, filename: str) -> Optional[SoundRecord]:
         """Pobierz informacje o pliku dźwiękowym"""
         return self.database.get(filename)
     
-    def get_all_sounds(self) -> Dict[str, SoundInfo]:
+    def get_all_sounds(self) -> Dict[str, SoundRecord]:
         """Pobierz wszystkie pliki dźwiękowe"""
         return self.database
     
+    def get_valid_sounds_count(self) -> int:
+        """Liczba plików ze statusem OK"""
+        return len(self._selector)
+    
+    def get_selector(self) -> SoundSelector:
+        """Silnik wyboru dźwięków (konfiguracja trybu, z wyborami innych procesów)"""
+        if self.shared_history is not None:
+            self.shared_history.sync_selection(self._selector)
+        return self._selector
+
+    def configure_selection(self, mode: Optional[str] = None, window: Optional[int] = None,
+                            weights: Optional[Dict[str, float]] = None) -> None:
+        """Zmienia tryb wyboru (we wszystkich procesach, gdy historia jest wspólna)"""
+        if self.shared_history is not None:
+            self.shared_history.configure_selection(self._selector, mode=mode, window=window, weights=weights)
+        else:
+            self._selector.configure(mode=mode, window=window, weights=weights)
+
+    @property
+    def last_random_sound(self) -> Optional[str]:
+        """Ostatnio wylosowany dźwięk (we wszystkich procesach, gdy historia jest wspólna)"""
+        if self.shared_history is not None:
+            return self.shared_history.last_selection
+        return self._last_random_sound
+
+    @last_random_sound.setter
+    def last_random_sound(self, filename: Optional[str]) -> None:
+        self._last_random_sound = filename
+    
+    @property
+    def version(self) -> int:
+        """Numer wersji zawartości bazy"""
+        return self._version
+    
+    @property
+    def epoch(self) -> str:
+        """Identyfikator instancji bazy (zmienia się przy każdym uruchomieniu)"""
+        return self._epoch
+    
+    def cached(self, key: str, build) -> Any:
+        """Zwraca wartość wyliczoną przez build() dla bieżącej wersji bazy (liczoną raz na wersję)"""
+        entry = self._cache.get(key)
+        if entry is None or entry[0] != self._version:
+            entry = self._cache[key] = (self._version, build())
+        return entry[1]
+    
+    def sort_by_name(self) -> None:
+        """Uporządkuj bazę alfabetycznie według nazwy pliku"""
+        ordered = dict(sorted(self.database.items()))
+        if list(ordered) != list(self.database):
+            self.database = ordered
+            self._version += 1
+    
     def clear(self) -> None:
         """Wyczyść bazę danych"""
+        if self.database:
+            self._version += 1
         self.database.clear()
         self.last_random_sound = None
+        self._selector.clear()
+        self._duration_us = 0
         self._update_stats()
     
-    def get_random_sound(self, max_attempts: int = 50) -> Optional[tuple[str, SoundInfo]]:
+    def get_random_sound(self, max_attempts: int = 50) -> Optional[tuple[str, SoundRecord]]:
         """
-        Pobierz losowy dźwięk, różny od ostatnio wylosowanego.
+        Pobierz losowy dźwięk zgodnie z trybem silnika wyboru
+        (domyślnie: różny od ostatnio wylosowanego). Koszt wyboru jest stały.
         
         Args:
-            max_attempts: Maksymalna liczba prób losowania (zabezpieczenie przed nieskończoną pętlą)
+            max_attempts: Nieużywany (pozostawiony dla zgodności wstecznej)
             
         Returns:
-            Tuple (nazwa_pliku, SoundInfo) lub None jeśli brak dostępnych plików
+            Tuple (nazwa_pliku, SoundRecord) lub None jeśli brak dostępnych plików
         """
-        # Pobierz tylko pliki ze statusem OK
-        valid_sounds = {
-            filename: info for filename, info in self.database.items() 
-            if info.status == AudioStatus.OK
-        }
-        
-        if not valid_sounds:
+        if self.shared_history is not None:
+            filename = self.shared_history.pick(self._selector)
+        else:
+            filename = self._selector.pick(self._last_random_sound)
+        if filename is None:
             return None
-        
-        # Jeśli jest tylko jeden plik, zwróć go (nie ma z czym porównywać)
-        if len(valid_sounds) == 1:
-            filename = list(valid_sounds.keys())[0]
-            self.last_random_sound = filename
-            return (filename, valid_sounds[filename])
-        
-        # Jeśli nie ma ostatnio wylosowanego, losuj dowolny
-        if self.last_random_sound is None:
-            filename = random.choice(list(valid_sounds.keys()))
-            self.last_random_sound = filename
-            return (filename, valid_sounds[filename])
-        
-        # Losuj różny od ostatniego
-        attempts = 0
-        while attempts < max_attempts:
-            filename = random.choice(list(valid_sounds.keys()))
-            if filename != self.last_random_sound:
-                self.last_random_sound = filename
-                return (filename, valid_sounds[filename])
-            attempts += 1
-        
-        # Jeśli po max_attempts nadal nie udało się wylosować różnego,
-        # zwróć dowolny inny niż ostatni (awaryjne rozwiązanie)
-        available_sounds = [f for f in valid_sounds.keys() if f != self.last_random_sound]
-        if available_sounds:
-            filename = random.choice(available_sounds)
-            self.last_random_sound = filename
-            return (filename, valid_sounds[filename])
-        
-        # Ostateczność - zwróć ostatnio wylosowany (nie powinno się zdarzyć)
-        if self.last_random_sound in valid_sounds:
-            return (self.last_random_sound, valid_sounds[self.last_random_sound])
-        
-        return None
+        self._last_random_sound = filename
+        return (filename, self.database[filename])
     
     def reset_random_history(self) -> None:
         """Resetuj historię losowania - następny losowy dźwięk może być dowolny"""
-        self.last_random_sound = None
+        self._last_random_sound = None
+        if self.shared_history is not None:
+            self.shared_history.reset_selection(self._selector)
+        else:
+            self._selector.reset()
     
     def get_formatted_total_size(self) -> str:
         """Zwraca łączny rozmiar w naturalnej jednostce"""
-        if self.total_size_bytes < 1024:
-            return f"{self.total_size_bytes} B"
-        elif self.total_size_bytes < 1024 * 1024:
-            kb_size = self.total_size_bytes / 1024
-            return f"{kb_size:.1f} KB"
-        else:
-            mb_size = self.total_size_bytes / (1024 * 1024)
-            return f"{mb_size:.2f} MB"
+        return format_size(self.total_size_bytes)
+    
+    def _account(self, sound_info: SoundRecord, sign: int) -> None:
+        """Uwzględnij (sign=1) lub wycofaj (sign=-1) wpis w statystykach"""
+        self.total_files += sign
+        if sound_info.type == AudioType.WAV:
+            self.wav_count += sign
+        elif sound_info.type == AudioType.MP3:
+            self.mp3_count += sign
+        
+        if sound_info.status != AudioStatus.OK:
+            return
+        
+        if sound_info.length is not None:
+            self._duration_us += sign * int(round(sound_info.length * 1_000_000))
+            self.total_duration = self._duration_us / 1_000_000
+        if sound_info.size_bytes is not None:
+            self.total_size_bytes += sign * sound_info.size_bytes
     
     def _update_stats(self) -> None:
-        """Zaktualizuj statystyki bazy danych"""
+        """Zaktualizuj statystyki bazy danych (pełne przeliczenie - tylko po wyczyszczeniu)"""
         valid_files = [info for info in self.database.values() if info.status == AudioStatus.OK]
         
         self.total_files = len(self.database)
@@ -190,7 +365,13 @@ class SoundsDatabase(BaseModel):
         self.mp3_count = len([info for info in self.database.values() if info.type == AudioType.MP3])
     
     def get_stats(self) -> Dict[str, Any]:
-        """Pobierz statystyki bazy danych"""
+        """Pobierz statystyki bazy danych (pola pochodne liczone raz na wersję bazy)"""
+        stats = dict(self.cached("stats", self._build_stats))
+        stats["last_random_sound"] = self.last_random_sound
+        stats["valid_sounds_count"] = len(self._selector)
+        return stats
+    
+    def _build_stats(self) -> Dict[str, Any]:
         return {
             "total_files": self.total_files,
             "total_duration": self.total_duration,
@@ -200,8 +381,9 @@ class SoundsDatabase(BaseModel):
             "wav_count": self.wav_count,
             "mp3_count": self.mp3_count,
             "duration_minutes": round(self.total_duration / 60, 1) if self.total_duration else 0,
-            "last_random_sound": self.last_random_sound,
-            "valid_sounds_count": len([info for info in self.database.values() if info.status == AudioStatus.OK])
+            # Pola zmienne między wersjami - uzupełniane w get_stats()
+            "last_random_sound": None,
+            "valid_sounds_count": 0
         }
 
 class SoundResponse(BaseModel):
@@ -242,11 +424,15 @@ class RandomSoundErrorResponse(BaseModel):
 
 class WarnResponse(BaseModel):
     """Model odpowiedzi API dla endpointu /warn"""
-    status: str = Field(..., description="Status operacji: PLAYING lub BUSY")
+    status: str = Field(..., description="Status operacji: PLAYING, BUSY, QUEUED, COALESCED lub DROPPED")
     filename: Optional[str] = Field(None, description="Nazwa odtwarzanego pliku")
     info: Optional[SoundInfo] = Field(None, description="Informacje o odtwarzanym pliku")
     message: str = Field(..., description="Opis operacji")
     estimated_end_time: Optional[float] = Field(None, description="Przewidywany czas zakończenia odtwarzania (timestamp)")
+    latency_ms: Optional[float] = Field(None, description="Opóźnienie od żądania do pierwszej ramki audio w ms")
+    queue_position: Optional[int] = Field(None, description="Pozycja w kolejce odtwarzania (0 - odtwarzany teraz)")
+    estimated_start_time: Optional[float] = Field(None, description="Przewidywany czas rozpoczęcia odtwarzania (timestamp)")
+    interrupted: Optional[str] = Field(None, description="Nazwa przerwanego pliku (/warn/interrupt)")
 
 class WarnErrorResponse(BaseModel):
     """Model odpowiedzi błędu dla endpointu /warn"""
@@ -255,30 +441,144 @@ class WarnErrorResponse(BaseModel):
     total_files: int = Field(..., description="Łączna liczba plików w bazie")
     valid_files: int = Field(..., description="Liczba plików bez błędów")
 
-class PlaybackState(BaseModel):
-    """Model stanu odtwarzania audio"""
-    is_playing: bool = Field(default=False, description="Czy aktualnie odtwarzany jest dźwięk")
-    filename: Optional[str] = Field(default=None, description="Nazwa odtwarzanego pliku")
-    start_time: Optional[float] = Field(default=None, description="Czas rozpoczęcia odtwarzania (timestamp)")
-    duration: Optional[float] = Field(default=None, description="Długość pliku w sekundach")
-    end_time: Optional[float] = Field(default=None, description="Przewidywany czas zakończenia (timestamp)")
+class StopResponse(BaseModel):
+    """Model odpowiedzi API dla endpointu /stop"""
+    status: str = Field(..., description="Status operacji: STOPPED lub IDLE (nic nie było odtwarzane)")
+    filename: Optional[str] = Field(None, description="Nazwa przerwanego pliku")
+    cleared_queue: int = Field(0, description="Liczba usuniętych wpisów kolejki odtwarzania")
+    message: str = Field(..., description="Opis operacji")
+
+class UploadJobResponse(BaseModel):
+    """Model odpowiedzi API dla zadania przesyłania dźwięku (POST /sounds, /sounds/jobs/{id})"""
+    job_id: int = Field(..., description="Numer zadania")
+    status: str = Field(..., description="Status: RECEIVING, QUEUED, PROCESSING, INSERTING, DONE lub ERROR")
+    filename: str = Field(..., description="Nazwa przesłanego pliku")
+    output: str = Field(..., description="Nazwa pliku w bazie dźwięków")
+    optimize: bool = Field(..., description="Czy plik jest dostrajany do wzorca (optimize.py)")
+    stage: Optional[str] = Field(None, description="Bieżący etap optymalizacji (reference, decode, f0, shift, write)")
+    progress: float = Field(..., description="Postęp zadania (0-1)")
+    bytes_received: int = Field(..., description="Liczba przyjętych bajtów")
+    created_at: float = Field(..., description="Czas założenia zadania (timestamp)")
+    finished_at: Optional[float] = Field(None, description="Czas zakończenia zadania (timestamp)")
+    f0: Optional[float] = Field(None, description="Wykryta częstotliwość podstawowa w Hz")
+    f0_target: Optional[float] = Field(None, description="Częstotliwość podstawowa wzorca w Hz")
+    timings_ms: Dict[str, float] = Field(default_factory=dict, description="Czasy etapów optymalizacji w ms")
+    info: Optional[SoundInfo] = Field(None, description="Informacje o dodanym pliku")
+    error: Optional[str] = Field(None, description="Opis błędu jeśli status=ERROR")
+
+class SelectionConfigRequest(BaseModel):
+    """Model żądania zmiany trybu wyboru dźwięków"""
+    mode: Optional[str] = Field(None, description="Tryb: random, window, shuffle lub weighted")
+    window: Optional[int] = Field(None, ge=1, description="Rozmiar okna bez powtórzeń (tryb window)")
+    weights: Optional[Dict[str, float]] = Field(None, description="Wagi dźwięków (tryb weighted), domyślnie 1.0")
+
+class VolumeConfigRequest(BaseModel):
+    """Model żądania zmiany głośności"""
+    volume: Optional[float] = Field(None, ge=0.0, le=1.0, description="Głośność globalna (0-1, mnożnik amplitudy)")
+    target_lufs: Optional[float] = Field(None, ge=-60.0, le=0.0, description="Poziom docelowy wyrównania głośności w LUFS")
+    normalize: Optional[bool] = Field(None, description="Czy wyrównywać głośność plików do poziomu docelowego")
+
+class SequenceStep(BaseModel):
+    """Krok wzorca sekwencji szczeknięć"""
+    sound: Optional[str] = Field(None, description="Nazwa pliku; brak lub \"random\" - dźwięk losowany")
+    repeat: int = Field(1, ge=1, le=16, description="Liczba powtórzeń kroku")
+    gap_ms: Optional[float] = Field(None, ge=-2000.0, le=10000.0,
+                                    description="Przerwa po każdym powtórzeniu (domyślnie gap_ms wzorca); ujemna - nakładanie z przenikaniem")
+
+class SequenceRequest(BaseModel):
+    """Model żądania odtworzenia sekwencji szczeknięć (/warn/sequence)"""
+    steps: List[SequenceStep] = Field(..., min_length=1, description="Kroki wzorca")
+    repeat: int = Field(1, ge=1, le=16, description="Liczba powtórzeń całego wzorca")
+    gap_ms: float = Field(250.0, ge=-2000.0, le=10000.0, description="Domyślna przerwa między szczeknięciami w ms")
+    jitter_ms: float = Field(0.0, ge=0.0, le=1000.0, description="Losowe odchylenie przerw (±ms)")
+    seed: Optional[int] = Field(None, description="Ziarno losowania dźwięków i odchyleń (powtarzalna sekwencja)")
+
+class SequenceResponse(BaseModel):
+    """Model odpowiedzi API dla endpointu /warn/sequence"""
+    status: str = Field(..., description="Status operacji: PLAYING lub BUSY")
+    filenames: List[str] = Field(default_factory=list, description="Kolejne szczeknięcia sekwencji")
+    message: str = Field(..., description="Opis operacji")
+    duration: Optional[float] = Field(None, description="Długość sekwencji w sekundach")
+    estimated_end_time: Optional[float] = Field(None, description="Przewidywany czas zakończenia odtwarzania (timestamp)")
+    latency_ms: Optional[float] = Field(None, description="Opóźnienie od żądania do pierwszej ramki audio w ms")
+    render_ms: Optional[float] = Field(None, description="Czas renderowania bufora w ms (0 - z pamięci podręcznej)")
+    cached: Optional[bool] = Field(None, description="Czy bufor pochodził z pamięci podręcznej sekwencji")
+
+class ReadinessResponse(BaseModel):
+    """Model odpowiedzi API dla endpointu /ready"""
+    ready: bool = Field(..., description="Czy aplikacja jest gotowa do odtwarzania")
+    sound_bank_loaded: bool = Field(..., description="Czy baza dźwięków została załadowana")
+    startup_sound_played: bool = Field(..., description="Czy odtworzono dźwięk startowy")
+    uptime: float = Field(..., description="Czas od uruchomienia procesu w sekundach")
+    loaded_in: Optional[float] = Field(None, description="Czas ładowania bazy dźwięków w sekundach")
+    total_files: int = Field(..., description="Łączna liczba plików w bazie")
+    error: Optional[str] = Field(None, description="Błąd podczas startu")
+
+class PlaybackState:
+    """
+    Stan odtwarzania audio (wewnętrzny, zmieniany przy każdym /warn - zwykła klasa ze slotami)
+    """
+
+    __slots__ = ("is_playing", "filename", "start_time", "duration", "end_time", "playback_id", "_lock")
+
+    # Stan tylko w tym procesie (wspólny dla workerów: shared_state.SharedPlaybackState)
+    shared = False
+
+    def __init__(self):
+        self.is_playing = False                 # Czy aktualnie odtwarzany jest dźwięk
+        self.filename: Optional[str] = None     # Nazwa odtwarzanego pliku
+        self.start_time: Optional[float] = None # Czas rozpoczęcia odtwarzania (timestamp)
+        self.duration: Optional[float] = None   # Długość pliku w sekundach
+        self.end_time: Optional[float] = None   # Przewidywany czas zakończenia (timestamp)
+        self.playback_id = 0                    # Numer kolejnego odtwarzania (rośnie przy każdym starcie)
+        # Blokada stanu - sprawdzenie i zajęcie slotu odtwarzania muszą być jedną operacją
+        self._lock = threading.RLock()
+
+    @property
+    def lock(self) -> threading.RLock:
+        return self._lock
     
-    def start_playback(self, filename: str, duration: float) -> None:
-        """Rozpocznij odtwarzanie nowego pliku"""
-        import time
-        self.is_playing = True
-        self.filename = filename
-        self.start_time = time.time()
-        self.duration = duration
-        self.end_time = time.time() + duration
+    def start_playback(self, filename: str, duration: float) -> int:
+        """Rozpocznij odtwarzanie nowego pliku. Zwraca numer odtwarzania."""
+        with self._lock:
+            self.playback_id += 1
+            self.is_playing = True
+            self.filename = filename
+            self.start_time = time.time()
+            self.duration = duration
+            self.end_time = self.start_time + duration
+            return self.playback_id
+
+    def try_claim(self, choose: Callable[[], Optional[Tuple[Any, ...]]]) -> Optional[Tuple[Optional[int], Any]]:
+        """
+        Atomowo sprawdza slot, wybiera dźwięk i zajmuje slot - równoległe żądania /warn nie uruchomią dwóch dźwięków.
+        choose() wywoływane jest tylko przy wolnym slocie (pod blokadą) i zwraca krotkę zaczynającą się
+        od (nazwa, długość) albo None, gdy nie ma czego odtworzyć.
+
+        Returns:
+            None - dźwięk jest już odtwarzany; (numer odtwarzania, wynik choose()) - (None, None), gdy nic nie wybrano
+        """
+        with self._lock:
+            if self.is_currently_playing():
+                return None
+            choice = choose()
+            if choice is None:
+                return None, None
+            return self.start_playback(choice[0], choice[1]), choice
     
-    def stop_playback(self) -> None:
-        """Zatrzymaj odtwarzanie i wyczyść stan"""
-        self.is_playing = False
-        self.filename = None
-        self.start_time = None
-        self.duration = None
-        self.end_time = None
+    def stop_playback(self, playback_id: Optional[int] = None) -> None:
+        """
+        Zatrzymaj odtwarzanie i wyczyść stan.
+        Z podanym numerem czyści stan tylko, jeśli w międzyczasie nie zaczęło się inne odtwarzanie.
+        """
+        with self._lock:
+            if playback_id is not None and playback_id != self.playback_id:
+                return
+            self.is_playing = False
+            self.filename = None
+            self.start_time = None
+            self.duration = None
+            self.end_time = None
     
     def is_currently_playing(self) -> bool:
         """Sprawdź czy aktualnie odtwarzany jest dźwięk (uwzględniając czas)"""
@@ -286,19 +586,21 @@ class PlaybackState(BaseModel):
             return False
         
         # Sprawdź czy czas odtwarzania już minął
-        import time
         if self.end_time and time.time() > self.end_time:
             # Czas minął - automatycznie wyczyść stan
             self.stop_playback()
             return False
         
         return True
+
+    def is_current(self, playback_id: int) -> bool:
+        """Czy slot nadal należy do tego odtwarzania (nie został zwolniony ani przejęty)"""
+        return self.is_playing and self.playback_id == playback_id
     
     def get_remaining_time(self) -> Optional[float]:
         """Zwraca pozostały czas odtwarzania w sekundach"""
         if not self.is_currently_playing() or not self.end_time:
             return None
         
-        import time
         remaining = self.end_time - time.time()
         return max(0, remaining)
\ No newline at end of file
@@ -0,0 +1,321 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Kolejka odtwarzania z jednym wątkiem roboczym (zadaniem asyncio).
+
+Zamiast odrzucać żądania statusem BUSY, /warn w trybie kolejki dopisuje
+dźwięk do ograniczonej kolejki priorytetowej. Powtórzone wyzwolenia z tego
+samego źródła w krótkim oknie czasu są scalane z już zakolejkowanym
+wpisem, a przepełnienie obsługiwane jest jawną polityką.
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+OVERFLOW_POLICIES = ("drop-oldest", "drop-newest", "reject")
+
+# Konfiguracja kolejki
+PLAYBACK_MODE = os.environ.get("BARKING_DOG_PLAYBACK_MODE", "busy").lower()
+QUEUE_MAXSIZE = int(os.environ.get("BARKING_DOG_QUEUE_MAXSIZE", "8"))
+QUEUE_OVERFLOW = os.environ.get("BARKING_DOG_QUEUE_OVERFLOW", "drop-oldest").lower()
+QUEUE_COALESCE_WINDOW = float(os.environ.get("BARKING_DOG_QUEUE_COALESCE_WINDOW", "2.0"))
+
+# Co ile sekund sprawdzać slot wpisu bez sygnału końca (`item.done` równe None)
+QUEUE_POLL_SECONDS = 0.05
+
+
+class QueuedPlayback:
+    """Pojedynczy wpis kolejki odtwarzania"""
+
+    __slots__ = ("id", "filename", "info", "priority", "trigger", "submitted_at", "started_at", "hits",
+                 "requested_at", "playback_id", "latency_ms", "done")
+
+    def __init__(self, id: int, filename: str, info: Any, priority: int, trigger: str):
+        self.id = id
+        self.filename = filename
+        self.info = info
+        self.priority = priority
+        self.trigger = trigger
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.hits = 1
+        self.requested_at: Optional[float] = None
+        self.playback_id: Optional[int] = None
+        self.latency_ms: Optional[float] = None
+        # Zadanie kończące się razem z odtwarzaniem (None - koniec wyznacza długość dźwięku)
+        self.done: Optional[asyncio.Future] = None
+
+    @property
+    def duration(self) -> float:
+        return self.info.length or 0.0
+
+
+class PlaybackQueue:
+    """
+    Ograniczona kolejka priorytetowa (wyższy priorytet = wcześniej, przy równym - kolejność zgłoszeń)
+    obsługiwana przez jedno zadanie robocze.
+
+    Gdy nic nie gra i kolejka jest pusta, submit() od razu zajmuje slot dla wpisu (status
+    PLAYING), a wywołujący uruchamia go przez begin() - bez przeskoku do zadania roboczego,
+    opóźnienie jak w trybie BUSY. Zadanie robocze czeka na koniec bieżącego dźwięku
+    i uruchamia kolejne wpisy - bez wątku na żądanie.
+
+    Pod blokadą stanu odtwarzania odbywa się tylko sprawdzenie ciszy i zajęcie slotu (claim);
+    samo odtwarzanie (play - dekodowanie, uruchomienie odtwarzacza) startuje po jej zwolnieniu,
+    więc nie wstrzymuje innych żądań ani procesów czekających na blokadę.
+
+    Args:
+        play: Uruchamia odtwarzanie wpisu (nie czeka na jego koniec); może ustawić
+            `item.done` - zadanie kończące się razem z odtwarzaniem
+        finish: Wywoływane po zakończeniu odtwarzania wpisu
+        remaining_time: Zwraca czas do końca bieżącego odtwarzania w sekundach (0 gdy cisza)
+        lock: Blokada stanu odtwarzania - sprawdzenie ciszy i zajęcie slotu są pod nią jedną
+            operacją (np. wspólny stan workerów: inny proces nie zacznie grać w międzyczasie)
+        claim: Zajmuje slot odtwarzania dla wpisu (pod blokadą, przed play); może ustawić
+            `item.playback_id`
+        is_current: Czy slot nadal należy do wpisu - sprawdzane co QUEUE_POLL_SECONDS, gdy
+            wpis nie ma `item.done`; zwolnienie slotu (/stop, /warn/interrupt) kończy wpis od razu
+    """
+
+    def __init__(self, play: Callable[[QueuedPlayback], None], finish: Callable[[QueuedPlayback], None],
+                 remaining_time: Callable[[], float],
+                 maxsize: int = QUEUE_MAXSIZE, overflow: str = QUEUE_OVERFLOW,
+                 coalesce_window: float = QUEUE_COALESCE_WINDOW, lock: Any = None,
+                 claim: Optional[Callable[[QueuedPlayback], None]] = None,
+                 is_current: Optional[Callable[[QueuedPlayback], bool]] = None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Nieznana polityka przepełnienia: {overflow} (dostępne: {', '.join(OVERFLOW_POLICIES)})")
+        self.play = play
+        self.claim = claim
+        self.is_current = is_current
+        self.finish = finish
+        self.remaining_time = remaining_time
+        self.maxsize = max(1, maxsize)
+        self.overflow = overflow
+        self.coalesce_window = coalesce_window
+        self.lock = lock if lock is not None else nullcontext()
+        self._heap: List[Tuple[int, int, QueuedPlayback]] = []
+        self._ids = itertools.count(1)
+        self._last_by_trigger: Dict[str, QueuedPlayback] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.current: Optional[QueuedPlayback] = None
+        self.stats = {"queued": 0, "coalesced": 0, "dropped": 0, "rejected": 0, "played": 0}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def start(self) -> None:
+        """Uruchamia zadanie robocze w bieżącej pętli zdarzeń"""
+        if self._worker is None:
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Zatrzymuje zadanie robocze (zakolejkowane wpisy są porzucane)"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._heap.clear()
+        self._last_by_trigger.clear()
+
+    def clear(self) -> int:
+        """Porzuca oczekujące wpisy (bieżące odtwarzanie nie jest przerywane). Zwraca ich liczbę."""
+        count = len(self._heap)
+        for _, _, entry in self._heap:
+            self._forget(entry)
+        self._heap.clear()
+        self.stats["dropped"] += count
+        return count
+
+    def _forget(self, item: QueuedPlayback) -> None:
+        """
+        Usuwa wpis opuszczający kolejkę z mapy źródeł - scalać można tylko z wpisem zakolejkowanym
+        lub odtwarzanym, więc mapa ma najwyżej maxsize + 1 wpisów niezależnie od liczby klientów
+        """
+        if self._last_by_trigger.get(item.trigger) is item:
+            del self._last_by_trigger[item.trigger]
+
+    def find_coalescable(self, trigger: str) -> Optional[QueuedPlayback]:
+        """Zwraca wpis z tego samego źródła zgłoszony w oknie scalania (zakolejkowany lub odtwarzany)"""
+        item = self._last_by_trigger.get(trigger)
+        if item is None or time.time() - item.submitted_at > self.coalesce_window:
+            return None
+        if item is self.current or any(entry is item for _, _, entry in self._heap):
+            return item
+        return None
+
+    def coalesce(self, item: QueuedPlayback, priority: int) -> QueuedPlayback:
+        """Scala powtórzone wyzwolenie z istniejącym wpisem (może podnieść jego priorytet)"""
+        item.hits += 1
+        self.stats["coalesced"] += 1
+        if priority > item.priority and item is not self.current:
+            item.priority = priority
+            self._heap = [(-entry.priority, seq, entry) for _, seq, entry in self._heap]
+            heapq.heapify(self._heap)
+        return item
+
+    def submit(self, filename: str, info: Any, priority: int = 0, trigger: str = "default",
+               requested_at: Optional[float] = None) -> Tuple[str, Optional[QueuedPlayback]]:
+        """
+        Dopisuje dźwięk do kolejki (wywołanie pod blokadą stanu odtwarzania).
+        `requested_at` (perf_counter) służy do pomiaru opóźnienia, gdy dźwięk startuje od razu.
+
+        Returns:
+            (status, wpis) - status: PLAYING (kolejka pusta - slot zajęty, wywołujący uruchamia
+            wpis przez begin() po zwolnieniu blokady), QUEUED, DROPPED (nowy wpis porzucony) lub REJECTED
+        """
+        if self.current is None and not self._heap and self.remaining_time() <= 0:
+            item = QueuedPlayback(next(self._ids), filename, info, priority, trigger)
+            item.requested_at = requested_at
+            self._claim(item)
+            return "PLAYING", item
+
+        if len(self._heap) >= self.maxsize:
+            if self.overflow == "reject":
+                self.stats["rejected"] += 1
+                return "REJECTED", None
+            if self.overflow == "drop-newest":
+                self.stats["dropped"] += 1
+                return "DROPPED", None
+            # drop-oldest: usuń najstarszy wpis o najniższym priorytecie
+            victim = min(self._heap, key=lambda entry: (entry[2].priority, entry[1]))
+            self._heap.remove(victim)
+            heapq.heapify(self._heap)
+            self._forget(victim[2])
+            self.stats["dropped"] += 1
+            print(f"Kolejka: przepełnienie - usunięto {victim[2].filename} (#{victim[2].id})")
+
+        item = QueuedPlayback(next(self._ids), filename, info, priority, trigger)
+        heapq.heappush(self._heap, (-priority, item.id, item))
+        self._last_by_trigger[trigger] = item
+        self.stats["queued"] += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return "QUEUED", item
+
+    def _claim(self, item: QueuedPlayback) -> None:
+        """Wpis staje się bieżącym i zajmuje slot odtwarzania (pod blokadą stanu odtwarzania)"""
+        item.started_at = time.time()
+        self.current = item
+        self._last_by_trigger[item.trigger] = item
+        self.stats["played"] += 1
+        if self.claim is not None:
+            self.claim(item)
+
+    def begin(self, item: QueuedPlayback) -> None:
+        """
+        Uruchamia odtwarzanie wpisu z zajętym slotem (po zwolnieniu blokady)
+        i budzi zadanie robocze, które poczeka na jego koniec
+        """
+        try:
+            self.play(item)
+        except Exception as e:
+            print(f"Kolejka: błąd odtwarzania {item.filename}: {e}")
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _finish(self) -> None:
+        item, self.current = self.current, None
+        self._forget(item)
+        try:
+            self.finish(item)
+        except Exception as e:
+            print(f"Kolejka: błąd po zakończeniu {item.filename}: {e}")
+
+    def ordered(self) -> List[QueuedPlayback]:
+        """Wpisy w kolejności odtwarzania (kolejka jest mała - sortowanie kopii)"""
+        return [entry for _, _, entry in sorted(self._heap)]
+
+    def position(self, item: QueuedPlayback) -> Optional[int]:
+        """Pozycja wpisu: 0 - odtwarzany, 1 - następny, ..."""
+        if item is self.current and item.started_at is not None:
+            return 0
+        for index, entry in enumerate(self.ordered(), start=1):
+            if entry is item:
+                return index
+        return None
+
+    def estimated_start_time(self, item: QueuedPlayback) -> Optional[float]:
+        """Przewidywany czas rozpoczęcia (timestamp) - koniec bieżącego + długości wpisów przed nim"""
+        if item is self.current and item.started_at is not None:
+            return item.started_at
+        start = time.time() + self.remaining_time()
+        for entry in self.ordered():
+            if entry is item:
+                return start
+            start += entry.duration
+        return None
+
+    def describe(self) -> Dict[str, Any]:
+        """Stan kolejki (dla API)"""
+        return {
+            "maxsize": self.maxsize,
+            "overflow": self.overflow,
+            "coalesce_window": self.coalesce_window,
+            "length": len(self._heap),
+            "current": self.current.filename if self.current else None,
+            "queue": [
+                {"id": entry.id, "filename": entry.filename, "priority": entry.priority,
+                 "trigger": entry.trigger, "hits": entry.hits,
+                 "estimated_start_time": self.estimated_start_time(entry)}
+                for entry in self.ordered()
+            ],
+            "stats": dict(self.stats),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            # Bieżący wpis - poczekaj na jego koniec (sygnał z odtwarzania lub długość dźwięku)
+            if self.current is not None:
+                if self.current.done is not None:
+                    await asyncio.wait((self.current.done,))
+                else:
+                    # Bez sygnału końca - do upływu długości dźwięku albo do zwolnienia slotu
+                    delay = self.current.started_at + self.current.duration - time.time()
+                    if self.is_current is None:
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                            continue
+                    elif delay > 0 and self.is_current(self.current):
+                        await asyncio.sleep(min(delay, QUEUE_POLL_SECONDS))
+                        continue
+                self._finish()
+                continue
+
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            # Odtwarzanie spoza kolejki (np. dźwięk startowy, inny proces) - poczekaj aż się skończy
+            with self.lock:
+                remaining = self.remaining_time()
+                if remaining <= 0:
+                    _, _, item = heapq.heappop(self._heap)
+                    self._claim(item)
+            if remaining <= 0:
+                self.begin(item)
+                continue
+            await asyncio.sleep(remaining)
@@ -0,0 +1,85 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Ograniczanie liczby żądań /warn per klient (token bucket).
+
+Każdy klient ma wiadro o pojemności `burst` uzupełniane w tempie `rate`
+żetonów na sekundę. Stan wiadra liczony jest leniwie przy żądaniu -
+bez zegarów i wątków w tle. Liczba śledzonych klientów jest ograniczona
+(najdawniej widziani są zapominani), więc zalew żądań z wielu adresów
+nie powoduje wzrostu zużycia pamięci.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
+
+# Konfiguracja limitu (rate=0 wyłącza ograniczanie)
+RATE_LIMIT = float(os.environ.get("BARKING_DOG_RATE_LIMIT", "2"))
+RATE_BURST = float(os.environ.get("BARKING_DOG_RATE_BURST", "10"))
+RATE_MAX_CLIENTS = int(os.environ.get("BARKING_DOG_RATE_MAX_CLIENTS", "1024"))
+
+
+class TokenBucketLimiter:
+    """Limiter token bucket per klucz (np. adres klienta)"""
+
+    def __init__(self, rate: float = RATE_LIMIT, burst: float = RATE_BURST, max_clients: int = RATE_MAX_CLIENTS):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_clients = max(1, max_clients)
+        # klucz -> [żetony, czas ostatniego uzupełnienia]
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self, key: str, now: float = None) -> Tuple[bool, float]:
+        """
+        Pobiera żeton dla klienta.
+
+        Returns:
+            (dozwolone, sekundy do następnego żetonu - dla nagłówka Retry-After)
+        """
+        if not self.enabled:
+            return True, 0.0
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_clients:
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[key] = [self.burst, now]
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return True, 0.0
+            return False, (1.0 - bucket[0]) / self.rate
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "rate": self.rate,
+            "burst": self.burst,
+            "max_clients": self.max_clients,
+            "tracked_clients": len(self._buckets),
+        }
@@ -0,0 +1,308 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Bank próbek - wszystkie dźwięki zdekodowane raz do jednego pliku PCM mapowanego w pamięci.
+
+Układ pliku:
+    nagłówek (64 B) | bufory int16 w formacie miksera (wyrównane do 64 B) | indeks JSON
+
+Indeks przypisuje ścieżce pliku (offset, liczba ramek) oraz klucz ważności
+(rozmiar, mtime, inode - jak indeks metadanych) i wzmocnienie nałożone przy
+zapisie. Plik mapowany jest tylko do odczytu - bufory są widokami NumPy na
+mapowanie, więc wszystkie procesy (kilka workerów uvicorn) dzielą te same
+strony pamięci podręcznej systemu zamiast trzymać własne kopie.
+
+Zmiany są przyrostowe: nowe lub zmienione pliki dopisywane są na końcu,
+po nich nowy indeks, a na końcu nagłówek wskazujący nowy indeks. Czytelnik
+widzi więc zawsze spójny stan. Zapis odbywa się pod blokadą pliku (fcntl),
+a gdy nieużywane dane (usunięte i zmienione pliki) przekroczą połowę pliku,
+bank jest przepisywany w całości do nowego pliku podmienianego atomowo.
+Procesy odświeżają mapowanie po zmianie numeru generacji w nagłówku.
+"""
+
+import os
+import json
+import mmap
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+from .sound_index import file_key
+from .startup_profile import optional_import
+
+# 0 - bez banku próbek (każdy proces dekoduje pliki do własnej pamięci)
+SAMPLE_BANK_ENABLED = os.environ.get("BARKING_DOG_SAMPLE_BANK", "1") != "0"
+
+BANK_MAGIC = b"BDSB"
+BANK_VERSION = 1
+# magia, wersja, kanały, częstotliwość, generacja, offset indeksu, długość indeksu
+HEADER = struct.Struct("<4sHHIQQQ")
+HEADER_SIZE = 64
+ALIGN = 64
+
+# Przepisanie banku, gdy nieużywane dane przekraczają ten ułamek pliku
+COMPACT_RATIO = 0.5
+
+# Wpis indeksu: [offset, ramki, rozmiar pliku, mtime_ns, inode, wzmocnienie]
+BankItem = Tuple[str, List[int], float]
+
+
+def _aligned(size: int) -> int:
+    return (size + ALIGN - 1) // ALIGN * ALIGN
+
+
+def bank_item(path: str, gain: float = 1.0) -> Optional[BankItem]:
+    """Pozycja do synchronizacji banku: (ścieżka, klucz ważności, wzmocnienie) lub None, gdy pliku nie ma"""
+    try:
+        return path, file_key(os.stat(path)), round(gain, 6)
+    except OSError:
+        return None
+
+
+class SampleBank:
+    """Plik banku próbek mapowany tylko do odczytu (widoki NumPy bez kopiowania)"""
+
+    def __init__(self, path: Path, sample_rate: int, channels: int):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.generation = -1
+        # Mapowanie i jego indeks podmieniane razem (jedno przypisanie) - widok nie pomyli plików
+        self._state: Tuple[Optional[mmap.mmap], Dict[str, List[Any]]] = (None, {})
+        self._inode: Optional[int] = None
+        self._size = 0
+        # Statystyki ostatniej synchronizacji (dla API)
+        self.last_sync: Dict[str, Any] = {}
+        # Synchronizacja z kilku wątków procesu (skan, obserwator katalogu, przesyłanie)
+        self._sync_lock = threading.Lock()
+
+    @property
+    def entries(self) -> Dict[str, List[Any]]:
+        return self._state[1]
+
+    @property
+    def _map(self) -> Optional[mmap.mmap]:
+        return self._state[0]
+
+    @contextmanager
+    def _locked(self):
+        """Blokada zapisu między procesami (bez fcntl - tylko jeden proces, blokada zbędna)"""
+        if not FCNTL_AVAILABLE:
+            yield
+            return
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a+b") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read_header(self, f) -> Optional[Tuple[int, int, int]]:
+        """(generacja, offset indeksu, długość indeksu) lub None, gdy plik nie pasuje do formatu miksera"""
+        raw = f.read(HEADER.size)
+        if len(raw) < HEADER.size:
+            return None
+        magic, version, channels, sample_rate, generation, index_offset, index_length = HEADER.unpack(raw)
+        if (magic, version, channels, sample_rate) != (BANK_MAGIC, BANK_VERSION, self.channels, self.sample_rate):
+            return None
+        return generation, index_offset, index_length
+
+    def refresh(self) -> bool:
+        """
+        Mapuje plik ponownie, jeśli zmienił się od ostatniego odczytu (nowa generacja lub podmiana pliku).
+        Zwraca True, gdy bank jest dostępny. Stare mapowanie żyje, dopóki istnieją widoki na nie.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                st = os.fstat(f.fileno())
+                header = self._read_header(f)
+                if header is None:
+                    self._close()
+                    return False
+                generation, index_offset, index_length = header
+                if self._map is not None and generation == self.generation and st.st_ino == self._inode:
+                    return True
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._close()
+            return False
+        try:
+            entries = json.loads(mapped[index_offset:index_offset + index_length])
+        except ValueError:
+            mapped.close()
+            self._close()
+            return False
+        self._state = (mapped, entries)
+        self._inode, self._size, self.generation = st.st_ino, st.st_size, generation
+        return True
+
+    def _close(self) -> None:
+        self._state = (None, {})
+        self._inode = None
+        self._size = 0
+        self.generation = -1
+
+    def view(self, path: str) -> Optional["np.ndarray"]:
+        """Bufor PCM (ramki, kanały) jako widok na mapowanie - bez kopiowania, tylko do odczytu"""
+        return self.view_with_gain(path)[0]
+
+    def view_with_gain(self, path: str) -> Tuple[Optional["np.ndarray"], float]:
+        """Widok bufora i wzmocnienie nałożone na niego przy zapisie do banku (z jednego stanu mapowania)"""
+        mapped, entries = self._state
+        entry = entries.get(path)
+        if entry is None or mapped is None:
+            return None, 1.0
+        np = optional_import("numpy")
+        pcm = np.frombuffer(mapped, dtype=np.int16, count=entry[1] * self.channels, offset=entry[0])
+        return pcm.reshape(entry[1], self.channels), entry[5]
+
+    def is_current(self, item: BankItem) -> bool:
+        path, key, gain = item
+        entry = self.entries.get(path)
+        return entry is not None and entry[2:5] == key and entry[5] == gain
+
+    def sync(self, items: Iterable[BankItem], render: Callable[[str, float], "np.ndarray"],
+             complete: bool = False) -> Dict[str, Any]:
+        """
+        Dopisuje do banku pliki nowe lub zmienione (render(ścieżka, wzmocnienie) -> int16 (ramki, kanały)).
+        Z `complete=True` lista jest pełną zawartością banku - pozostałe wpisy są usuwane.
+        Nic nie jest zapisywane, gdy bank jest aktualny. Zwraca statystyki synchronizacji.
+        """
+        with self._sync_lock:
+            return self._sync(list(items), render, complete)
+
+    def _sync(self, items: List[BankItem], render: Callable[[str, float], "np.ndarray"],
+              complete: bool) -> Dict[str, Any]:
+        self.refresh()
+        stale = [item for item in items if not self.is_current(item)]
+        wanted = {item[0] for item in items}
+        removed = [path for path in self.entries if path not in wanted] if complete else []
+        if not stale and not removed:
+            self.last_sync = {"written": 0, "removed": 0, "compacted": False, "errors": {}}
+            return self.last_sync
+
+        with self._locked():
+            # Inny proces mógł zsynchronizować bank w międzyczasie
+            self.refresh()
+            stale = [item for item in items if not self.is_current(item)]
+            removed = [path for path in self.entries if path not in wanted] if complete else []
+            if not stale and not removed:
+                self.last_sync = {"written": 0, "removed": 0, "compacted": False, "errors": {}}
+                return self.last_sync
+
+            rendered, errors = [], {}
+            for path, key, gain in stale:
+                try:
+                    pcm = render(path, gain)
+                except Exception as e:
+                    errors[path] = str(e)
+                    continue
+                rendered.append((path, key, gain, pcm))
+
+            entries = {path: entry for path, entry in self.entries.items() if path not in removed}
+            live = sum(_aligned(entry[1] * self.channels * 2) for path, entry in entries.items()
+                       if path not in {item[0] for item in rendered})
+            live += sum(_aligned(pcm.nbytes) for _, _, _, pcm in rendered)
+            used_after_append = self._size + sum(_aligned(pcm.nbytes) for _, _, _, pcm in rendered)
+            compact = self._map is None or used_after_append - HEADER_SIZE > live / (1.0 - COMPACT_RATIO)
+
+            if compact:
+                self._rewrite(entries, rendered)
+            else:
+                self._append(entries, rendered)
+            self.refresh()
+
+        self.last_sync = {"written": len(rendered), "removed": len(removed), "compacted": compact, "errors": errors}
+        return self.last_sync
+
+    def _index_bytes(self, entries: Dict[str, List[Any]]) -> bytes:
+        return json.dumps(entries, separators=(",", ":")).encode("utf-8")
+
+    def _append(self, entries: Dict[str, List[Any]], rendered: List[tuple]) -> None:
+        """Dopisuje bufory i nowy indeks za końcem pliku, potem nagłówek (stare dane pozostają nietknięte)"""
+        with open(self.path, "r+b") as f:
+            offset = _aligned(self._size)
+            for path, key, gain, pcm in rendered:
+                f.seek(offset)
+                f.write(pcm.tobytes())
+                entries[path] = [offset, len(pcm)] + list(key) + [gain]
+                offset = _aligned(offset + pcm.nbytes)
+            index = self._index_bytes(entries)
+            f.seek(offset)
+            f.write(index)
+            f.flush()
+            os.fsync(f.fileno())
+            # Nagłówek na końcu - do tej chwili czytelnicy widzą poprzedni indeks
+            f.seek(0)
+            f.write(HEADER.pack(BANK_MAGIC, BANK_VERSION, self.channels, self.sample_rate,
+                                self.generation + 1, offset, len(index)))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rewrite(self, entries: Dict[str, List[Any]], rendered: List[tuple]) -> None:
+        """Przepisuje bank do nowego pliku (bez nieużywanych danych) i podmienia go atomowo"""
+        replaced = {path for path, _, _, _ in rendered}
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        new_entries: Dict[str, List[Any]] = {}
+        with open(tmp_path, "wb") as f:
+            f.write(b"\0" * HEADER_SIZE)
+            offset = HEADER_SIZE
+            # Niezmienione bufory kopiowane z bieżącego mapowania - bez ponownego dekodowania
+            for path, entry in entries.items():
+                if path in replaced or self._map is None:
+                    continue
+                size = entry[1] * self.channels * 2
+                f.seek(offset)
+                f.write(self._map[entry[0]:entry[0] + size])
+                new_entries[path] = [offset] + entry[1:]
+                offset = _aligned(offset + size)
+            for path, key, gain, pcm in rendered:
+                f.seek(offset)
+                f.write(pcm.tobytes())
+                new_entries[path] = [offset, len(pcm)] + list(key) + [gain]
+                offset = _aligned(offset + pcm.nbytes)
+            index = self._index_bytes(new_entries)
+            f.seek(offset)
+            f.write(index)
+            f.seek(0)
+            f.write(HEADER.pack(BANK_MAGIC, BANK_VERSION, self.channels, self.sample_rate,
+                                self.generation + 1, offset, len(index)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def describe(self) -> Dict[str, Any]:
+        """Stan banku (dla API)"""
+        live = sum(entry[1] * self.channels * 2 for entry in self.entries.values())
+        return {
+            "path": str(self.path),
+            "mapped": self._map is not None,
+            "generation": self.generation,
+            "sounds": len(self.entries),
+            "file_mb": round(self._size / (1024 * 1024), 2),
+            "pcm_mb": round(live / (1024 * 1024), 2),
+            "last_sync": self.last_sync,
+        }
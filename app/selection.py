@@ -0,0 +1,415 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Silnik wyboru dźwięków dla /warn i /sounds/random/get.
+
+Tryby:
+    random   - losowo, bez natychmiastowego powtórzenia (zachowanie domyślne)
+    window   - losowo, bez powtórzeń w oknie ostatnich K wyborów
+    shuffle  - "worek": każdy dźwięk raz, zanim którykolwiek się powtórzy
+    weighted - losowanie ważone (drzewo Fenwicka sum wag)
+
+Każda strategia trzyma klucze w jednej liście podzielonej na obszary
+(np. dostępne / zablokowane) i przesuwa klucze przez zamianę pozycji,
+więc wybór, dodanie i usunięcie dźwięku kosztują O(1) (w trybie weighted
+O(log N)). Odświeżenie bazy przekazuje tylko zmienione pliki - stan
+losowania nie jest przebudowywany.
+"""
+
+import os
+import json
+import random
+from collections import deque
+from typing import Dict, List, Optional, Any
+
+SELECTION_MODES = ("random", "window", "shuffle", "weighted")
+
+# Domyślna konfiguracja wyboru dźwięków
+DEFAULT_SELECTION_MODE = os.environ.get("BARKING_DOG_SELECTION_MODE", "random").lower()
+DEFAULT_SELECTION_WINDOW = int(os.environ.get("BARKING_DOG_SELECTION_WINDOW", "3"))
+DEFAULT_SELECTION_WEIGHTS = os.environ.get("BARKING_DOG_SELECTION_WEIGHTS", "")
+
+
+def _randrange_excluding(limit: int, excluded: Optional[int]) -> int:
+    """Losuje pozycję z [0, limit) z pominięciem `excluded` - bez ponawiania prób"""
+    if excluded is None or excluded >= limit or limit <= 1:
+        return random.randrange(limit)
+    index = random.randrange(limit - 1)
+    return index + 1 if index >= excluded else index
+
+
+class SelectionStrategy:
+    """Bazowa strategia: lista kluczy + pozycje kluczy (zamiana pozycji w O(1))"""
+
+    name = "base"
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._pos: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._pos
+
+    def keys(self) -> List[str]:
+        """Klucze w kolejności wewnętrznej strategii"""
+        return list(self._keys)
+
+    def _swap(self, i: int, j: int) -> None:
+        if i == j:
+            return
+        keys = self._keys
+        keys[i], keys[j] = keys[j], keys[i]
+        self._pos[keys[i]] = i
+        self._pos[keys[j]] = j
+
+    def _append(self, key: str) -> int:
+        self._pos[key] = len(self._keys)
+        self._keys.append(key)
+        return len(self._keys) - 1
+
+    def _pop(self, key: str) -> None:
+        """Usuwa klucz, zamieniając go z ostatnim elementem listy"""
+        self._swap(self._pos[key], len(self._keys) - 1)
+        self._keys.pop()
+        del self._pos[key]
+
+    def add(self, key: str) -> None:
+        self._append(key)
+
+    def remove(self, key: str) -> None:
+        self._pop(key)
+
+    def pick(self, last: Optional[str] = None) -> Optional[str]:
+        raise NotImplementedError
+
+    def observe(self, key: str) -> None:
+        """Uwzględnia wybór dokonany poza strategią (w innym procesie serwera) - jak po pick()"""
+
+    def reset(self) -> None:
+        """Zapomina historię wyboru"""
+
+    def describe(self) -> Dict[str, Any]:
+        return {"mode": self.name, "sounds": len(self._keys)}
+
+
+class NoRepeatWindowStrategy(SelectionStrategy):
+    """
+    Bez powtórzeń w oknie ostatnich K wyborów.
+    Lista: [dostępne | zablokowane]; kolejka `_recent` pamięta kolejność zablokowanych.
+    """
+
+    name = "window"
+
+    def __init__(self, window: int = 1):
+        super().__init__()
+        self.window = max(1, window)
+        self._available = 0
+        self._recent = deque()
+
+    def add(self, key: str) -> None:
+        # Nowy klucz trafia od razu do obszaru dostępnych
+        self._swap(self._append(key), self._available)
+        self._available += 1
+
+    def remove(self, key: str) -> None:
+        pos = self._pos[key]
+        if pos < self._available:
+            self._swap(pos, self._available - 1)
+            self._available -= 1
+        else:
+            self._recent.remove(key)  # O(K), K jest małe
+        self._pop(key)
+
+    def _release_oldest(self) -> None:
+        oldest = self._recent.popleft()
+        self._swap(self._pos[oldest], self._available)
+        self._available += 1
+
+    def pick(self, last: Optional[str] = None) -> Optional[str]:
+        count = len(self._keys)
+        if count == 0:
+            return None
+        # Okno nie może zablokować wszystkich dźwięków
+        limit = min(self.window, count - 1)
+        while len(self._recent) > limit:
+            self._release_oldest()
+
+        index = random.randrange(self._available)
+        key = self._keys[index]
+        self._swap(index, self._available - 1)
+        self._available -= 1
+        self._recent.append(key)
+        return key
+
+    def observe(self, key: str) -> None:
+        limit = min(self.window, len(self._keys) - 1)
+        while len(self._recent) > limit:
+            self._release_oldest()
+        pos = self._pos[key]
+        if pos < self._available:
+            self._swap(pos, self._available - 1)
+            self._available -= 1
+        else:
+            self._recent.remove(key)
+        self._recent.append(key)
+
+    def reset(self) -> None:
+        while self._recent:
+            self._release_oldest()
+
+    def describe(self) -> Dict[str, Any]:
+        info = super().describe()
+        info.update({"window": self.window, "recent": list(self._recent)})
+        return info
+
+
+class RandomStrategy(NoRepeatWindowStrategy):
+    """Losowo, bez natychmiastowego powtórzenia (okno K=1)"""
+
+    name = "random"
+
+    def __init__(self):
+        super().__init__(window=1)
+
+
+class ShuffleBagStrategy(SelectionStrategy):
+    """
+    Każdy dźwięk raz, zanim którykolwiek się powtórzy.
+    Lista: [niewylosowane | wylosowane w tej rundzie]; nowa runda nie kopiuje danych.
+    """
+
+    name = "shuffle"
+
+    def __init__(self):
+        super().__init__()
+        self._remaining = 0
+        self.completed_rounds = 0
+
+    def add(self, key: str) -> None:
+        # Nowy dźwięk bierze udział już w bieżącej rundzie
+        self._swap(self._append(key), self._remaining)
+        self._remaining += 1
+
+    def remove(self, key: str) -> None:
+        pos = self._pos[key]
+        if pos < self._remaining:
+            self._swap(pos, self._remaining - 1)
+            self._remaining -= 1
+        self._pop(key)
+
+    def pick(self, last: Optional[str] = None) -> Optional[str]:
+        count = len(self._keys)
+        if count == 0:
+            return None
+        if self._remaining == 0:
+            self._remaining = count
+
+        # Na przełomie rund nie zaczynaj od dźwięku, którym skończyła się poprzednia
+        index = _randrange_excluding(self._remaining, self._pos.get(last) if last else None)
+        key = self._keys[index]
+        self._swap(index, self._remaining - 1)
+        self._remaining -= 1
+        if self._remaining == 0:
+            self.completed_rounds += 1
+        return key
+
+    def observe(self, key: str) -> None:
+        # Dźwięk wylosowany już w tej rundzie - inny proces zaczął nową rundę
+        if self._pos[key] >= self._remaining:
+            self._remaining = len(self._keys)
+        self._swap(self._pos[key], self._remaining - 1)
+        self._remaining -= 1
+        if self._remaining == 0:
+            self.completed_rounds += 1
+
+    def reset(self) -> None:
+        self._remaining = len(self._keys)
+
+    def describe(self) -> Dict[str, Any]:
+        info = super().describe()
+        info.update({"remaining_in_round": self._remaining, "completed_rounds": self.completed_rounds})
+        return info
+
+
+class WeightedStrategy(SelectionStrategy):
+    """
+    Losowanie ważone na drzewie Fenwicka (sumy prefiksowe wag po pozycjach kluczy):
+    wybór, dodanie i usunięcie dźwięku O(log N), bez przebudowy po odświeżeniu bazy.
+    Usunięcie przenosi wagę ostatniej pozycji na miejsce usuwanej, jak lista kluczy.
+    """
+
+    name = "weighted"
+
+    # Ile razy ponowić losowanie, gdy wypadnie ostatnio odtwarzany dźwięk
+    REPEAT_REDRAWS = 3
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, default_weight: float = 1.0):
+        super().__init__()
+        self.weights = dict(weights or {})
+        self.default_weight = default_weight
+        self._weight: List[float] = []
+        # Węzeł i (od 1) trzyma sumę wag pozycji (i - lowbit(i), i]
+        self._tree: List[float] = [0.0]
+        # Liczba kluczy o dodatniej wadze - gdy zero, losowanie równomierne
+        self._positive = 0
+
+    def _weight_of(self, key: str) -> float:
+        return max(0.0, float(self.weights.get(key, self.default_weight)))
+
+    def _update(self, index: int, delta: float) -> None:
+        index += 1
+        while index < len(self._tree):
+            self._tree[index] += delta
+            index += index & -index
+
+    def add(self, key: str) -> None:
+        super().add(key)
+        weight = self._weight_of(key)
+        # Nowy węzeł n = suma jego wagi i węzłów n-1, n-2, n-4, ... poniżej lowbit(n)
+        index = len(self._tree)
+        node, step = weight, 1
+        while step < index & -index:
+            node += self._tree[index - step]
+            step <<= 1
+        self._tree.append(node)
+        self._weight.append(weight)
+        self._positive += weight > 0
+
+    def remove(self, key: str) -> None:
+        index, last = self._pos[key], len(self._keys) - 1
+        super().remove(key)
+        weight = self._weight[index]
+        if index != last:
+            self._update(index, self._weight[last] - weight)
+            self._weight[index] = self._weight[last]
+        self._tree.pop()
+        self._weight.pop()
+        self._positive -= weight > 0
+
+    def total_weight(self) -> float:
+        """Suma wag wszystkich kluczy (O(log N))"""
+        total, index = 0.0, len(self._keys)
+        while index:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+    def _draw(self) -> str:
+        count = len(self._keys)
+        if not self._positive:
+            return self._keys[random.randrange(count)]
+        # Zejście po drzewie: największa pozycja, której suma prefiksowa nie przekracza target
+        target = random.random() * self.total_weight()
+        index, step = 0, 1 << count.bit_length()
+        while step:
+            node = index + step
+            if node <= count and self._tree[node] <= target:
+                index = node
+                target -= self._tree[node]
+            step >>= 1
+        return self._keys[min(index, count - 1)]
+
+    def pick(self, last: Optional[str] = None) -> Optional[str]:
+        if not self._keys:
+            return None
+        key = self._draw()
+        if len(self._keys) > 1:
+            for _ in range(self.REPEAT_REDRAWS):
+                if key != last:
+                    break
+                key = self._draw()
+        return key
+
+    def describe(self) -> Dict[str, Any]:
+        info = super().describe()
+        info.update({"weights": self.weights, "default_weight": self.default_weight,
+                     "total_weight": self.total_weight()})
+        return info
+
+
+class SoundSelector:
+    """Wybór dźwięków z wymienną strategią"""
+
+    def __init__(self, mode: str = DEFAULT_SELECTION_MODE, window: int = DEFAULT_SELECTION_WINDOW,
+                 weights: Optional[Dict[str, float]] = None):
+        if weights is None and DEFAULT_SELECTION_WEIGHTS:
+            try:
+                weights = json.loads(DEFAULT_SELECTION_WEIGHTS)
+            except ValueError as e:
+                print(f"Nieprawidłowe BARKING_DOG_SELECTION_WEIGHTS ({e}) - wagi pominięte")
+        self.window = window
+        self.weights: Dict[str, float] = weights or {}
+        self.strategy = self._create(mode if mode in SELECTION_MODES else "random")
+
+    def _create(self, mode: str) -> SelectionStrategy:
+        if mode == "window":
+            return NoRepeatWindowStrategy(self.window)
+        if mode == "shuffle":
+            return ShuffleBagStrategy()
+        if mode == "weighted":
+            return WeightedStrategy(self.weights)
+        return RandomStrategy()
+
+    @property
+    def mode(self) -> str:
+        return self.strategy.name
+
+    def configure(self, mode: Optional[str] = None, window: Optional[int] = None,
+                  weights: Optional[Dict[str, float]] = None) -> None:
+        """
+        Zmienia tryb lub jego parametry. Przełączenie trybu przenosi klucze
+        do nowej strategii (O(N) - tylko przy zmianie konfiguracji).
+        """
+        if mode is not None and mode not in SELECTION_MODES:
+            raise ValueError(f"Nieznany tryb wyboru: {mode} (dostępne: {', '.join(SELECTION_MODES)})")
+        if window is not None:
+            self.window = max(1, window)
+        if weights is not None:
+            self.weights = dict(weights)
+
+        keys = self.strategy.keys()
+        self.strategy = self._create(mode or self.mode)
+        for key in sorted(keys):
+            self.strategy.add(key)
+
+    def __len__(self) -> int:
+        return len(self.strategy)
+
+    def add(self, key: str) -> None:
+        self.strategy.add(key)
+
+    def remove(self, key: str) -> None:
+        if key in self.strategy:
+            self.strategy.remove(key)
+
+    def clear(self) -> None:
+        self.strategy = self._create(self.mode)
+
+    def pick(self, last: Optional[str] = None) -> Optional[str]:
+        return self.strategy.pick(last)
+
+    def observe(self, key: str) -> None:
+        """Uwzględnia wybór dokonany w innym procesie (klucze spoza silnika są pomijane)"""
+        if key in self.strategy:
+            self.strategy.observe(key)
+
+    def reset(self) -> None:
+        self.strategy.reset()
+
+    def describe(self) -> Dict[str, Any]:
+        return self.strategy.describe()
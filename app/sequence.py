@@ -0,0 +1,166 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Sekwencje szczeknięć renderowane do jednego bufora PCM (/warn/sequence).
+
+Wzorzec - dźwięki podane z nazwy lub losowane, przerwy, powtórzenia i losowe
+odchylenie przerw - rozwijany jest do planu: listy plików i przerw w ramkach.
+Plan renderowany jest do jednego bufora int16: odcinki rozdzielone ciszą sklejane
+są jednym np.concatenate, a odcinki nakładające się (ujemna przerwa) przenikają się
+z zachowaniem mocy. Całość trafia do wyjścia audio jednym odtworzeniem, więc
+odstępy między szczeknięciami są dokładne co do próbki.
+
+Wyrenderowane bufory trzymane są w pamięci podręcznej (LRU z limitem w MB)
+kluczowanej planem i wzmocnieniem dźwięków - wzorzec bez losowości (lub z tym
+samym seed) renderowany jest raz.
+"""
+
+import os
+import random
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .startup_profile import optional_import
+
+# Najdłuższa sekwencja (s) i największa liczba szczeknięć w jednym wzorcu
+SEQUENCE_MAX_SECONDS = float(os.environ.get("BARKING_DOG_SEQUENCE_MAX_SECONDS", "30"))
+SEQUENCE_MAX_BARKS = int(os.environ.get("BARKING_DOG_SEQUENCE_MAX_BARKS", "64"))
+# Limit pamięci podręcznej wyrenderowanych sekwencji
+SEQUENCE_CACHE_MB = float(os.environ.get("BARKING_DOG_SEQUENCE_CACHE_MB", "32"))
+
+# Klucz: (ścieżki, przerwy w ramkach, wzmocnienia)
+SequenceKey = Tuple[Tuple[str, ...], Tuple[int, ...], Tuple[float, ...]]
+
+
+class SequenceError(ValueError):
+    """Wzorzec, którego nie da się odtworzyć (za długi, nieznany dźwięk)"""
+
+
+def expand_pattern(pattern: Any, rng: random.Random) -> List[Tuple[Optional[str], float]]:
+    """
+    Rozwija wzorzec (SequenceRequest) do listy (nazwa pliku lub None - dźwięk losowy, przerwa po nim w ms).
+    Przerwy dostają losowe odchylenie ±jitter_ms; po ostatnim szczeknięciu przerwy nie ma.
+    """
+    barks: List[Tuple[Optional[str], float]] = []
+    for _ in range(pattern.repeat):
+        for step in pattern.steps:
+            sound = None if step.sound in (None, "", "random") else step.sound
+            gap = pattern.gap_ms if step.gap_ms is None else step.gap_ms
+            barks.extend((sound, gap) for _ in range(step.repeat))
+            if len(barks) > SEQUENCE_MAX_BARKS:
+                raise SequenceError(f"Sekwencja może mieć najwyżej {SEQUENCE_MAX_BARKS} szczeknięć")
+    if pattern.jitter_ms:
+        barks = [(sound, gap + rng.uniform(-pattern.jitter_ms, pattern.jitter_ms)) for sound, gap in barks]
+    barks[-1] = (barks[-1][0], 0.0)
+    return barks
+
+
+def gaps_to_frames(gaps_ms: Iterable[float], sample_rate: int) -> List[int]:
+    """Przerwy w ms na liczbę ramek (odstępy dokładne co do próbki)"""
+    return [int(round(gap * sample_rate / 1000.0)) for gap in gaps_ms]
+
+
+def render_sequence(parts: Sequence["np.ndarray"], gaps: Sequence[int]) -> "np.ndarray":
+    """
+    Skleja bufory int16 (ramki x kanały) w jeden.
+
+    gaps[i] to przerwa w ramkach między parts[i] i parts[i + 1]. Ujemna przerwa oznacza
+    nakładanie - na jego długości koniec poprzedniego i początek kolejnego bufora
+    przenikają się (sin/cos, stała moc). Nakładanie ograniczone jest do krótszego bufora.
+    """
+    np = optional_import("numpy")
+    lengths = [len(part) for part in parts]
+    gaps = [max(int(gap), -min(lengths[i], lengths[i + 1])) for i, gap in enumerate(gaps[:len(parts) - 1])]
+    channels = parts[0].shape[1]
+
+    if all(gap >= 0 for gap in gaps):
+        # Bez nakładania - jedno sklejenie (cisza jako bufory zer)
+        pieces = [parts[0]]
+        for gap, part in zip(gaps, parts[1:]):
+            if gap:
+                pieces.append(np.zeros((gap, channels), dtype=np.int16))
+            pieces.append(part)
+        return np.concatenate(pieces)
+
+    starts = np.cumsum([0] + [lengths[i] + gaps[i] for i in range(len(gaps))])
+    total = int(max(start + length for start, length in zip(starts, lengths)))
+    out = np.zeros((total, channels), dtype=np.float32)
+    for index, part in enumerate(parts):
+        start = int(starts[index])
+        fade_in = -gaps[index - 1] if index > 0 and gaps[index - 1] < 0 else 0
+        fade_out = -gaps[index] if index < len(gaps) and gaps[index] < 0 else 0
+        if not fade_in and not fade_out:
+            out[start:start + len(part)] += part
+            continue
+        piece = part.astype(np.float32)
+        if fade_in:
+            piece[:fade_in] *= np.sin(np.linspace(0.0, np.pi / 2, fade_in, dtype=np.float32))[:, None]
+        if fade_out:
+            piece[len(piece) - fade_out:] *= np.cos(np.linspace(0.0, np.pi / 2, fade_out, dtype=np.float32))[:, None]
+        out[start:start + len(piece)] += piece
+    np.rint(out, out=out)
+    np.clip(out, -32768, 32767, out=out)
+    return out.astype(np.int16)
+
+
+class SequenceCache:
+    """Wyrenderowane sekwencje: bufor PCM i jego postać przygotowana dla wyjścia (LRU z limitem pamięci)"""
+
+    def __init__(self, max_mb: float = SEQUENCE_CACHE_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._items: "OrderedDict[SequenceKey, Tuple[Any, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: SequenceKey) -> Optional[Tuple[Any, Any]]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+
+    def put(self, key: SequenceKey, pcm: Any, prepared: Any) -> None:
+        if pcm.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[0].nbytes
+            self._items[key] = (pcm, prepared)
+            self._bytes += pcm.nbytes
+            while self._bytes > self.max_bytes:
+                _, (old, _) = self._items.popitem(last=False)
+                self._bytes -= old.nbytes
+
+    def discard(self, path: str) -> None:
+        """Usuwa sekwencje zawierające plik (zmieniony lub usunięty z biblioteki)"""
+        with self._lock:
+            for key in [key for key in self._items if path in key[0]]:
+                self._bytes -= self._items.pop(key)[0].nbytes
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "sequences": len(self._items),
+            "memory_mb": round(self._bytes / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
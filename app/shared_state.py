@@ -0,0 +1,545 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Stan odtwarzania wspólny dla procesów serwera (uvicorn --workers N).
+
+Slot odtwarzania, historia wyboru dźwięków, konfiguracja trybu wyboru i wersja
+biblioteki leżą w małym bloku pamięci - pliku mapowanym przez wszystkie procesy
+(domyślnie w /dev/shm, bez zapisu na kartę SD). Zmiany odbywają się pod blokadą
+pliku (fcntl.flock), więc sprawdzenie i zajęcie slotu są jedną operacją także
+między procesami - w danej chwili gra dokładnie jeden dźwięk.
+
+Układ bloku (little-endian):
+    nagłówek (64 B)     magia, wersja układu, epoka, wersja biblioteki,
+                        numer wyboru, numer resetu historii, wersja konfiguracji
+    slot (64 B + 256 B) numer odtwarzania, flaga, pid właściciela, czasy, nazwa pliku
+    procesy (128 B)     pid-y podłączonych procesów
+    historia (64 x 256) ostatnie wybory (pierścień) - każdy proces odtwarza cudze
+                        wybory w swoim silniku wyboru przed losowaniem
+    konfiguracja        tryb wyboru jako JSON (wagi trybu weighted - w pliku obok bloku,
+                        nazwa pliku z wersją konfiguracji zapisana w JSON)
+
+Blok tworzony jest od nowa, gdy nie żyje żaden z podłączonych procesów (nowe
+uruchomienie serwera) - stan z poprzedniego uruchomienia nie przechodzi dalej.
+Ostatni proces zamykany przez serwer usuwa plik bloku.
+
+Wspólny stan włączany jest tylko wtedy, gdy jest potrzebny: przy kilku workerach
+uvicorn (--workers N lub WEB_CONCURRENCY) albo jawnie przez BARKING_DOG_SHARED_STATE=1.
+Pojedynczy proces trzyma stan w pamięci (bez flock i pętli odpytujących slot).
+"""
+
+import os
+import json
+import mmap
+import time
+import zlib
+import sys
+import socket
+import struct
+import threading
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .selection import SELECTION_MODES
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+
+def configured_workers() -> int:
+    """
+    Liczba workerów uvicorn: --workers N (procesy workerów dziedziczą argv nadzorcy)
+    lub WEB_CONCURRENCY - tak jak odczytuje ją uvicorn
+    """
+    value = os.environ.get("WEB_CONCURRENCY", "1")
+    for index, arg in enumerate(sys.argv):
+        if arg == "--workers" and index + 1 < len(sys.argv):
+            value = sys.argv[index + 1]
+        elif arg.startswith("--workers="):
+            value = arg.split("=", 1)[1]
+    try:
+        return int(value)
+    except ValueError:
+        return 1
+
+
+# auto - wspólny stan tylko przy kilku workerach; 1 - zawsze; 0 - stan tylko w pamięci procesu
+SHARED_STATE_MODE = os.environ.get("BARKING_DOG_SHARED_STATE", "auto").lower()
+SHARED_STATE_ENABLED = SHARED_STATE_MODE in ("1", "true", "yes") or (
+    SHARED_STATE_MODE not in ("0", "false", "no") and configured_workers() > 1)
+
+# Jak często proces odtwarzający sprawdza, czy inny proces nie zwolnił slotu (/stop, /warn/interrupt)
+PLAYBACK_POLL_SECONDS = 0.05
+# Jak często proces sprawdza, czy inny proces nie zmienił biblioteki
+LIBRARY_POLL_SECONDS = 0.5
+
+STATE_MAGIC = b"BDPS"
+STATE_VERSION = 1
+# magia, wersja, epoka, wersja biblioteki, numer wyboru, reset historii, wersja konfiguracji, długość konfiguracji
+HEADER = struct.Struct("<4sH2x8sQQQQI")
+# numer odtwarzania, flaga odtwarzania, pid właściciela, początek, długość, koniec
+SLOT = struct.Struct("<QB3xiddd")
+NAME = struct.Struct("<H254s")
+
+SLOT_OFFSET = 64
+SLOT_NAME_OFFSET = SLOT_OFFSET + 64
+PIDS_OFFSET = SLOT_NAME_OFFSET + NAME.size
+MAX_PROCESSES = 32
+HISTORY_OFFSET = PIDS_OFFSET + 4 * MAX_PROCESSES
+HISTORY_SIZE = 64
+CONFIG_OFFSET = HISTORY_OFFSET + HISTORY_SIZE * NAME.size
+CONFIG_MAX = 16384
+STATE_SIZE = CONFIG_OFFSET + CONFIG_MAX
+
+
+def deployment_id() -> str:
+    """
+    Identyfikator uruchomienia serwera, wspólny dla jego workerów: BARKING_DOG_INSTANCE albo
+    nazwa hosta i pid procesu nadrzędnego - nadzorcy, którego procesami potomnymi są workery
+    (uvicorn --workers N, uvicorn.run(workers=N), gunicorn -k uvicorn.workers.UvicornWorker).
+    Dwie niezależne instancje lub kontenery na tym samym katalogu z dźwiękami nie dzielą slotu.
+    Bez nadzorcy (pojedynczy proces) wspólny stan jest włączony tylko jawnie, a procesy
+    uruchomione przez tego samego rodzica dzielą wtedy blok.
+    """
+    instance = os.environ.get("BARKING_DOG_INSTANCE")
+    if instance:
+        return instance
+    return f"{socket.gethostname()}-{os.getppid()}"
+
+
+def default_state_path(sounds_dir: Path) -> Path:
+    """Plik bloku stanu: w /dev/shm (pamięć), osobny dla katalogu z dźwiękami i uruchomienia serwera"""
+    tag = zlib.crc32(f"{Path(sounds_dir).resolve()}\0{deployment_id()}".encode())
+    shm = Path("/dev/shm")
+    if shm.is_dir():
+        return shm / f"barking-dog-{tag:08x}.state"
+    return Path(sounds_dir).parent / f".playback_state-{tag:08x}"
+
+
+def _pack_name(name: Optional[str]) -> bytes:
+    raw = (name or "").encode("utf-8")[:254]
+    return NAME.pack(len(raw), raw)
+
+
+def _unpack_name(raw: bytes) -> Optional[str]:
+    length, data = NAME.unpack(raw)
+    return data[:length].decode("utf-8", "replace") if length else None
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedLock:
+    """
+    Blokada wielokrotnego wejścia: wątki procesu (RLock) i procesy (flock na pliku bloku).
+    flock zakładany jest tylko przy pierwszym wejściu - zagnieżdżone `with` nie kosztują wywołań systemowych.
+    """
+
+    def __init__(self, fileno: Callable[[], int]):
+        # Deskryptor pliku bloku pobierany przy pierwszym wejściu (blok otwierany leniwie)
+        self._fileno = fileno
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                fcntl.flock(self._fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            fcntl.flock(self._fileno(), fcntl.LOCK_UN)
+        self._thread_lock.release()
+        return False
+
+
+class SharedPlaybackState:
+    """
+    Stan odtwarzania w bloku pamięci wspólnym dla procesów - to samo API co PlaybackState
+    (slot odtwarzania) oraz historia wyboru dźwięków i wersja biblioteki.
+    Blok otwierany jest przy pierwszym użyciu.
+    """
+
+    shared = True
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._lock = SharedLock(self._fileno)
+        self._open_lock = threading.Lock()
+        # Czy ten proces utworzył blok (pierwszy proces uruchomienia serwera)
+        self.created = False
+        # Ostatni wybór i wersja konfiguracji naniesione na silnik wyboru tego procesu
+        self._history_seen = 0
+        self._config_seen = 0
+
+    # --- blok i blokada ---
+
+    def _ensure_open(self) -> mmap.mmap:
+        if self._map is not None:
+            return self._map
+        with self._open_lock:
+            if self._map is None:
+                self._attach()
+        return self._map
+
+    def _open_locked(self):
+        """
+        Otwiera plik bloku z założoną blokadą. Plik usunięty przez ostatni zamykany proces
+        w czasie oczekiwania na blokadę jest otwierany ponownie (nowy plik pod tą samą ścieżką).
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            f = open(self.path, "a+b")
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                if os.stat(self.path).st_ino == os.fstat(f.fileno()).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            f.close()
+
+    def _attach(self) -> None:
+        """Otwiera (lub tworzy) blok i rejestruje proces; blok bez żywych procesów jest zerowany"""
+        f = self._open_locked()
+        try:
+            if os.fstat(f.fileno()).st_size != STATE_SIZE:
+                f.truncate(STATE_SIZE)
+            mapped = mmap.mmap(f.fileno(), STATE_SIZE)
+            magic, version = HEADER.unpack_from(mapped, 0)[:2]
+            pids = [pid for pid in self._read_pids(mapped) if pid != os.getpid() and _alive(pid)]
+            if (magic, version) != (STATE_MAGIC, STATE_VERSION) or not pids:
+                mapped[:] = bytes(STATE_SIZE)
+                HEADER.pack_into(mapped, 0, STATE_MAGIC, STATE_VERSION, os.urandom(8), 0, 0, 0, 0, 0)
+                self.created = True
+            if len(pids) >= MAX_PROCESSES:
+                pids = pids[1:]
+            self._write_pids(mapped, pids + [os.getpid()])
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        self._file = f
+        self._map = mapped
+
+    def _fileno(self) -> int:
+        self._ensure_open()
+        return self._file.fileno()
+
+    def detach(self) -> None:
+        """Wyrejestrowuje proces (zamknięcie serwera); ostatni żywy proces usuwa plik bloku"""
+        if self._map is None:
+            return
+        with self.lock:
+            pids = [pid for pid in self._read_pids(self._map) if pid != os.getpid()]
+            self._write_pids(self._map, pids)
+            if not any(_alive(pid) for pid in pids):
+                # Osobno - nieudane usunięcie pliku wag nie może zostawić bloku w /dev/shm
+                with suppress(OSError):
+                    self._weights_path(self._header()[6]).unlink(missing_ok=True)
+                with suppress(OSError):
+                    self.path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _read_pids(mapped: mmap.mmap) -> List[int]:
+        return [pid for pid in struct.unpack_from(f"<{MAX_PROCESSES}i", mapped, PIDS_OFFSET) if pid]
+
+    @staticmethod
+    def _write_pids(mapped: mmap.mmap, pids: List[int]) -> None:
+        padded = (pids + [0] * MAX_PROCESSES)[:MAX_PROCESSES]
+        struct.pack_into(f"<{MAX_PROCESSES}i", mapped, PIDS_OFFSET, *padded)
+
+    @property
+    def lock(self) -> SharedLock:
+        return self._lock
+
+    def _header(self) -> Tuple[Any, ...]:
+        return HEADER.unpack_from(self._ensure_open(), 0)
+
+    def _set_header(self, **values: int) -> None:
+        magic, version, epoch, library, history, reset, config, config_length = self._header()
+        HEADER.pack_into(self._map, 0, magic, version, epoch,
+                         values.get("library", library), values.get("history", history),
+                         values.get("reset", reset), values.get("config", config),
+                         values.get("config_length", config_length))
+
+    # --- slot odtwarzania (API PlaybackState) ---
+
+    def _slot(self) -> Tuple[int, bool, int, float, float, float]:
+        playback_id, playing, owner, start, duration, end = SLOT.unpack_from(self._ensure_open(), SLOT_OFFSET)
+        return playback_id, bool(playing), owner, start, duration, end
+
+    @property
+    def playback_id(self) -> int:
+        return self._slot()[0]
+
+    @property
+    def is_playing(self) -> bool:
+        return self._slot()[1]
+
+    @property
+    def filename(self) -> Optional[str]:
+        if not self.is_playing:
+            return None
+        return _unpack_name(self._map[SLOT_NAME_OFFSET:SLOT_NAME_OFFSET + NAME.size])
+
+    @property
+    def start_time(self) -> Optional[float]:
+        playback_id, playing, owner, start, duration, end = self._slot()
+        return start if playing else None
+
+    @property
+    def duration(self) -> Optional[float]:
+        playback_id, playing, owner, start, duration, end = self._slot()
+        return duration if playing else None
+
+    @property
+    def end_time(self) -> Optional[float]:
+        playback_id, playing, owner, start, duration, end = self._slot()
+        return end if playing else None
+
+    @property
+    def owner_pid(self) -> Optional[int]:
+        """Proces, który odtwarza dźwięk"""
+        playback_id, playing, owner, start, duration, end = self._slot()
+        return owner if playing else None
+
+    def start_playback(self, filename: str, duration: float) -> int:
+        """Rozpocznij odtwarzanie nowego pliku. Zwraca numer odtwarzania (unikalny dla wszystkich procesów)."""
+        with self.lock:
+            playback_id = self._slot()[0] + 1
+            start = time.time()
+            SLOT.pack_into(self._map, SLOT_OFFSET, playback_id, 1, os.getpid(), start, duration, start + duration)
+            self._map[SLOT_NAME_OFFSET:SLOT_NAME_OFFSET + NAME.size] = _pack_name(filename)
+            return playback_id
+
+    def try_claim(self, choose: Callable[[], Optional[Tuple[Any, ...]]]) -> Optional[Tuple[Optional[int], Any]]:
+        """
+        Atomowo (między procesami) sprawdza slot, wybiera dźwięk i zajmuje slot.
+        Równoległe żądania /warn we wszystkich workerach nie uruchomią dwóch dźwięków.
+        choose() wywoływane jest tylko przy wolnym slocie (pod blokadą) i zwraca krotkę zaczynającą się
+        od (nazwa, długość) albo None, gdy nie ma czego odtworzyć.
+
+        Returns:
+            None - dźwięk jest już odtwarzany; (numer odtwarzania, wynik choose()) - (None, None), gdy nic nie wybrano
+        """
+        with self.lock:
+            if self.is_currently_playing():
+                return None
+            choice = choose()
+            if choice is None:
+                return None, None
+            return self.start_playback(choice[0], choice[1]), choice
+
+    def stop_playback(self, playback_id: Optional[int] = None) -> None:
+        """
+        Zwolnij slot. Z podanym numerem tylko, jeśli w międzyczasie nie zaczęło się inne odtwarzanie.
+        Proces odtwarzający dźwięk zauważa zwolnienie slotu i przerywa odtwarzanie.
+        """
+        with self.lock:
+            current = self._slot()[0]
+            if playback_id is not None and playback_id != current:
+                return
+            SLOT.pack_into(self._map, SLOT_OFFSET, current, 0, 0, 0.0, 0.0, 0.0)
+
+    def is_currently_playing(self) -> bool:
+        """Sprawdź czy aktualnie odtwarzany jest dźwięk (uwzględniając czas)"""
+        playback_id, playing, owner, start, duration, end = self._slot()
+        if not playing:
+            return False
+        if end and time.time() > end:
+            self.stop_playback(playback_id)
+            return False
+        return True
+
+    def is_current(self, playback_id: int) -> bool:
+        """Czy slot nadal należy do tego odtwarzania (nie został zwolniony ani przejęty)"""
+        current, playing = self._slot()[:2]
+        return playing and current == playback_id
+
+    def get_remaining_time(self) -> Optional[float]:
+        """Zwraca pozostały czas odtwarzania w sekundach"""
+        if not self.is_currently_playing():
+            return None
+        end = self._slot()[5]
+        return max(0, end - time.time()) if end else None
+
+    # --- wersja biblioteki ---
+
+    @property
+    def epoch(self) -> str:
+        """Identyfikator bloku (zmienia się przy każdym uruchomieniu serwera) - część ETag bazy"""
+        return self._header()[2].hex()
+
+    @property
+    def library_version(self) -> int:
+        return self._header()[3]
+
+    def publish_library_change(self) -> int:
+        """Zgłasza zmianę biblioteki pozostałym procesom. Zwraca nową wersję."""
+        with self.lock:
+            version = self.library_version + 1
+            self._set_header(library=version)
+            return version
+
+    # --- historia i konfiguracja wyboru ---
+
+    def _history_entry(self, seq: int) -> Optional[str]:
+        offset = HISTORY_OFFSET + (seq % HISTORY_SIZE) * NAME.size
+        return _unpack_name(self._map[offset:offset + NAME.size])
+
+    @property
+    def last_selection(self) -> Optional[str]:
+        """Ostatnio wylosowany dźwięk (w dowolnym procesie)"""
+        history, reset = self._header()[4:6]
+        return self._history_entry(history - 1) if history > reset else None
+
+    def sync_selection(self, selector) -> Optional[str]:
+        """
+        Nanosi na silnik wyboru tego procesu konfigurację i wybory dokonane w innych procesach.
+        Zwraca ostatnio wylosowany dźwięk.
+        """
+        with self.lock:
+            history, reset, config, config_length = self._header()[4:8]
+            if config != self._config_seen:
+                # Zmiana trybu zaczyna historię od nowa (reset zapisany razem z konfiguracją)
+                if config_length:
+                    options = json.loads(self._map[CONFIG_OFFSET:CONFIG_OFFSET + config_length])
+                    options["weights"] = self._read_weights(options.pop("weights_file", None))
+                    selector.configure(**options)
+                self._config_seen = config
+                self._history_seen = reset
+            if history != self._history_seen:
+                start = max(self._history_seen, reset, history - HISTORY_SIZE)
+                # Pominięty reset lub wpisy starsze niż pierścień - historia odtwarzana od nowa
+                if self._history_seen < reset or start > self._history_seen:
+                    selector.reset()
+                for seq in range(start, history):
+                    key = self._history_entry(seq)
+                    if key is not None:
+                        selector.observe(key)
+                self._history_seen = history
+            return self._history_entry(history - 1) if history > reset else None
+
+    def pick(self, selector) -> Optional[str]:
+        """Wybór dźwięku z uwzględnieniem historii wszystkich procesów (jedna operacja pod blokadą)"""
+        with self.lock:
+            last = self.sync_selection(selector)
+            key = selector.pick(last)
+            if key is not None:
+                history = self._header()[4]
+                offset = HISTORY_OFFSET + (history % HISTORY_SIZE) * NAME.size
+                self._map[offset:offset + NAME.size] = _pack_name(key)
+                self._set_header(history=history + 1)
+                self._history_seen = history + 1
+            return key
+
+    def reset_selection(self, selector) -> None:
+        """Reset historii wyboru we wszystkich procesach"""
+        with self.lock:
+            self.sync_selection(selector)
+            selector.reset()
+            history = self._header()[4]
+            self._set_header(reset=history)
+
+    def _weights_path(self, config: int) -> Path:
+        """Plik wag wyboru zapisanych z daną wersją konfiguracji"""
+        return self.path.with_name(f"{self.path.name}.weights-{config}")
+
+    def _read_weights(self, name: Optional[str]) -> Dict[str, float]:
+        if not name:
+            return {}
+        try:
+            with open(self.path.with_name(name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Wspólny stan: nie udało się wczytać wag wyboru {name} ({e}) - wagi pominięte")
+            return {}
+
+    def configure_selection(self, selector, mode: Optional[str] = None, window: Optional[int] = None,
+                            weights: Optional[Dict[str, float]] = None) -> None:
+        """
+        Zmienia tryb wyboru (jak SoundSelector.configure) we wszystkich procesach.
+        Historia wyboru zaczyna się od nowa - jak po zmianie trybu w jednym procesie.
+
+        Konfiguracja trafia najpierw do bloku, a dopiero potem do silnika tego procesu - odrzucona
+        lub niezapisana nie zmienia trybu w żadnym procesie. Wagi (rosną z biblioteką) zapisywane są
+        w pliku obok bloku; blok przechowuje tylko jego nazwę z wersją konfiguracji.
+        """
+        if mode is not None and mode not in SELECTION_MODES:
+            raise ValueError(f"Nieznany tryb wyboru: {mode} (dostępne: {', '.join(SELECTION_MODES)})")
+        with self.lock:
+            self.sync_selection(selector)
+            history, previous = self._header()[4], self._header()[6]
+            config = previous + 1
+            weights = dict(weights) if weights is not None else dict(selector.weights)
+            options = {"mode": mode or selector.mode,
+                       "window": max(1, window) if window is not None else selector.window,
+                       "weights_file": self._weights_path(config).name if weights else None}
+            raw = json.dumps(options, ensure_ascii=False).encode("utf-8")
+            if len(raw) > CONFIG_MAX:
+                raise ValueError(f"Konfiguracja wyboru większa niż {CONFIG_MAX} bajtów")
+            if weights:
+                tmp_path = self.path.with_name(self._weights_path(config).name + ".tmp")
+                try:
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump(weights, f, ensure_ascii=False)
+                    os.replace(tmp_path, self._weights_path(config))
+                except OSError as e:
+                    raise ValueError(f"Nie udało się zapisać wag wyboru ({e.strerror})")
+            self._map[CONFIG_OFFSET:CONFIG_OFFSET + len(raw)] = raw
+            self._set_header(reset=history, config=config, config_length=len(raw))
+            with suppress(OSError):
+                self._weights_path(previous).unlink(missing_ok=True)
+            selector.configure(mode=options["mode"], window=options["window"], weights=weights)
+            self._config_seen = config
+            self._history_seen = history
+
+    def describe(self) -> Dict[str, Any]:
+        """Stan bloku (dla API)"""
+        with self.lock:
+            playback_id, playing, owner, start, duration, end = self._slot()
+            return {
+                "path": str(self.path),
+                "epoch": self.epoch,
+                "processes": self._read_pids(self._map),
+                "library_version": self.library_version,
+                "selections": self._header()[4],
+                "playback": {
+                    "playback_id": playback_id,
+                    "is_playing": playing,
+                    "owner_pid": owner or None,
+                    "filename": self.filename,
+                    "end_time": end if playing else None,
+                },
+            }
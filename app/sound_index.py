@@ -0,0 +1,129 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Trwały indeks metadanych plików audio.
+
+Wpis indeksu jest kluczowany ścieżką pliku i ważny tak długo, jak długo
+zgadza się trójka (rozmiar, mtime, inode). Dzięki temu odświeżenie bazy
+otwiera tylko nowe lub zmienione pliki - reszta jest czytana z indeksu.
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Iterable, List
+
+from .models import SoundRecord, AudioStatus
+
+# Zmiana wersji unieważnia indeksy zapisane przez starsze wersje aplikacji
+# (2 - pomiar głośności i true peak)
+INDEX_VERSION = 2
+
+
+def file_key(st: os.stat_result) -> List[int]:
+    """Klucz ważności wpisu: (rozmiar, mtime w ns, inode)"""
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+class SoundIndex:
+    """
+    Indeks metadanych zapisywany jako JSON na dysku.
+    Używany równolegle przez wątki skanu, obserwatora katalogu i synchronizacji workerów -
+    każda operacja (także zapis na dysk) odbywa się pod blokadą indeksu.
+    """
+
+    def __init__(self, path: Path, lock: Any = None):
+        self.path = Path(path)
+        self.entries: Dict[str, dict] = {}
+        self.loaded = False
+        self._dirty = False
+        self.lock = lock if lock is not None else threading.RLock()
+
+    def load(self) -> int:
+        """Wczytuje indeks z dysku. Zwraca liczbę wpisów."""
+        with self.lock:
+            return self._load()
+
+    def _load(self) -> int:
+        self.loaded = True
+        self.entries = {}
+        if not self.path.exists():
+            return 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.entries = data.get("entries", {})
+            else:
+                print(f"Indeks {self.path.name}: nieaktualna wersja - zostanie przebudowany")
+        except Exception as e:
+            print(f"Indeks {self.path.name}: nie udało się wczytać ({e}) - zostanie przebudowany")
+        return len(self.entries)
+
+    def save(self) -> bool:
+        """
+        Zapisuje indeks atomowo (plik tymczasowy + rename).
+        Zapis następuje tylko po zmianach - oszczędza kartę SD.
+        """
+        with self.lock:
+            return self._save()
+
+    def _save(self) -> bool:
+        if not self._dirty:
+            return False
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "entries": self.entries}, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            return True
+        except Exception as e:
+            print(f"Indeks {self.path.name}: nie udało się zapisać ({e})")
+            return False
+
+    def lookup(self, path: str, st: os.stat_result) -> Optional[SoundRecord]:
+        """Zwraca metadane z indeksu, jeśli plik nie zmienił się od ostatniego skanu"""
+        with self.lock:
+            entry = self.entries.get(path)
+        if entry is None or entry["key"] != file_key(st):
+            return None
+        return SoundRecord.from_dict(entry["info"])
+
+    def update(self, path: str, st: os.stat_result, info: SoundRecord) -> None:
+        """Zapisuje metadane pliku. Błędne pliki nie są indeksowane - będą sprawdzone ponownie."""
+        with self.lock:
+            if info.status != AudioStatus.OK:
+                self.remove(path)
+                return
+            self.entries[path] = {"key": file_key(st), "info": info.to_dict()}
+            self._dirty = True
+
+    def remove(self, path: str) -> None:
+        """Usuwa wpis z indeksu"""
+        with self.lock:
+            if self.entries.pop(path, None) is not None:
+                self._dirty = True
+
+    def prune(self, existing_paths: Iterable[str]) -> int:
+        """Usuwa wpisy plików, których już nie ma. Zwraca liczbę usuniętych wpisów."""
+        existing = set(existing_paths)
+        with self.lock:
+            stale = [path for path in self.entries if path not in existing]
+            for path in stale:
+                self.remove(path)
+        return len(stale)
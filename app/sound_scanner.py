@@ -0,0 +1,150 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Odczyt metadanych plików audio (długość, sample rate, rozmiar).
+
+Pliki mogą być sprawdzane sekwencyjnie albo równolegle w ograniczonej puli
+wątków lub procesów. Kolejność wyników zawsze odpowiada kolejności plików
+wejściowych, więc baza budowana z wyników jest deterministyczna.
+"""
+
+import os
+import wave
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from itertools import chain
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .models import SoundRecord, AudioStatus, AudioType
+from .loudness import measure_loudness
+from .startup_profile import is_available, optional_import
+
+# Alternatywa dla librosa - używamy soundfile (dostępny jako python3-soundfile w Debianie).
+# Importowany przy pierwszym pliku MP3 - skan samych WAV (i start serwera) go nie potrzebuje.
+SOUNDFILE_AVAILABLE = is_available("soundfile")
+if not SOUNDFILE_AVAILABLE:
+    print("Uwaga: soundfile nie jest dostępny - instaluj: sudo apt-get install python3-soundfile")
+
+# Wzorce plików audio (WAV i MP3) - ignorując wielkość liter
+AUDIO_PATTERNS = ["*.[Ww][Aa][Vv]", "*.[Mm][Pp]3"]
+
+# Liczba równoległych zadań odczytu metadanych (1 = sekwencyjnie)
+SCAN_WORKERS = max(1, int(os.environ.get("BARKING_DOG_SCAN_WORKERS", "4")))
+
+# Rodzaj puli: "thread" (odczyt I/O, soundfile zwalnia GIL) lub "process" (dekodowanie MP3 na wielu rdzeniach)
+SCAN_POOL = os.environ.get("BARKING_DOG_SCAN_POOL", "thread").lower()
+
+# Poniżej tej liczby plików pula nie opłaca się - skan sekwencyjny
+PARALLEL_MIN_FILES = 16
+
+
+def is_audio_file(path: Path) -> bool:
+    """Sprawdza czy plik ma rozszerzenie obsługiwanego formatu audio"""
+    return path.suffix.upper() in (".WAV", ".MP3")
+
+
+def list_audio_files(directory: Path) -> List[Path]:
+    """Zwraca posortowaną listę plików audio w katalogu"""
+    return sorted(chain.from_iterable(Path(directory).glob(pattern) for pattern in AUDIO_PATTERNS))
+
+
+def probe_sound_file(audio_file: Path, st: Optional[os.stat_result] = None, measure: bool = True) -> SoundRecord:
+    """
+    Odczytuje metadane pojedynczego pliku audio (długość, sample rate, rozmiar)
+    i mierzy jego głośność (LUFS, true peak - zapisywane w indeksie, liczone raz na plik).
+    `measure=False` pomija pomiar (samo sprawdzenie formatu pliku).
+    Błąd odczytu zwracany jest jako rekord ze statusem ERROR.
+    """
+    file_type = AudioType.WAV if audio_file.suffix.upper() == ".WAV" else AudioType.MP3
+
+    try:
+        file_size_bytes = (st or audio_file.stat()).st_size
+
+        # Pobierz długość i sample rate w zależności od typu pliku
+        if file_type == AudioType.WAV:
+            # Użyj wbudowanej biblioteki wave dla plików WAV
+            with wave.open(str(audio_file), 'rb') as wav_file:
+                frames = wav_file.getnframes()
+                sr = wav_file.getframerate()
+                duration = frames / float(sr)
+        else:
+            # Dla MP3 użyj soundfile (jeśli dostępny)
+            if SOUNDFILE_AVAILABLE:
+                info = optional_import("soundfile").info(str(audio_file))
+                duration = info.duration
+                sr = info.samplerate
+            else:
+                # Fallback - oszacuj na podstawie rozmiaru pliku (128kbps średnio)
+                duration = (file_size_bytes * 8) / (128000)  # przybliżone
+                sr = 44100  # standardowe dla MP3
+                print(f"  Uwaga: używam oszacowania dla {audio_file.name} (brak soundfile)")
+
+        # Plik bez pomiaru głośności jest odtwarzany bez wyrównania - to nie jest błąd pliku
+        loudness_lufs = true_peak_dbtp = None
+        if measure:
+            try:
+                loudness_lufs, true_peak_dbtp = measure_loudness(audio_file)
+            except Exception as e:
+                print(f"  Uwaga: nie udało się zmierzyć głośności {audio_file.name} ({e})")
+
+        return SoundRecord(
+            length=round(duration, 2),
+            sample_rate=int(sr),
+            size_bytes=file_size_bytes,
+            type=file_type,
+            path=str(audio_file),
+            status=AudioStatus.OK,
+            loudness_lufs=loudness_lufs,
+            true_peak_dbtp=true_peak_dbtp
+        )
+    except Exception as e:
+        return SoundRecord(
+            length=None,
+            sample_rate=None,
+            size_bytes=None,
+            type=file_type,
+            path=str(audio_file),
+            status=AudioStatus.ERROR,
+            error=str(e)
+        )
+
+
+def _probe_entry(entry: Tuple[Path, Optional[os.stat_result]]) -> SoundRecord:
+    """Adapter dla puli (funkcja na poziomie modułu - wymagane przez pulę procesów)"""
+    return probe_sound_file(*entry)
+
+
+def probe_sound_files(entries: List[Tuple[Path, Optional[os.stat_result]]],
+                      workers: int = SCAN_WORKERS,
+                      pool: str = SCAN_POOL) -> List[SoundRecord]:
+    """
+    Odczytuje metadane wielu plików.
+
+    Args:
+        entries: Lista par (ścieżka, wynik stat lub None)
+        workers: Maksymalna liczba równoległych zadań (1 = sekwencyjnie)
+        pool: "thread" lub "process"
+
+    Returns:
+        Lista SoundRecord w tej samej kolejności co `entries`
+    """
+    if workers <= 1 or len(entries) < PARALLEL_MIN_FILES:
+        return [_probe_entry(entry) for entry in entries]
+
+    executor_class = ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor
+    chunksize = max(1, len(entries) // (workers * 8)) if pool == "process" else 1
+    with executor_class(max_workers=workers) as executor:
+        # map() zachowuje kolejność wejścia - wynik jest deterministyczny
+        return list(executor.map(_probe_entry, entries, chunksize=chunksize))
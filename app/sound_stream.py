@@ -0,0 +1,195 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Strumieniowanie plików dźwiękowych przez HTTP.
+
+Obsługuje zapytania o zakres bajtów (Range / If-Range), warunkowe
+(If-None-Match / If-Modified-Since -> 304) oraz transfer bez kopiowania:
+jeśli serwer ASGI udostępnia rozszerzenie `http.response.zerocopysend`,
+deskryptor pliku trafia do sendfile() po stronie serwera; przy
+`http.response.pathsend` serwer wysyła plik po ścieżce. W pozostałych
+przypadkach (np. uvicorn) plik czytany jest porcjami przez os.pread()
+w wątku, bez blokowania pętli zdarzeń.
+"""
+
+import os
+import asyncio
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from starlette.responses import Response
+
+from .sound_index import file_key
+
+# Rozmiar porcji odczytu, gdy serwer nie obsługuje sendfile
+STREAM_CHUNK_SIZE = 256 * 1024
+
+MEDIA_TYPES = {".WAV": "audio/wav", ".MP3": "audio/mpeg"}
+
+
+def make_etag(st: os.stat_result) -> str:
+    """Silny ETag z klucza indeksu (rozmiar, mtime, inode)"""
+    return '"' + "-".join(f"{value:x}" for value in file_key(st)) + '"'
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parsuje nagłówek Range z jednym zakresem bajtów.
+
+    Returns:
+        (początek, koniec włącznie); None gdy nagłówek ma być zignorowany
+        (inna jednostka, wiele zakresów, błąd składni)
+
+    Raises:
+        ValueError: zakres poza plikiem (odpowiedź 416)
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    try:
+        start = int(first) if first else None
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if not sep or (start is None and end is None):
+        return None
+
+    if start is None:
+        # bytes=-N - ostatnie N bajtów
+        if end == 0 or size == 0:
+            raise ValueError("pusty zakres")
+        return max(0, size - end), size - 1
+    if end is not None and end < start:
+        return None
+    if start >= size:
+        raise ValueError("zakres poza plikiem")
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Porównanie If-None-Match (słabe porównanie - wystarczające dla 304)"""
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in header.split(",")]
+    return etag in tags or f"W/{etag}" in tags
+
+
+def not_modified(headers, etag: str, mtime: float) -> bool:
+    """Czy zapytanie warunkowe pozwala odpowiedzieć 304"""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class SoundFileResponse(Response):
+    """
+    Odpowiedź z plikiem dźwiękowym (całość lub zakres).
+    Deskryptor pliku otwierany jest przez wywołującego i zamykany po wysłaniu.
+    """
+
+    def __init__(self, fd: int, start: int, length: int, status_code: int, headers: dict, send_body: bool = True,
+                 path: Optional[str] = None):
+        super().__init__(status_code=status_code, headers=headers)
+        self.fd = fd
+        self.start = start
+        self.length = length
+        self.send_body = send_body
+        self.path = path
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if not self.send_body or self.length == 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+
+            extensions = scope.get("extensions") or {}
+            if "http.response.zerocopysend" in extensions:
+                await send({"type": "http.response.zerocopysend", "file": self.fd,
+                            "offset": self.start, "count": self.length, "more_body": False})
+                return
+            if "http.response.pathsend" in extensions and self.path and self.status_code == 200:
+                await send({"type": "http.response.pathsend", "path": self.path})
+                return
+
+            offset, remaining = self.start, self.length
+            while remaining > 0:
+                chunk = await asyncio.to_thread(os.pread, self.fd, min(STREAM_CHUNK_SIZE, remaining), offset)
+                if not chunk:
+                    break  # plik skrócony w trakcie wysyłania
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(self.fd)
+
+
+def stream_sound_file(path: str, request_headers, send_body: bool = True) -> Response:
+    """
+    Buduje odpowiedź dla pliku: 200 (całość), 206 (zakres), 304 (bez zmian) lub 416 (zły zakres).
+
+    Raises:
+        OSError: pliku nie da się otworzyć
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        st = os.fstat(fd)
+        etag = make_etag(st)
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "no-cache",
+        }
+
+        if not_modified(request_headers, etag, st.st_mtime):
+            os.close(fd)
+            return Response(status_code=304, headers=headers)
+
+        size = st.st_size
+        start, length, status_code = 0, size, 200
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (if_range is None or if_range.strip() == etag):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                os.close(fd)
+                headers["Content-Range"] = f"bytes */{size}"
+                return Response(status_code=416, headers=headers)
+            if byte_range is not None:
+                start, end = byte_range
+                length, status_code = end - start + 1, 206
+                headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+        headers["Content-Length"] = str(length)
+        headers["Content-Type"] = MEDIA_TYPES.get(os.path.splitext(path)[1].upper(), "application/octet-stream")
+        return SoundFileResponse(fd, start, length, status_code, headers, send_body, path)
+    except BaseException:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+        raise
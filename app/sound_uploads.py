@@ -0,0 +1,336 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Dodawanie dźwięków przez API (POST /sounds) - przyjęcie pliku, optymalizacja w tle.
+
+Treść żądania zapisywana jest na dysk fragmentami (bez buforowania całego pliku
+w pamięci) do katalogu roboczego. Dostrojenie wysokości i normalizacja
+(app/tools/optimize.py) działają w osobnej puli procesów - librosa ładowana
+jest tylko w procesach roboczych, pula tworzona przy pierwszym przesłaniu.
+Wynik trafia do katalogu dźwięków i jest wstawiany do bazy pojedynczo,
+bez pełnego skanu. Postęp zadań: GET /sounds/jobs/{id}.
+"""
+
+import os
+import time
+import asyncio
+import itertools
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from .models import AudioStatus, SoundRecord
+from .sound_scanner import is_audio_file, probe_sound_file
+
+# Konfiguracja przesyłania
+UPLOAD_WORKERS = max(1, int(os.environ.get("BARKING_DOG_UPLOAD_WORKERS", "1")))
+UPLOAD_MAX_BYTES = int(os.environ.get("BARKING_DOG_UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_JOBS_KEEP = int(os.environ.get("BARKING_DOG_UPLOAD_JOBS_KEEP", "50"))
+UPLOAD_F0 = os.environ.get("BARKING_DOG_UPLOAD_F0", "yin").lower()
+UPLOAD_REFERENCE = Path(os.environ.get(
+    "BARKING_DOG_UPLOAD_REFERENCE",
+    Path(__file__).parent / "sounds" / "originals" / "dog-bark-type-03-293293.mp3"))
+
+# Parametry optymalizacji jak domyślne w app/tools/optimize.py
+OPTIMIZE_PARAMS = {"sr": 22050, "top_db": 40.0, "peak": 0.89, "f0": UPLOAD_F0}
+
+# Udział etapów optymalizacji w postępie zadania (etap -> postęp w chwili jego rozpoczęcia)
+STAGE_PROGRESS = {"reference": 0.05, "decode": 0.1, "f0": 0.3, "shift": 0.5, "write": 0.9}
+
+ACTIVE_STATES = ("RECEIVING", "QUEUED", "PROCESSING", "INSERTING")
+
+
+class UploadTooLarge(Exception):
+    """Przesyłany plik przekracza BARKING_DOG_UPLOAD_MAX_BYTES"""
+
+
+class UploadJob:
+    """Zadanie dodania dźwięku: przyjęcie pliku, optymalizacja, wstawienie do bazy"""
+
+    __slots__ = ("id", "filename", "output", "optimize", "status", "stage", "progress", "bytes_received",
+                 "created_at", "finished_at", "f0", "f0_target", "timings", "info", "error", "staged_path")
+
+    def __init__(self, id: int, filename: str, output: str, optimize: bool, staged_path: Path):
+        self.id = id
+        self.filename = filename
+        self.output = output
+        self.optimize = optimize
+        self.status = "RECEIVING"
+        self.stage: Optional[str] = None
+        self.progress = 0.0
+        self.bytes_received = 0
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.f0: Optional[float] = None
+        self.f0_target: Optional[float] = None
+        self.timings: Dict[str, float] = {}
+        self.info: Optional[SoundRecord] = None
+        self.error: Optional[str] = None
+        self.staged_path = staged_path
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATES
+
+    def fail(self, error: str) -> None:
+        self.status = "ERROR"
+        self.error = error
+        self.finished_at = time.time()
+        print(f"Przesyłanie #{self.id} ({self.filename}): BŁĄD {error}")
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "filename": self.filename,
+            "output": self.output,
+            "optimize": self.optimize,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "bytes_received": self.bytes_received,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "f0": round(self.f0, 2) if self.f0 else None,
+            "f0_target": round(self.f0_target, 2) if self.f0_target else None,
+            "timings_ms": {stage: round(seconds * 1000.0, 1) for stage, seconds in self.timings.items()},
+            "info": self.info.to_dict() if self.info is not None else None,
+            "error": self.error,
+        }
+
+
+# --- Procesy robocze ---
+
+_progress_queue = None
+_reference_cache: Dict[tuple, Optional[float]] = {}
+
+
+def _init_worker(progress_queue) -> None:
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _report(job_id: int, stage: str) -> None:
+    if _progress_queue is not None:
+        _progress_queue.put((job_id, stage))
+
+
+def _reference_f0(reference: str, params: Dict[str, Any]) -> Optional[float]:
+    """F0 pliku wzorcowego - liczone raz na proces roboczy (dopóki plik się nie zmieni)"""
+    from app.tools import optimize
+
+    try:
+        st = os.stat(reference)
+    except OSError:
+        print(f"Przesyłanie: brak pliku wzorcowego {reference} - tylko normalizacja")
+        return None
+    key = (reference, st.st_mtime_ns, st.st_size, params["sr"], params["top_db"], params["f0"])
+    if key not in _reference_cache:
+        y = optimize.load_audio(Path(reference), params["sr"], params["top_db"])
+        _reference_cache[key] = optimize.estimate_f0(y, params["sr"], params["f0"])
+    return _reference_cache[key]
+
+
+def optimize_upload(job_id: int, source: str, target: str, reference: str,
+                    params: Dict[str, Any]) -> Dict[str, Any]:
+    """Zadanie puli procesów: dostrojenie przesłanego pliku do wzorca (jak optimize.py)"""
+    from app.tools import optimize
+
+    _report(job_id, "reference")
+    start = time.perf_counter()
+    f0_target = _reference_f0(reference, params)
+    reference_seconds = time.perf_counter() - start
+    result = optimize.process_file(source, target, None, f0_target, params,
+                                   progress=lambda stage: _report(job_id, stage))
+    result["f0_target"] = f0_target
+    result["timings"] = {"reference": reference_seconds, **result["timings"]}
+    return result
+
+
+class UploadManager:
+    """
+    Zadania przesyłania dźwięków: zapis treści żądania, optymalizacja w puli procesów
+    i wstawienie wyniku do bazy.
+
+    Args:
+        sounds_dir: Katalog dźwięków (tu trafiają gotowe pliki)
+        staging_dir: Katalog roboczy na przesyłane pliki
+        insert: Wstawia gotowy plik do bazy i silnika audio (bez pełnego skanu);
+            zwraca jego rekord
+    """
+
+    def __init__(self, sounds_dir: Path, staging_dir: Path,
+                 insert: Callable[[Path], Awaitable[Optional[SoundRecord]]],
+                 workers: int = UPLOAD_WORKERS, max_bytes: int = UPLOAD_MAX_BYTES,
+                 keep: int = UPLOAD_JOBS_KEEP, reference: Path = UPLOAD_REFERENCE,
+                 params: Optional[Dict[str, Any]] = None):
+        self.sounds_dir = Path(sounds_dir)
+        self.staging_dir = Path(staging_dir)
+        self.insert = insert
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.reference = Path(reference)
+        self.params = dict(params or OPTIMIZE_PARAMS)
+        self.jobs: "OrderedDict[int, UploadJob]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._progress_queue = None
+        self._progress_thread: Optional[threading.Thread] = None
+
+    def output_name(self, filename: str, optimize: bool) -> str:
+        """Nazwa pliku w katalogu dźwięków (jak w optimize.py: <nazwa>_aligned.wav)"""
+        return f"{Path(filename).stem}_aligned.wav" if optimize else filename
+
+    def create_job(self, filename: str, optimize: bool = True) -> UploadJob:
+        """
+        Zakłada zadanie dla przesyłanego pliku.
+        ValueError - niepoprawna nazwa lub ten sam plik jest już przetwarzany.
+        """
+        name = Path(filename or "").name
+        if not name or name != filename or not is_audio_file(Path(name)):
+            raise ValueError("Oczekiwano nazwy pliku .wav lub .mp3 (bez katalogów)")
+        output = self.output_name(name, optimize)
+        if any(job.active and job.output == output for job in self.jobs.values()):
+            raise FileExistsError(f"Plik {output} jest już przetwarzany")
+
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        job_id = next(self._ids)
+        job = UploadJob(job_id, name, output, optimize, self.staging_dir / f"{job_id}-{name}")
+        self.jobs[job_id] = job
+        self._prune()
+        return job
+
+    async def receive(self, job: UploadJob, chunks: AsyncIterator[bytes]) -> None:
+        """Zapisuje treść żądania na dysk fragment po fragmencie (UploadTooLarge po przekroczeniu limitu)"""
+        try:
+            with open(job.staged_path, "wb") as f:
+                async for chunk in chunks:
+                    job.bytes_received += len(chunk)
+                    if job.bytes_received > self.max_bytes:
+                        raise UploadTooLarge(f"Plik większy niż {self.max_bytes} bajtów")
+                    f.write(chunk)
+        except BaseException as e:
+            job.fail(str(e) or type(e).__name__)
+            job.staged_path.unlink(missing_ok=True)
+            raise
+        if job.bytes_received == 0:
+            job.staged_path.unlink(missing_ok=True)
+            job.fail("Pusta treść żądania")
+            raise ValueError(job.error)
+
+    def submit(self, job: UploadJob) -> None:
+        """Uruchamia przetwarzanie przyjętego pliku w tle (zadanie asyncio)"""
+        job.status = "QUEUED"
+        task = asyncio.create_task(self._process(job))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+
+    async def _process(self, job: UploadJob) -> None:
+        target = self.sounds_dir / job.output
+        try:
+            if job.optimize:
+                future = self._get_executor().submit(
+                    optimize_upload, job.id, str(job.staged_path), str(target), str(self.reference), self.params)
+                result = await asyncio.wrap_future(future)
+                job.f0 = result["f0"]
+                job.f0_target = result["f0_target"]
+                job.timings = result["timings"]
+            else:
+                job.status = "PROCESSING"
+                # Samo sprawdzenie formatu - głośność mierzy wstawienie do bazy
+                sound_info = await asyncio.to_thread(probe_sound_file, job.staged_path, measure=False)
+                if sound_info.status != AudioStatus.OK:
+                    raise ValueError(f"Nie udało się odczytać pliku audio: {sound_info.error or 'nieznany format'}")
+                self.sounds_dir.mkdir(parents=True, exist_ok=True)
+                os.replace(job.staged_path, target)
+
+            job.status = "INSERTING"
+            job.stage = None
+            job.progress = 0.95
+            job.info = await self.insert(target)
+            if job.info is None or job.info.status != AudioStatus.OK:
+                raise ValueError(f"Plik {job.output} nie został dodany do bazy")
+            job.status = "DONE"
+            job.progress = 1.0
+            job.finished_at = time.time()
+            print(f"Przesyłanie #{job.id}: {job.filename} -> {job.output} "
+                  f"({(job.finished_at - job.created_at):.2f}s)")
+        except asyncio.CancelledError:
+            job.fail("Przerwane przy zamykaniu serwera")
+            raise
+        except Exception as e:
+            job.fail(str(e) or type(e).__name__)
+        finally:
+            job.staged_path.unlink(missing_ok=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Pula procesów tworzona przy pierwszym przesłaniu (spawn - bez kopiowania wątków serwera)"""
+        if self._executor is None:
+            context = multiprocessing.get_context("spawn")
+            self._progress_queue = context.Queue()
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                                 initializer=_init_worker, initargs=(self._progress_queue,))
+            self._progress_thread = threading.Thread(target=self._drain_progress, daemon=True)
+            self._progress_thread.start()
+            print(f"Przesyłanie: pula optymalizacji ({self.workers} procesów, F0: {self.params['f0']})")
+        return self._executor
+
+    def _drain_progress(self) -> None:
+        """Wątek: etapy raportowane przez procesy robocze -> stan zadań"""
+        while True:
+            message = self._progress_queue.get()
+            if message is None:
+                return
+            job_id, stage = message
+            job = self.jobs.get(job_id)
+            if job is not None and job.status in ("QUEUED", "PROCESSING"):
+                job.status = "PROCESSING"
+                job.stage = stage
+                job.progress = STAGE_PROGRESS.get(stage, job.progress)
+
+    def _prune(self) -> None:
+        """Zachowuje najwyżej `keep` zakończonych zadań (najstarsze usuwane jako pierwsze)"""
+        finished = [job_id for job_id, job in self.jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - self.keep)]:
+            del self.jobs[job_id]
+
+    def describe(self) -> Dict[str, Any]:
+        """Stan przesyłania (dla API)"""
+        return {
+            "workers": self.workers,
+            "max_bytes": self.max_bytes,
+            "f0": self.params["f0"],
+            "reference": str(self.reference),
+            "active": sum(job.active for job in self.jobs.values()),
+            "jobs": [job.describe() for job in reversed(self.jobs.values())],
+        }
+
+    async def shutdown(self) -> None:
+        """Przerywa zadania w toku i zamyka pulę procesów"""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        for task in list(self._tasks.values()):
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._progress_queue.put(None)
+            self._executor = None
@@ -0,0 +1,136 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Obserwator katalogu z dźwiękami oparty o inotify (tylko Linux).
+
+Korzysta bezpośrednio z libc przez ctypes - nie wymaga dodatkowych pakietów.
+Zdarzenia są zbierane przez krótki czas (debounce) i przekazywane
+do funkcji zwrotnej jako zbiór ścieżek zmienionych plików.
+"""
+
+import os
+import sys
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Set
+
+# Maski zdarzeń inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+
+# struct inotify_event: int wd; uint32 mask; uint32 cookie; uint32 len; char name[]
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class SoundsDirectoryWatcher:
+    """Obserwuje katalog i zgłasza zmienione pliki po okresie ciszy (debounce)"""
+
+    def __init__(self, directory: Path, callback: Callable[[Set[str]], None], debounce: float = 0.5):
+        self.directory = Path(directory)
+        self.callback = callback
+        self.debounce = debounce
+        self._fd: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @staticmethod
+    def is_supported() -> bool:
+        """inotify jest dostępne tylko na Linuksie"""
+        return sys.platform.startswith("linux") and ctypes.util.find_library("c") is not None
+
+    def start(self) -> bool:
+        """Rozpoczyna obserwację katalogu w wątku w tle"""
+        if not self.is_supported():
+            print("Obserwator katalogu: inotify niedostępne na tej platformie")
+            return False
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            print(f"Obserwator katalogu: inotify_init1 nie powiodło się ({os.strerror(ctypes.get_errno())})")
+            return False
+        wd = libc.inotify_add_watch(fd, str(self.directory).encode(), WATCH_MASK)
+        if wd < 0:
+            print(f"Obserwator katalogu: nie można obserwować {self.directory} ({os.strerror(ctypes.get_errno())})")
+            os.close(fd)
+            return False
+
+        self._fd = fd
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sounds-watcher", daemon=True)
+        self._thread.start()
+        print(f"Obserwator katalogu: obserwuję {self.directory}")
+        return True
+
+    def stop(self) -> None:
+        """Zatrzymuje obserwację"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _read_events(self) -> Set[str]:
+        """Odczytuje oczekujące zdarzenia i zwraca ścieżki zmienionych plików"""
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return changed
+                raise
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                _, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b"\0").decode(errors="replace")
+                offset += name_len
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    print(f"Obserwator katalogu: katalog {self.directory} został usunięty lub przeniesiony")
+                    self._stop.set()
+                elif name:
+                    changed.add(str(self.directory / name))
+
+    def _run(self) -> None:
+        pending: Set[str] = set()
+        while not self._stop.is_set():
+            # Czekaj na zdarzenia; przy zebranych zmianach - tylko przez okres debounce
+            timeout = self.debounce if pending else 1.0
+            ready, _, _ = select.select([self._fd], [], [], timeout)
+            if ready:
+                pending |= self._read_events()
+                continue
+            if pending:
+                changed, pending = pending, set()
+                try:
+                    self.callback(changed)
+                except Exception as e:
+                    print(f"Obserwator katalogu: błąd podczas stosowania zmian: {e}")
@@ -12,32 +12,33 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from fastapi import FastAPI
+# Profil startu jako pierwszy import - mierzy kolejne grupy importów
+from .startup_profile import startup_profile, is_available, optional_import
+
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager, suppress
 import os
 import wave
-import struct
 from pathlib import Path
-from typing import Dict, List, Any, Union
-from itertools import chain
+from typing import Dict, List, Any, Optional, Union
+import json
+import math
 import time
+import zlib
+import random
 import threading
 import asyncio
-from time import sleep
+import concurrent.futures
+from collections import Counter
 
-# Alternatywa dla librosa - używamy soundfile (dostępny jako python3-soundfile w Debianie)
-try:
-    import soundfile as sf
-    SOUNDFILE_AVAILABLE = True
-except ImportError:
-    SOUNDFILE_AVAILABLE = False
-    print("Uwaga: soundfile nie jest dostępny - instaluj: sudo apt-get install python3-soundfile")
+startup_profile.mark("import fastapi + stdlib")
 
 # Import modeli Pydantic
 from .models import (
     SoundsDatabase, 
-    SoundInfo, 
+    SoundRecord, 
     AudioStatus, 
-    AudioType,
     SoundResponse,
     SoundsDatabaseResponse,
     RefreshResponse,
@@ -46,22 +47,50 @@ from .models import (
     RandomSoundErrorResponse,
     WarnResponse,
     WarnErrorResponse,
-    PlaybackState
+    StopResponse,
+    PlaybackState,
+    ReadinessResponse,
+    SelectionConfigRequest,
+    VolumeConfigRequest,
+    UploadJobResponse,
+    SequenceRequest,
+    SequenceResponse
+)
+from .audio_engine import AudioEngine
+from .audio_backends import is_simulated_platform
+from .audio_zones import MultiZoneBackend
+from .sound_index import SoundIndex
+from .sound_scanner import (
+    SCAN_WORKERS,
+    SCAN_POOL,
+    is_audio_file,
+    list_audio_files,
+    probe_sound_files
+)
+from .sound_watcher import SoundsDirectoryWatcher
+from .sound_uploads import UploadManager, UploadTooLarge
+from .playback_queue import PlaybackQueue, PLAYBACK_MODE
+from .shared_state import (
+    SharedPlaybackState,
+    SHARED_STATE_ENABLED,
+    FCNTL_AVAILABLE,
+    PLAYBACK_POLL_SECONDS,
+    LIBRARY_POLL_SECONDS,
+    default_state_path
 )
+from .rate_limit import TokenBucketLimiter
+from .sequence import SequenceError, SEQUENCE_MAX_SECONDS, expand_pattern, gaps_to_frames
+from .events import Event, EventHub, EVENTS_KEEPALIVE_SECONDS, SSE_KEEPALIVE, dropped_event
+from .sound_stream import stream_sound_file, etag_matches
+from .metrics import MetricsRegistry, RequestMetricsMiddleware, SCAN_BUCKETS
+import pydantic_core
 
-# Windows audio support
-try:
-    import winsound
-    WINSOUND_AVAILABLE = True
-except ImportError:
-    WINSOUND_AVAILABLE = False
+startup_profile.mark("import modułów aplikacji")
 
-# Cross-platform audio support
-try:
-    import pygame
-    PYGAME_AVAILABLE = True
-except ImportError:
-    PYGAME_AVAILABLE = False
+# Windows audio support / cross-platform audio support - importowane przy pierwszym
+# odtwarzaniu (pygame to ~150 ms importu, zbędne przy wyjściu null lub alsa)
+WINSOUND_AVAILABLE = is_available("winsound")
+PYGAME_AVAILABLE = is_available("pygame")
 
 try:
     import subprocess
@@ -73,14 +102,136 @@ except ImportError:
 # Detect audio capabilities
 AUDIO_AVAILABLE = WINSOUND_AVAILABLE or PYGAME_AVAILABLE or SUBPROCESS_AVAILABLE
 
+# Kontener lub iOS - brak fizycznego wyjścia audio (sprawdzane raz, przy imporcie)
+IS_SIMULATED_PLATFORM = is_simulated_platform()
+
 # Ścieżka do katalogu z dźwiękami
-SOUNDS_DIR = Path(__file__).parent / "sounds" / "optimized"
+SOUNDS_DIR = Path(os.environ.get("BARKING_DOG_SOUNDS_DIR", Path(__file__).parent / "sounds" / "optimized"))
 
-# Globalna baza danych dźwięków (obiekt Pydantic)
+# Trwały indeks metadanych plików (ścieżka + rozmiar/mtime/inode)
+INDEX_FILE = Path(os.environ.get("BARKING_DOG_INDEX_FILE", SOUNDS_DIR.parent / ".sounds_index.json"))
+
+# Obserwowanie katalogu z dźwiękami (inotify) - zmiany nanoszone na bazę na bieżąco
+WATCH_SOUNDS_DIR = os.environ.get("BARKING_DOG_WATCH", "0").lower() in ("1", "true", "yes")
+
+# Bank próbek - zdekodowane dźwięki w jednym pliku mapowanym w pamięci (wspólny dla workerów)
+SAMPLE_BANK_FILE = Path(os.environ.get("BARKING_DOG_SAMPLE_BANK_FILE", SOUNDS_DIR.parent / ".sample_bank.bin"))
+
+# Wspólny stan workerów uvicorn (slot odtwarzania, historia wyboru, wersja biblioteki) - domyślnie w /dev/shm,
+# osobny dla każdego uruchomienia serwera; używany tylko przy kilku workerach lub BARKING_DOG_SHARED_STATE=1
+STATE_FILE = Path(os.environ.get("BARKING_DOG_STATE_FILE", default_state_path(SOUNDS_DIR)))
+
+# Katalog roboczy na pliki przesyłane przez POST /sounds (poza katalogiem dźwięków)
+UPLOAD_DIR = Path(os.environ.get("BARKING_DOG_UPLOAD_DIR", SOUNDS_DIR.parent / "uploads"))
+
+# Dźwięk odtwarzany przy starcie systemu
+STARTUP_SOUND = Path(__file__).parent / "sounds" / "helpers" / "start.wav"
+
+# Opóźnienie dźwięku startowego - czas na ustabilizowanie się PulseAudio/Bluetooth
+STARTUP_DELAY = float(os.environ.get("BARKING_DOG_STARTUP_DELAY", "15"))
+
+# Globalna baza danych dźwięków (nazwa pliku -> zwarty rekord SoundRecord)
 sounds_database = SoundsDatabase()
 
-# Globalny stan odtwarzania audio (obiekt Pydantic)
-playback_state = PlaybackState()
+# Globalny indeks metadanych plików audio
+sound_index = SoundIndex(INDEX_FILE)
+
+# Pętla zdarzeń serwera (ustawiana przy starcie - potrzebna wątkom w tle)
+server_loop = None
+
+# Globalny stan odtwarzania audio - przy kilku workerach wspólny (blok pamięci + flock),
+# w pojedynczym procesie (lub bez fcntl) tylko w pamięci
+if SHARED_STATE_ENABLED and FCNTL_AVAILABLE:
+    playback_state = SharedPlaybackState(STATE_FILE)
+    sounds_database.shared_history = playback_state
+else:
+    playback_state = PlaybackState()
+
+# Wersja biblioteki naniesiona na bazę tego procesu (wspólny stan - zmiany z innych workerów)
+library_state = {"version": 0}
+
+# Zdarzenia odtwarzania i biblioteki dla klientów /events (SSE) i /events/ws
+event_hub = EventHub()
+
+# Ostatnie odtwarzania, o których rozpoczęciu i końcu powiadomiono (każde zdarzenie raz,
+# niezależnie od tego, czy zgłosił je ten proces, czy wykrył je w slocie innego workera)
+playback_events = {"started": 0, "ended": 0}
+
+# Globalny silnik audio (urządzenie otwierane raz, dźwięki w pamięci)
+audio_engine = AudioEngine(bank_path=SAMPLE_BANK_FILE)
+
+# Stan uruchamiania aplikacji (ładowanie bazy dźwięków w tle)
+startup_state = {
+    "started_at": time.time(),
+    "sound_bank_loaded": False,
+    "sound_bank_loaded_at": None,
+    "startup_sound_played": False,
+    "error": None,
+}
+
+# Metryki Prometheusa (/metrics)
+metrics = MetricsRegistry()
+http_request_duration = metrics.histogram(
+    "barking_dog_http_request_duration_seconds", "Czas obsługi żądania HTTP", ("route", "method"))
+http_requests_total = metrics.counter(
+    "barking_dog_http_requests_total", "Liczba żądań HTTP", ("route", "method", "status"))
+playback_start_latency = metrics.histogram(
+    "barking_dog_playback_start_latency_seconds", "Opóźnienie od żądania do pierwszej ramki audio")
+scan_duration = metrics.histogram(
+    "barking_dog_scan_duration_seconds", "Czas skanu biblioteki dźwięków", buckets=SCAN_BUCKETS)
+
+def print_sound_row(filename: str, sound_info: SoundRecord):
+    """Wyświetla wiersz tabeli dźwięków"""
+    if sound_info.status == AudioStatus.OK:
+        loudness = f"{sound_info.loudness_lufs:.1f}" if sound_info.loudness_lufs is not None else "-"
+        print(f"{filename:<40} {sound_info.type:<6} {sound_info.length:<12.2f} "
+              f"{sound_info.sample_rate:<12} {sound_info.get_formatted_size():<15} {loudness:<8}")
+    else:
+        print(f"{filename:<40} {sound_info.type:<6} {'BLAD':<12} {'-':<12} {'-':<15} {'-':<8}")
+
+def lookup_or_probe_files(audio_files: List[Path]):
+    """
+    Zwraca metadane plików z indeksu, a pliki nowe lub zmienione odczytuje
+    (równolegle, jeśli tak skonfigurowano - patrz BARKING_DOG_SCAN_WORKERS).
+    Zwraca krotkę (słownik nazwa -> SoundRecord w kolejności wejścia, lista nazw odczytanych plików).
+    """
+    results: Dict[str, SoundRecord] = {}
+    to_probe = []
+    for audio_file in audio_files:
+        try:
+            st = audio_file.stat()
+        except OSError:
+            continue  # plik zniknął w trakcie skanu
+        sound_info = sound_index.lookup(str(audio_file), st)
+        results[audio_file.name] = sound_info  # None - miejsce zarezerwowane dla odczytu
+        if sound_info is None:
+            to_probe.append((audio_file, st))
+
+    for (audio_file, st), sound_info in zip(to_probe, probe_sound_files(to_probe)):
+        sound_index.update(str(audio_file), st, sound_info)
+        results[audio_file.name] = sound_info
+    return results, [audio_file.name for audio_file, _ in to_probe]
+
+def apply_sound_changes(changes: Dict[str, Union[SoundRecord, None]]) -> int:
+    """
+    Nanosi zmiany na globalną bazę (None = plik usunięty) bez jej przebudowy.
+    Zwraca liczbę faktycznie zmienionych wpisów.
+    """
+    changed = 0
+    added = False
+    for filename, sound_info in changes.items():
+        current = sounds_database.get_sound(filename)
+        if sound_info is None:
+            if sounds_database.remove_sound(filename):
+                changed += 1
+        elif current != sound_info:
+            added = added or current is None
+            sounds_database.add_sound(filename, sound_info)
+            changed += 1
+    if added:
+        # Zachowaj kolejność alfabetyczną jak przy pełnym skanie
+        sounds_database.sort_by_name()
+    return changed
 
 def create_sounds_table():
     """
@@ -88,9 +239,11 @@ def create_sounds_table():
     Używa modeli Pydantic dla typowej struktury danych.
     Funkcja do wywoływania przy starcie lub czasowo
     Obsługuje pliki WAV i MP3
+
+    Metadane niezmienionych plików czytane są z indeksu na dysku -
+    otwierane są tylko pliki nowe lub zmienione, usunięte znikają z bazy.
     """
     global sounds_database
-    sounds_database.clear()  # Wyczyść poprzednie dane
     
     print("=" * 60)
     print("TABELA DZWIEKOW - ANALIZA PLIKOW AUDIO")
@@ -105,88 +258,56 @@ def create_sounds_table():
         except Exception as e:
             print(f"BLAD podczas tworzenia katalogu: {e}")
             return sounds_database
+
+    if not sound_index.loaded:
+        print(f"Indeks metadanych: {sound_index.load()} wpisow ({INDEX_FILE})")
     
-    # Pobierz wszystkie pliki audio z katalogu (WAV i MP3) - ignorując wielkość liter
-    patterns = ["*.[Ww][Aa][Vv]", "*.[Mm][Pp]3"]
-    audio_files = list(chain.from_iterable(SOUNDS_DIR.glob(pattern) for pattern in patterns))
+    # Pobierz wszystkie pliki audio z katalogu (WAV i MP3)
+    scan_start = time.perf_counter()
+    audio_files = list_audio_files(SOUNDS_DIR)
     
     if not audio_files:
         print("Nie znaleziono plikow audio (.wav/.mp3) w katalogu")
         print(f"Katalog: {SOUNDS_DIR}")
         print("Aby zobaczyc tabele, dodaj pliki audio do tego katalogu")
-        return sounds_database
-    
-    print(f"Znaleziono {len(audio_files)} plikow audio")
-    print("\n" + "-" * 90)
-    print(f"{'NAZWA PLIKU':<40} {'TYP':<6} {'DLUGOSC [s]':<12} {'SAMPLE RATE':<12} {'ROZMIAR':<15}")
-    print("-" * 90)
+    else:
+        print(f"Znaleziono {len(audio_files)} plikow audio")
+    print("\n" + "-" * 99)
+    print(f"{'NAZWA PLIKU':<40} {'TYP':<6} {'DLUGOSC [s]':<12} {'SAMPLE RATE':<12} {'ROZMIAR':<15} {'LUFS':<8}")
+    print("-" * 99)
     
-    for audio_file in sorted(audio_files):
-        filename = audio_file.name  # Klucz - nazwa pliku z rozszerzeniem
-        
-        try:
-            file_size_bytes = audio_file.stat().st_size
-            file_type = AudioType.WAV if audio_file.suffix.upper() == ".WAV" else AudioType.MP3
-            
-            # Pobierz długość i sample rate w zależności od typu pliku
-            if file_type == AudioType.WAV:
-                # Użyj wbudowanej biblioteki wave dla plików WAV
-                with wave.open(str(audio_file), 'rb') as wav_file:
-                    frames = wav_file.getnframes()
-                    sr = wav_file.getframerate()
-                    duration = frames / float(sr)
-            else:
-                # Dla MP3 użyj soundfile (jeśli dostępny)
-                if SOUNDFILE_AVAILABLE:
-                    info = sf.info(str(audio_file))
-                    duration = info.duration
-                    sr = info.samplerate
-                else:
-                    # Fallback - oszacuj na podstawie rozmiaru pliku (128kbps średnio)
-                    duration = (file_size_bytes * 8) / (128000)  # przybliżone
-                    sr = 44100  # standardowe dla MP3
-                    print(f"  Uwaga: używam oszacowania dla {filename} (brak soundfile)")
-            
-            # Utwórz obiekt SoundInfo (Pydantic model)
-            sound_info = SoundInfo(
-                length=round(duration, 2),
-                sample_rate=int(sr),
-                size_bytes=file_size_bytes,
-                type=file_type,
-                path=str(audio_file),
-                status=AudioStatus.OK
-            )
-            
-            # Dodaj do globalnej bazy danych
-            sounds_database.add_sound(filename, sound_info)
-            
-            # Wyświetl wiersz tabeli z formatowanym rozmiarem
-            formatted_size = sound_info.get_formatted_size()
-            print(f"{filename:<40} {file_type.value:<6} {duration:<12.2f} {sr:<12} {formatted_size:<15}")
-            
-        except Exception as e:
-            # Utwórz obiekt SoundInfo dla błędu
-            file_type = AudioType.WAV if audio_file.suffix.upper() == ".WAV" else AudioType.MP3
-            error_info = SoundInfo(
-                length=None,
-                sample_rate=None,
-                size_bytes=None,
-                type=file_type,
-                path=str(audio_file),
-                status=AudioStatus.ERROR,
-                error=str(e)
-            )
-            
-            # Dodaj błędny plik do bazy danych
-            sounds_database.add_sound(filename, error_info)
-            print(f"{filename:<40} {file_type.value:<6} {'BLAD':<12} {'-':<12} {'-':<15}")
+    changes: Dict[str, Union[SoundRecord, None]]
+    changes, probed_files = lookup_or_probe_files(audio_files)
+    probed = len(probed_files)
+    for filename in probed_files:
+        print_sound_row(filename, changes[filename])
+        # Zmieniony plik musi zostać ponownie zdekodowany przez silnik audio
+        audio_engine.unload(changes[filename].path)
+
+    def apply_scan() -> List[str]:
+        # Pliki usunięte z katalogu
+        removed = [name for name in sounds_database.get_all_sounds() if name not in changes]
+        for filename in removed:
+            changes[filename] = None
+        apply_sound_changes(changes)
+        return removed
+
+    removed = call_in_loop(apply_scan)
+
+    sound_index.prune(str(f) for f in audio_files)
+    sound_index.save()
+    scan_seconds = time.perf_counter() - scan_start
+    scan_duration.observe(scan_seconds)
     
-    print("-" * 90)
+    print("-" * 99)
     
     # Pobierz statystyki z modelu Pydantic
     stats = sounds_database.get_stats()
     
     print(f"PODSUMOWANIE:")
+    print(f"   Odczytane pliki: {probed} nowych/zmienionych, {len(audio_files) - probed} z indeksu, {len(removed)} usunietych")
+    print(f"   Czas skanu: {scan_seconds * 1000:.0f} ms "
+          f"(rownolegle zadania: {SCAN_WORKERS}, pula: {SCAN_POOL})")
     print(f"   Laczna dlugosc: {stats['total_duration']:.2f} sekund ({stats['duration_minutes']:.1f} minut)")
     print(f"   Laczny rozmiar: {stats['total_size_formatted']} ({stats['total_size_bytes']} bajtow)")
     print(f"   Liczba plikow: {stats['total_files']} (WAV: {stats['wav_count']}, MP3: {stats['mp3_count']})")
@@ -194,23 +315,173 @@ def create_sounds_table():
     
     return sounds_database
 
-def play_audio_file(file_path: str, duration: float):
+def call_in_loop(func, *args):
+    """
+    Wywołuje func w pętli zdarzeń serwera i czeka na wynik (wywołanie z wątku w tle).
+    Bazę dźwięków zmienia wyłącznie pętla zdarzeń - wątki skanu, obserwatora katalogu
+    i synchronizacji workerów tylko odczytują pliki (indeks ma własną blokadę) i przekazują
+    zmiany pętli, więc baza i silnik wyboru nie są zmieniane równolegle.
+    """
+    loop = server_loop
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if loop is None or running is loop or loop.is_closed():
+        return func(*args)
+    future = concurrent.futures.Future()
+
+    def run():
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    loop.call_soon_threadsafe(run)
+    return future.result()
+
+def scan_changed_files(paths) -> Dict[str, Union[SoundRecord, None]]:
+    """
+    Odczytuje metadane wskazanych plików (np. zgłoszonych przez obserwatora katalogu).
+    Zwraca zmiany do naniesienia na bazę: nazwa pliku -> SoundRecord lub None (usunięty).
+    """
+    audio_files = [
+        Path(path) for path in sorted(paths)
+        if Path(path).parent == SOUNDS_DIR and is_audio_file(Path(path))
+    ]
+    changes: Dict[str, Union[SoundRecord, None]]
+    changes, _ = lookup_or_probe_files([f for f in audio_files if f.exists()])
+    for audio_file in audio_files:
+        if audio_file.name not in changes:
+            sound_index.remove(str(audio_file))
+            changes[audio_file.name] = None
+    sound_index.save()
+    return changes
+
+def on_sounds_directory_changed(paths):
+    """
+    Funkcja zwrotna obserwatora katalogu (wątek obserwatora).
+    Pliki są odczytywane w wątku obserwatora, a baza zmieniana w pętli zdarzeń serwera.
+    """
+    changes = scan_changed_files(paths)
+    if not changes:
+        return
+    for filename, sound_info in changes.items():
+        if sound_info is not None and sound_info.status == AudioStatus.OK:
+            try:
+                audio_engine.unload(sound_info.path)
+                audio_engine.load(sound_info.path, sound_info)
+            except Exception as e:
+                print(f"Silnik audio: nie udało się zdekodować {filename}: {e}")
+    server_loop.call_soon_threadsafe(apply_watched_changes, changes)
+
+def apply_watched_changes(changes: Dict[str, Union[SoundRecord, None]]):
+    """Nanosi zmiany wykryte przez obserwatora katalogu na bazę i silnik audio"""
+    for filename, sound_info in changes.items():
+        if sound_info is None:
+            current = sounds_database.get_sound(filename)
+            if current is not None:
+                audio_engine.unload(current.path)
+    changed = apply_sound_changes(changes)
+    if changed:
+        publish_library_change()
+        print(f"Obserwator katalogu: zaktualizowano {changed} plikow "
+              f"({', '.join(sorted(changes))})")
+
+def publish_library_change():
+    """
+    Zgłasza zmianę bazy pozostałym workerom (wspólny stan) - ich bazy nadrobią ją w tle -
+    oraz subskrybentom zdarzeń tego procesu
+    """
+    if playback_state.shared:
+        version = playback_state.publish_library_change()
+        # Zmiana innego procesu zgłoszona tuż przed tą nie jest jeszcze naniesiona - nadrobi ją library_sync_loop
+        if version == library_state["version"] + 1:
+            library_state["version"] = version
+    publish_library_event()
+
+def publish_library_event():
+    """Zdarzenie library-changed z nowym ETag /sounds/database (klient wie, czy pobrać bazę ponownie)"""
+    event_hub.publish("library-changed", total_files=sounds_database.total_files,
+                      valid_files=sounds_database.get_valid_sounds_count(), etag=database_etag())
+
+def scan_library_changes() -> Dict[str, Union[SoundRecord, None]]:
+    """
+    Zmiany biblioteki wprowadzone przez inny proces serwera (wątek w tle).
+    Indeks na dysku zapisał proces, który je wprowadził - otwierane są tylko pliki spoza indeksu.
+    """
+    sound_index.load()
+    paths = {str(audio_file) for audio_file in list_audio_files(SOUNDS_DIR)}
+    paths.update(record.path for record in list(sounds_database.get_all_sounds().values()))
+    return scan_changed_files(paths)
+
+async def library_sync_loop():
+    """
+    Nanosi na bazę tego procesu zmiany biblioteki zgłoszone przez inne workery (wspólna wersja biblioteki).
+    Pliki odczytywane są w wątku, baza zmieniana w pętli zdarzeń - jak przy obserwatorze katalogu.
+    """
+    while True:
+        await asyncio.sleep(LIBRARY_POLL_SECONDS)
+        version = playback_state.library_version
+        if not startup_state["sound_bank_loaded"] or version == library_state["version"]:
+            continue
+        try:
+            changes = await asyncio.to_thread(scan_library_changes)
+            for filename, sound_info in changes.items():
+                current = sounds_database.get_sound(filename)
+                if current is not None and current != sound_info:
+                    audio_engine.unload(current.path)
+            changed = apply_sound_changes(changes)
+            # Wersja razem ze zmianą bazy - ETag /sounds/database zgadza się z treścią
+            library_state["version"] = version
+            if changed:
+                print(f"Wspólny stan: biblioteka zmieniona w innym procesie - zaktualizowano {changed} plikow")
+                publish_library_event()
+                await asyncio.to_thread(audio_engine.preload, sounds_database, (str(STARTUP_SOUND),))
+        except Exception as e:
+            library_state["version"] = version
+            print(f"Wspólny stan: nie udało się odświeżyć bazy ({e})")
+
+# Obserwator katalogu z dźwiękami (włączany przez BARKING_DOG_WATCH)
+sounds_watcher = SoundsDirectoryWatcher(SOUNDS_DIR, on_sounds_directory_changed)
+
+async def insert_uploaded_sound(path: Path) -> Optional[SoundRecord]:
+    """
+    Wstawia przesłany plik do bazy bez pełnego skanu.
+    Metadane i dekodowanie do silnika audio w wątku, zmiana bazy w pętli zdarzeń.
+    """
+    def probe() -> Optional[SoundRecord]:
+        sound_info = scan_changed_files([str(path)]).get(path.name)
+        if sound_info is not None and sound_info.status == AudioStatus.OK:
+            audio_engine.unload(sound_info.path)
+            audio_engine.load(sound_info.path, sound_info)
+        return sound_info
+
+    sound_info = await asyncio.to_thread(probe)
+    if sound_info is not None and apply_sound_changes({path.name: sound_info}):
+        publish_library_change()
+    return sound_info
+
+# Zadania dodawania dźwięków przez API (pula optymalizacji tworzona przy pierwszym przesłaniu)
+upload_manager = UploadManager(SOUNDS_DIR, UPLOAD_DIR, insert_uploaded_sound)
+
+def play_audio_file(file_path: str, duration: float, playback_id: int = None):
     """
     Odtwarza plik audio w tle używając dostępnego systemu audio.
     Kompatybilny z Windows, Linux, macOS i Docker.
     Aktualizuje globalny stan odtwarzania (Pydantic model).
+    Z podanym numerem odtwarzania slot jest już zajęty przez wywołującego.
     """
     global playback_state
     
     try:
         # Ustaw stan odtwarzania używając metody Pydantic
-        playback_state.start_playback(Path(file_path).name, duration)
+        if playback_id is None:
+            playback_id = playback_state.start_playback(Path(file_path).name, duration)
         
         print(f"Rozpoczynam odtwarzanie: {playback_state.filename} (długość: {duration:.2f}s)")
         
-        # Wykryj platformę (lepsza detekcja kontenera)
-        is_container = os.path.exists('/.dockerenv') or os.environ.get('CONTAINER') == 'docker'
-        is_ios_docker = os.environ.get('PLATFORM_HINT') == 'ios' or (is_container and sys.platform.startswith('linux'))
+        is_ios_docker = IS_SIMULATED_PLATFORM
 
         # Wybór metody odtwarzania w zależności od dostępności
         audio_played = False
@@ -218,6 +489,7 @@ def play_audio_file(file_path: str, duration: float):
         # Próba 1: Windows winsound (najlepsze dla Windows)
         if WINSOUND_AVAILABLE and not audio_played:
             try:
+                winsound = optional_import("winsound")
                 winsound.PlaySound(str(file_path), winsound.SND_FILENAME | winsound.SND_ASYNC)
                 audio_played = True
                 print("Audio: używam winsound (Windows)")
@@ -225,7 +497,8 @@ def play_audio_file(file_path: str, duration: float):
                 print(f"winsound nie zadziałał: {e}")
         
         # Próba 2: pygame (multiplatformowy)
-        if PYGAME_AVAILABLE and not audio_played:
+        pygame = optional_import("pygame") if PYGAME_AVAILABLE else None
+        if pygame is not None and not audio_played:
             try:
                 forced_dummy = False
 
@@ -321,26 +594,217 @@ def play_audio_file(file_path: str, duration: float):
                 print("Audio: brak dostępnych odtwarzaczy - tylko symulacja")
                 print("       (aplikacja działa normalnie, ale bez fizycznego dźwięku)")
 
-        # Czekaj przez czas trwania pliku
-        time.sleep(duration)
+        # Czekaj przez czas trwania pliku (lub do przerwania przez /stop)
+        if wait_legacy_playback(playback_id, duration) and pygame is not None and pygame.mixer.get_init():
+            pygame.mixer.music.stop()
         
     except Exception as e:
         print(f"Błąd podczas odtwarzania pliku {file_path}: {e}")
     finally:
         # Wyczyść stan odtwarzania używając metody Pydantic
-        playback_state.stop_playback()
+        if playback_state.is_current(playback_id):
+            publish_playback_event("finished", playback_id, Path(file_path).name)
+        playback_state.stop_playback(playback_id)
 
-        if is_ios_docker:
+        if IS_SIMULATED_PLATFORM:
             print(f"🔇 Zakończono symulację odtwarzania (iOS/Docker)")
         else:
             print(f"Zakończono odtwarzanie")
 
-def start_audio_playback(file_path: str, duration: float):
+# Zadania asyncio śledzące odtwarzanie przez silnik audio (numer odtwarzania -> zadanie)
+playback_tasks: Dict[int, asyncio.Task] = {}
+
+# Przerwanie odtwarzania starą ścieżką (wątek play_audio_file)
+legacy_playback_stop = threading.Event()
+
+def wait_legacy_playback(playback_id: int, duration: float) -> bool:
+    """
+    Czeka przez czas trwania pliku (wątek play_audio_file). Zwraca True, gdy odtwarzanie przerwano -
+    przez /stop lub (wspólny stan) przez zwolnienie slotu w innym procesie.
+    """
+    if not playback_state.shared:
+        return legacy_playback_stop.wait(duration)
+    deadline = time.monotonic() + duration
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        if legacy_playback_stop.wait(min(remaining, PLAYBACK_POLL_SECONDS)):
+            return True
+        if not playback_state.is_current(playback_id):
+            return True
+
+async def wait_shared_playback(playback_id: int, play_seq: int):
+    """
+    Czeka na koniec odtwarzania, sprawdzając co PLAYBACK_POLL_SECONDS wspólny slot -
+    zwolniony przez inny proces (/stop, /warn/interrupt w innym workerze) przerywa dźwięk.
+    """
+    finished = asyncio.ensure_future(audio_engine.wait_finished(play_seq))
+    try:
+        while not finished.done():
+            await asyncio.wait((finished,), timeout=PLAYBACK_POLL_SECONDS)
+            if not finished.done() and not playback_state.is_current(playback_id):
+                if audio_engine.play_seq == play_seq:
+                    audio_engine.stop()
+                    print("Przerwano odtwarzanie (slot zwolniony w innym procesie)")
+                return
+    finally:
+        finished.cancel()
+
+async def track_playback(playback_id: int, play_seq: int):
+    """
+    Czeka na sygnał końca odtwarzania z wyjścia audio i od razu zwalnia slot.
+    Anulowanie zadania (/stop, /warn/interrupt) kończy śledzenie natychmiast.
+    """
+    try:
+        if playback_state.shared:
+            await wait_shared_playback(playback_id, play_seq)
+        else:
+            await audio_engine.wait_finished(play_seq)
+    finally:
+        playback_tasks.pop(playback_id, None)
+        finish_playback(playback_id)
+
+def spawn_playback_task(playback_id: int, play_seq: int) -> Optional[asyncio.Task]:
+    """Tworzy zadanie śledzące odtwarzanie w pętli zdarzeń serwera"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Wywołanie spoza pętli zdarzeń - zadanie tworzone w pętli serwera
+        if server_loop is not None:
+            server_loop.call_soon_threadsafe(spawn_playback_task, playback_id, play_seq)
+        return None
+    task = loop.create_task(track_playback(playback_id, play_seq))
+    playback_tasks[playback_id] = task
+    return task
+
+def finish_playback(playback_id: int):
+    """Czyści stan po zakończeniu odtwarzania (o ile nie zaczęło się już kolejne)"""
+    with playback_state.lock:
+        if not playback_state.is_current(playback_id):
+            return
+        filename = playback_state.filename
+        playback_state.stop_playback(playback_id)
+    publish_playback_event("finished", playback_id, filename)
+    print("Zakończono odtwarzanie")
+
+def stop_current_playback(reason: str = "stop") -> Optional[str]:
+    """
+    Przerywa bieżące odtwarzanie i od razu zwalnia slot.
+    Zwraca nazwę przerwanego pliku (None, gdy nic nie grało).
+    """
+    with playback_state.lock:
+        filename = playback_state.filename if is_audio_playing() else None
+        playback_id = playback_state.playback_id
+        audio_engine.stop()
+        legacy_playback_stop.set()
+        playback_state.stop_playback()
+    for task in list(playback_tasks.values()):
+        task.cancel()
+    if filename:
+        publish_playback_event("cancelled", playback_id, filename, reason=reason)
+        print(f"Przerwano odtwarzanie: {filename}")
+    return filename
+
+def publish_playback_event(event_type: str, playback_id: int, filename: Optional[str], **data: Any):
+    """
+    Zdarzenie odtwarzania dla subskrybentów: started, finished lub cancelled.
+    Początek i koniec danego odtwarzania zgłaszane są raz - także gdy koniec zauważą
+    jednocześnie ten proces i obserwacja wspólnego slotu.
+    """
+    key = "started" if event_type == "started" else "ended"
+    if playback_id <= playback_events[key]:
+        return
+    playback_events[key] = playback_id
+    event_hub.publish(event_type, playback_id=playback_id, filename=filename, **data)
+
+async def shared_playback_events():
     """
-    Uruchamia odtwarzanie audio w osobnym wątku.
+    Zdarzenia odtwarzania prowadzonego przez inne workery (wspólny slot), sprawdzane co
+    PLAYBACK_POLL_SECONDS, gdy ten proces ma subskrybentów. Slot zwolniony przed końcem
+    dźwięku oznacza przerwanie (/stop lub /warn/interrupt w innym workerze).
     """
-    thread = threading.Thread(target=play_audio_file, args=(file_path, duration), daemon=True)
+    foreign = None
+    while True:
+        await asyncio.sleep(PLAYBACK_POLL_SECONDS)
+        if not len(event_hub):
+            foreign = None
+            continue
+        with playback_state.lock:
+            playback_id, owner = playback_state.playback_id, playback_state.owner_pid
+            filename, duration, end_time = playback_state.filename, playback_state.duration, playback_state.end_time
+        now = time.time()
+        playing = owner is not None and not (end_time and now > end_time)
+        if foreign is not None and not (playing and playback_id == foreign[0]):
+            ended = "finished" if now >= foreign[2] - 2 * PLAYBACK_POLL_SECONDS else "cancelled"
+            publish_playback_event(ended, foreign[0], foreign[1])
+            foreign = None
+        if playing and owner != os.getpid() and foreign is None:
+            publish_playback_event("started", playback_id, filename, duration=duration,
+                                   estimated_end_time=end_time, owner_pid=owner)
+            foreign = (playback_id, filename, end_time or now)
+
+def start_audio_playback(file_path: str, duration: float, requested_at: float = None,
+                         playback_id: int = None):
+    """
+    Uruchamia odtwarzanie audio.
+    Preferuje silnik audio (bufor z pamięci); gdy jest niedostępny,
+    odtwarza plik starą ścieżką w osobnym wątku.
+    Zwraca opóźnienie od żądania do pierwszej ramki w ms (tylko silnik audio).
+
+    Koniec odtwarzania przez silnik śledzi zadanie asyncio (playback_tasks),
+    które zwalnia slot po sygnale końca z wyjścia audio.
+    Podany playback_id oznacza slot zajęty już przez wywołującego (np. PlaybackState.try_claim).
+    """
+    if playback_id is None:
+        playback_id = playback_state.start_playback(Path(file_path).name, duration)
+    if audio_engine.is_ready:
+        latency_ms = audio_engine.play(str(file_path), requested_at)
+        if latency_ms is not None:
+            if requested_at is not None:
+                playback_start_latency.observe(latency_ms / 1000.0)
+            print(f"Rozpoczynam odtwarzanie: {playback_state.filename} "
+                  f"(długość: {duration:.2f}s, opóźnienie: {latency_ms:.1f} ms)")
+            spawn_playback_task(playback_id, audio_engine.play_seq)
+            publish_playback_event("started", playback_id, Path(file_path).name, duration=duration,
+                                   estimated_end_time=playback_state.end_time, latency_ms=round(latency_ms, 2))
+            return latency_ms
+
+    publish_playback_event("started", playback_id, Path(file_path).name, duration=duration,
+                           estimated_end_time=playback_state.end_time)
+    legacy_playback_stop.clear()
+    thread = threading.Thread(target=play_audio_file, args=(file_path, duration, playback_id), daemon=True)
     thread.start()
+    return None
+
+def claim_queued(item):
+    """Zajmuje slot odtwarzania dla wpisu kolejki (pod blokadą stanu odtwarzania)"""
+    item.playback_id = playback_state.start_playback(item.filename, item.duration)
+
+def play_queued(item):
+    """Uruchamia odtwarzanie wpisu kolejki w zajętym już slocie (po zwolnieniu blokady)"""
+    item.latency_ms = start_audio_playback(item.info.path, item.duration, item.requested_at,
+                                           playback_id=item.playback_id)
+    item.done = playback_tasks.get(item.playback_id)
+
+def finish_queued(item):
+    """Kończy odtwarzanie wpisu kolejki"""
+    finish_playback(item.playback_id)
+
+def playback_remaining_time() -> float:
+    """Czas do końca bieżącego odtwarzania w sekundach (0 gdy nic nie gra)"""
+    return playback_state.get_remaining_time() or 0.0
+
+# Kolejka odtwarzania z jednym zadaniem roboczym (tryb BARKING_DOG_PLAYBACK_MODE=queue)
+playback_queue = PlaybackQueue(play_queued, finish_queued, playback_remaining_time,
+                               lock=playback_state.lock, claim=claim_queued,
+                               is_current=lambda item: playback_state.is_current(item.playback_id))
+
+# Limit żądań /warn per klient (BARKING_DOG_RATE_LIMIT / BARKING_DOG_RATE_BURST)
+warn_limiter = TokenBucketLimiter()
+
+# Liczniki odpowiedzi /warn według statusu (PLAYING, BUSY, RATE_LIMITED, ...)
+warn_counters: Counter = Counter()
 
 def is_audio_playing() -> bool:
     """
@@ -354,7 +818,7 @@ def system_start():
     """
     Funkcja wywoływana przy starcie aplikacji FastAPI
     """
-    sound = Path(__file__).parent / "sounds" / "helpers" / "start.wav"
+    sound = STARTUP_SOUND
     if sound.exists():
         try:
             # Oblicz długość pliku WAV
@@ -372,46 +836,256 @@ def system_start():
     else:
         print(f"Plik startowy nie istnieje: {sound}")
 
-app = FastAPI(title="Barking's Dog API", version="1.0.0")
+def load_sound_bank():
+    """
+    Tworzy bazę danych dźwięków, otwiera urządzenie audio i ładuje dźwięki do pamięci.
+    Funkcja blokująca - uruchamiana w wątku w tle przy starcie.
+    """
+    global sounds_database
+    # Wersja biblioteki sprzed skanu - zmiany zgłoszone w trakcie skanu nadrobi library_sync_loop
+    library_version = playback_state.library_version if playback_state.shared else 0
+    with startup_profile.phase("skan biblioteki"):
+        sounds_database = create_sounds_table()
+    if playback_state.shared:
+        library_state["version"] = library_version
+        if not playback_state.created:
+            # Kolejny worker - jego skan mógł zobaczyć zmiany, o których pozostałe procesy nie wiedzą
+            publish_library_change()
+        print(f"Stan odtwarzania: wspólny dla procesów ({STATE_FILE}, "
+              f"procesy: {len(playback_state.describe()['processes'])})")
+    with startup_profile.phase("otwarcie wyjścia audio"):
+        started = audio_engine.start()
+    if started:
+        with startup_profile.phase("wczytanie dźwięków do pamięci"):
+            audio_engine.preload(sounds_database, keep=(str(STARTUP_SOUND),))
+
+async def startup_sequence():
+    """
+    Sekwencja startowa w tle: skan biblioteki, potem (po opóźnieniu) dźwięk startowy.
+    Serwer przyjmuje połączenia od razu, bez czekania na jej zakończenie.
+    """
+    try:
+        await asyncio.to_thread(load_sound_bank)
+        startup_state["sound_bank_loaded"] = True
+        startup_state["sound_bank_loaded_at"] = time.time()
+        print(f"Baza dźwięków gotowa po {time.time() - startup_state['started_at']:.2f}s")
+        startup_profile.report()
+        if WATCH_SOUNDS_DIR:
+            sounds_watcher.start()
 
-# Tworzenie globalnej bazy danych dźwięków przy starcie
-sounds_database = create_sounds_table()
-# Uruchom dźwięk startowy systemu
-sleep(15)
-system_start()
+        if playback_state.shared and not playback_state.created:
+            print("System start: dźwięk startowy odtwarza pierwszy proces serwera")
+            return
+        if STARTUP_DELAY > 0:
+            print(f"System start: dźwięk startowy za {STARTUP_DELAY:.1f}s")
+            await asyncio.sleep(STARTUP_DELAY)
+        system_start()
+        startup_state["startup_sound_played"] = True
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        startup_state["error"] = str(e)
+        print(f"BLAD podczas startu aplikacji: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Cykl życia aplikacji - sekwencja startowa działa jako zadanie w tle
+    """
+    global server_loop
+    server_loop = asyncio.get_running_loop()
+    startup_profile.mark("przygotowanie aplikacji i serwera")
+    playback_queue.start()
+    startup_task = asyncio.create_task(startup_sequence())
+    sync_task = asyncio.create_task(library_sync_loop()) if playback_state.shared else None
+    events_task = asyncio.create_task(shared_playback_events()) if playback_state.shared else None
+    yield
+    for task in (startup_task, sync_task, events_task):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    await playback_queue.stop()
+    await upload_manager.shutdown()
+    sounds_watcher.stop()
+    if playback_state.shared:
+        playback_state.detach()
+
+app = FastAPI(title="Barking's Dog API", version="1.0.0", lifespan=lifespan)
+app.add_middleware(RequestMetricsMiddleware, histogram=http_request_duration, counter=http_requests_total)
+
+# Metryki odczytywane przy każdym odczycie /metrics (bez kosztu w ścieżce /warn)
+metrics.counter("barking_dog_warn_responses_total", "Odpowiedzi /warn według statusu (PLAYING, BUSY, ERROR, ...)",
+                ("status",), read=lambda: {(status,): count for status, count in warn_counters.items()})
+metrics.gauge("barking_dog_library_files", "Liczba plików w bibliotece", ("state",),
+              read=lambda: {("total",): sounds_database.total_files,
+                            ("valid",): sounds_database.get_valid_sounds_count()})
+metrics.gauge("barking_dog_library_duration_seconds", "Łączna długość poprawnych dźwięków",
+              read=lambda: {(): sounds_database.total_duration})
+metrics.gauge("barking_dog_library_size_bytes", "Łączny rozmiar poprawnych dźwięków",
+              read=lambda: {(): sounds_database.total_size_bytes})
+metrics.gauge("barking_dog_sound_bank_loaded", "1 gdy baza dźwięków jest załadowana",
+              read=lambda: {(): int(startup_state["sound_bank_loaded"])})
+metrics.gauge("barking_dog_playback_active", "1 gdy odtwarzany jest dźwięk",
+              read=lambda: {(): int(is_audio_playing())})
+metrics.gauge("barking_dog_playback_remaining_seconds", "Czas do końca bieżącego odtwarzania",
+              read=lambda: {(): playback_remaining_time()})
+metrics.gauge("barking_dog_playback_queue_length", "Liczba dźwięków oczekujących w kolejce",
+              read=lambda: {(): len(playback_queue)})
+metrics.gauge("barking_dog_upload_jobs_active", "Liczba zadań dodawania dźwięków w toku",
+              read=lambda: {(): sum(job.active for job in upload_manager.jobs.values())})
+metrics.gauge("barking_dog_event_subscribers", "Liczba klientów /events i /events/ws",
+              read=lambda: {(): len(event_hub)})
+metrics.counter("barking_dog_events_dropped_total", "Zdarzenia odrzucone z pełnych buforów subskrybentów",
+                read=lambda: {(): event_hub.dropped})
+metrics.gauge("barking_dog_audio_engine_buffer_bytes", "Pamięć zajęta przez zdekodowane dźwięki",
+              read=lambda: {(): audio_engine.get_memory_bytes()})
 
 @app.get("/")
 async def read_root():
     return {"message": "Barking's Dog API!"}
 
-@app.get("/sounds/refresh", response_model=RefreshResponse)
-async def refresh_sounds_table():
+@app.get("/ready", response_model=ReadinessResponse)
+async def readiness(response: Response):
+    """
+    Endpoint gotowości - 200 gdy baza dźwięków jest załadowana, 503 w trakcie startu
+    """
+    ready = startup_state["sound_bank_loaded"]
+    response.status_code = 200 if ready else 503
+    return ReadinessResponse(
+        ready=ready,
+        sound_bank_loaded=ready,
+        startup_sound_played=startup_state["startup_sound_played"],
+        uptime=round(time.time() - startup_state["started_at"], 3),
+        loaded_in=(round(startup_state["sound_bank_loaded_at"] - startup_state["started_at"], 3)
+                   if startup_state["sound_bank_loaded_at"] else None),
+        total_files=sounds_database.total_files,
+        error=startup_state["error"]
+    )
+
+def serialized_sounds() -> bytes:
+    """JSON wszystkich wpisów bazy (pola SoundInfo) - serializowany raz na wersję bazy, bez budowania modeli"""
+    return sounds_database.cached("sounds_json", lambda: pydantic_core.to_json(
+        {filename: record.to_dict() for filename, record in sounds_database.get_all_sounds().items()}))
+
+def database_etag() -> str:
     """
-    Endpoint do odświeżenia globalnej bazy danych dźwięków czasowo
+    Silny ETag odpowiedzi /sounds/database: instancja bazy, wersja i ostatnio wylosowany dźwięk.
+    Przy wspólnym stanie - epoka bloku i naniesiona wersja biblioteki (ten sam ETag w każdym workerze).
     """
+    last = zlib.crc32((sounds_database.last_random_sound or "").encode())
+    if playback_state.shared:
+        return f'"{playback_state.epoch}-{library_state["version"]}-{last:x}"'
+    return f'"{sounds_database.epoch}-{sounds_database.version}-{last:x}"'
+
+def json_bytes(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# Jedno odświeżenie biblioteki naraz (kolejne żądania czekają na jego koniec)
+refresh_lock = asyncio.Lock()
+
+def refresh_sound_bank():
+    """Pełny skan biblioteki i wczytanie zmienionych dźwięków do pamięci (wątek w tle)"""
     global sounds_database
     sounds_database = create_sounds_table()
+    audio_engine.preload(sounds_database, keep=(str(STARTUP_SOUND),))
+
+@app.get("/sounds/refresh", response_model=Union[RefreshResponse, ErrorResponse])
+async def refresh_sounds_table(response: Response):
+    """
+    Endpoint do odświeżenia globalnej bazy danych dźwięków czasowo.
+    Skan, pomiar głośności i dekodowanie działają w wątku - serwer obsługuje w tym czasie
+    inne żądania. W trakcie startu (baza jeszcze ładowana) zwraca 503, jak /ready.
+    """
+    if not startup_state["sound_bank_loaded"]:
+        response.status_code = 503
+        response.headers["Retry-After"] = "1"
+        return ErrorResponse(error="Baza dźwięków jest jeszcze ładowana - sprawdź /ready")
+    async with refresh_lock:
+        version = sounds_database.version
+        await asyncio.to_thread(refresh_sound_bank)
+        if sounds_database.version != version:
+            publish_library_change()
     stats = sounds_database.get_stats()
     
-    return RefreshResponse(
-        message="Globalna baza dzwiekow zostala odswiezona",
-        liczba_plikow=stats["total_files"],
-        sounds_database=sounds_database.get_all_sounds(),
-        stats=stats
-    )
+    body = b"".join((
+        b'{"message":', json_bytes("Globalna baza dzwiekow zostala odswiezona"),
+        b',"liczba_plikow":', json_bytes(stats["total_files"]),
+        b',"sounds_database":', serialized_sounds(),
+        b',"stats":', json_bytes(stats), b"}"
+    ))
+    return Response(content=body, media_type="application/json")
 
 @app.get("/sounds/database", response_model=SoundsDatabaseResponse)
-async def get_sounds_database():
+async def get_sounds_database(request: Request):
     """
-    Endpoint zwracający całą globalną bazę danych dźwięków
+    Endpoint zwracający całą globalną bazę danych dźwięków.
+    Wpisy serializowane są raz na wersję bazy; niezmieniona baza -> 304 dla If-None-Match.
     """
+    etag = database_etag()
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
     stats = sounds_database.get_stats()
-    
-    return SoundsDatabaseResponse(
-        sounds_database=sounds_database.get_all_sounds(),
-        liczba_plikow=stats["total_files"],
-        stats=stats
-    )
+    body = b"".join((
+        b'{"sounds_database":', serialized_sounds(),
+        b',"liczba_plikow":', json_bytes(stats["total_files"]),
+        b',"stats":', json_bytes(stats), b"}"
+    ))
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+@app.post("/sounds", status_code=202, response_model=Union[UploadJobResponse, ErrorResponse])
+async def upload_sound(request: Request, response: Response, filename: str, optimize: bool = True):
+    """
+    Endpoint dodający dźwięk - treść żądania to plik .wav/.mp3 (zapisywany na dysk fragmentami).
+    Dostrojenie do wzorca i normalizacja (optimize.py) działają w tle, wynik trafia do bazy
+    bez pełnego skanu. Odpowiedź 202 z numerem zadania - postęp: GET /sounds/jobs/{job_id}.
+    ?optimize=false dodaje plik bez zmian.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > upload_manager.max_bytes:
+        response.status_code = 413
+        return ErrorResponse(error=f"Plik większy niż {upload_manager.max_bytes} bajtów")
+    try:
+        job = upload_manager.create_job(filename, optimize)
+    except FileExistsError as e:
+        response.status_code = 409
+        return ErrorResponse(error=str(e))
+    except ValueError as e:
+        response.status_code = 400
+        return ErrorResponse(error=str(e))
+
+    try:
+        await upload_manager.receive(job, request.stream())
+    except UploadTooLarge as e:
+        response.status_code = 413
+        return ErrorResponse(error=str(e))
+    except ValueError as e:
+        response.status_code = 400
+        return ErrorResponse(error=str(e))
+
+    upload_manager.submit(job)
+    response.headers["Location"] = f"/sounds/jobs/{job.id}"
+    return UploadJobResponse(**job.describe())
+
+@app.get("/sounds/jobs")
+async def get_upload_jobs():
+    """
+    Endpoint zwracający zadania dodawania dźwięków (najnowsze pierwsze) i konfigurację przesyłania
+    """
+    return upload_manager.describe()
+
+@app.get("/sounds/jobs/{job_id}", response_model=Union[UploadJobResponse, ErrorResponse])
+async def get_upload_job(job_id: int, response: Response):
+    """
+    Endpoint zwracający stan i postęp zadania dodawania dźwięku
+    """
+    job = upload_manager.jobs.get(job_id)
+    if job is None:
+        response.status_code = 404
+        return ErrorResponse(error=f"Zadanie {job_id} nie istnieje")
+    return UploadJobResponse(**job.describe())
 
 @app.get("/sounds/{filename}", response_model=Union[SoundResponse, ErrorResponse])
 async def get_sound_info(filename: str):
@@ -423,7 +1097,7 @@ async def get_sound_info(filename: str):
     if sound_info:
         return SoundResponse(
             filename=filename,
-            info=sound_info
+            info=sound_info.to_model()
         )
     else:
         return ErrorResponse(
@@ -431,6 +1105,24 @@ async def get_sound_info(filename: str):
             available_files=list(sounds_database.get_all_sounds().keys())
         )
 
+@app.api_route("/sounds/{filename}/stream", methods=["GET", "HEAD"])
+async def stream_sound(filename: str, request: Request, response: Response):
+    """
+    Endpoint zwracający sam plik dźwiękowy (Range, ETag/Last-Modified, 304).
+    Udostępniane są wyłącznie pliki z bazy dźwięków leżące w katalogu SOUNDS_DIR.
+    """
+    sound_info = sounds_database.get_sound(filename)
+    path = Path(sound_info.path).resolve() if sound_info else None
+    if path is None or path.parent != SOUNDS_DIR.resolve() or path.name != filename:
+        response.status_code = 404
+        return ErrorResponse(error=f"Plik {filename} nie zostal znaleziony w bazie danych")
+
+    try:
+        return stream_sound_file(str(path), request.headers, send_body=request.method != "HEAD")
+    except OSError as e:
+        response.status_code = 404
+        return ErrorResponse(error=f"Nie mozna odczytac pliku {filename}: {e.strerror}")
+
 @app.get("/sounds/random/get", response_model=Union[RandomSoundResponse, RandomSoundErrorResponse])
 async def get_random_sound():
     """
@@ -445,7 +1137,7 @@ async def get_random_sound():
         
         return RandomSoundResponse(
             filename=filename,
-            info=sound_info,
+            info=sound_info.to_model(),
             previous_sound=previous_sound,
             total_available=stats["valid_sounds_count"]
         )
@@ -468,47 +1160,545 @@ async def reset_random_history():
         "last_random_sound": None
     }
 
+@app.get("/sounds/selection/mode")
+async def get_selection_mode():
+    """
+    Endpoint zwracający tryb i stan silnika wyboru dźwięków
+    """
+    return sounds_database.get_selector().describe()
+
+@app.post("/sounds/selection/mode")
+async def set_selection_mode(config: SelectionConfigRequest, response: Response):
+    """
+    Endpoint zmieniający tryb wyboru dźwięków (random, window, shuffle, weighted).
+    Odrzucona konfiguracja - 400 (tryb wyboru bez zmian).
+    """
+    try:
+        sounds_database.configure_selection(mode=config.mode, window=config.window, weights=config.weights)
+    except ValueError as e:
+        response.status_code = 400
+        return ErrorResponse(error=str(e))
+    return sounds_database.get_selector().describe()
+
+# Odpowiedź odrzuconego żądania budowana raz - odrzucenie nie serializuje modeli
+RATE_LIMITED_BODY = b'{"status":"RATE_LIMITED","error":"Zbyt wiele zadan /warn - sprobuj ponownie pozniej"}'
+
+def rate_limited_response(retry_after: float) -> Response:
+    """Tania odpowiedź 429 z nagłówkiem Retry-After (pełne sekundy)"""
+    return Response(
+        content=RATE_LIMITED_BODY,
+        status_code=429,
+        media_type="application/json",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
 @app.get("/warn")
-async def warn_endpoint():
+async def warn_endpoint(request: Request, response: Response, queue: Optional[bool] = None,
+                        priority: int = 0, trigger: Optional[str] = None):
     """
     Endpoint ostrzegawczy - losuje i odtwarza dźwięk jeśli żaden nie jest aktualnie odtwarzany.
-    Jeśli dźwięk jest już odtwarzany, zwraca status BUSY.
+    Jeśli dźwięk jest już odtwarzany, zwraca status BUSY (z nagłówkiem Retry-After).
+
+    W trybie kolejki (BARKING_DOG_PLAYBACK_MODE=queue lub ?queue=true) dźwięk trafia do
+    kolejki priorytetowej (?priority=N, wyższy wcześniej). Powtórzone wyzwolenie z tego
+    samego źródła (?trigger=..., domyślnie adres klienta) w oknie scalania zwraca COALESCED.
+
+    Klient przekraczający limit żądań dostaje 429 RATE_LIMITED z nagłówkiem Retry-After.
     """
-    # Sprawdź czy aktualnie odtwarzamy dźwięk używając Pydantic model
-    if is_audio_playing():
-        return WarnResponse(
-            status="BUSY",
-            filename=playback_state.filename,
-            info=None,
-            message=f"Aktualnie odtwarzany jest plik: {playback_state.filename}. Spróbuj ponownie za chwilę.",
-            estimated_end_time=playback_state.end_time
-        )
-    
-    # Jeśli nic nie odtwarzamy, wylosuj nowy dźwięk
-    random_result = sounds_database.get_random_sound()
-    
-    if not random_result:
-        # Brak dostępnych dźwięków
-        stats = sounds_database.get_stats()
+    requested_at = time.perf_counter()
+    client = request.client.host if request.client else "default"
+
+    allowed, retry_after = warn_limiter.acquire(client)
+    if not allowed:
+        warn_counters["RATE_LIMITED"] += 1
+        return rate_limited_response(retry_after)
+
+    result = handle_warn(client, response, queue, priority, trigger, requested_at)
+    warn_counters[result.status] += 1
+    return result
+
+def handle_warn(client: str, response: Response, queue: Optional[bool], priority: int,
+                trigger: Optional[str], requested_at: float):
+    """Obsługa /warn po przejściu limitu żądań"""
+    # Baza dźwięków jest jeszcze ładowana w tle
+    if not startup_state["sound_bank_loaded"]:
         return WarnErrorResponse(
             status="ERROR",
-            error="Brak dostępnych dźwięków do odtworzenia",
-            total_files=stats["total_files"],
-            valid_files=stats["valid_sounds_count"]
+            error="Baza dźwięków jest jeszcze ładowana - sprawdź /ready",
+            total_files=sounds_database.total_files,
+            valid_files=0
         )
-    
+
+    if queue if queue is not None else PLAYBACK_MODE == "queue":
+        return enqueue_warning(trigger or client, priority, requested_at)
+
+    # Sprawdzenie slotu, losowanie i zajęcie slotu jako jedna operacja (try_claim) -
+    # równoległe żądania nie uruchomią dwóch dźwięków naraz
+    with playback_state.lock:
+        claimed = playback_state.try_claim(pick_warning)
+        if claimed is None:
+            remaining = playback_state.get_remaining_time() or 0.0
+            response.headers["Retry-After"] = str(max(1, math.ceil(remaining)))
+            return WarnResponse(
+                status="BUSY",
+                filename=playback_state.filename,
+                info=None,
+                message=f"Aktualnie odtwarzany jest plik: {playback_state.filename}. Spróbuj ponownie za chwilę.",
+                estimated_end_time=playback_state.end_time
+            )
+
+    playback_id, picked = claimed
+    if picked is None:
+        return no_sounds_error()
+    filename, _, sound_info = picked
+    return play_warning(filename, sound_info, requested_at, playback_id)
+
+def pick_warning():
+    """Losuje dźwięk dla /warn (wywoływane przez try_claim przy wolnym slocie): (nazwa, długość, rekord)"""
+    random_result = sounds_database.get_random_sound()
+    if not random_result:
+        return None
     filename, sound_info = random_result
-    
-    # Uruchom rzeczywiste odtwarzanie w tle
-    start_audio_playback(sound_info.path, sound_info.length)
+    return filename, sound_info.length, sound_info
+
+def play_warning(filename: str, sound_info: SoundRecord, requested_at: float, playback_id: int,
+                 interrupted: Optional[str] = None) -> WarnResponse:
+    """Uruchamia odtwarzanie w zajętym już slocie i buduje odpowiedź PLAYING"""
+    # Uruchom rzeczywiste odtwarzanie (bufor z pamięci lub w tle)
+    latency_ms = start_audio_playback(sound_info.path, sound_info.length, requested_at, playback_id=playback_id)
     
     print(f"Rozpoczynam odtwarzanie: {filename} (długość: {sound_info.length:.2f}s)")
     
+    message = f"Rozpoczynam odtwarzanie pliku: {filename} (długość: {sound_info.length:.2f}s)"
+    if interrupted:
+        message = f"Przerwano {interrupted}. " + message
     return WarnResponse(
         status="PLAYING",
         filename=filename,
-        info=sound_info,
-        message=f"Rozpoczynam odtwarzanie pliku: {filename} (długość: {sound_info.length:.2f}s)",
-        estimated_end_time=time.time() + sound_info.length
+        info=sound_info.to_model(),
+        message=message,
+        estimated_end_time=time.time() + sound_info.length,
+        latency_ms=round(latency_ms, 2) if latency_ms is not None else None,
+        interrupted=interrupted
     )
 
+@app.api_route("/warn/interrupt", methods=["GET", "POST"])
+async def warn_interrupt_endpoint(request: Request):
+    """
+    Endpoint "przerwij i odtwórz teraz" - przerywa bieżący dźwięk (bez czekania na jego koniec)
+    i od razu odtwarza nowy, wylosowany dźwięk. Kolejka odtwarzania nie jest czyszczona.
+
+    Podlega temu samemu limitowi żądań co /warn.
+    """
+    requested_at = time.perf_counter()
+    client = request.client.host if request.client else "default"
+
+    allowed, retry_after = warn_limiter.acquire(client)
+    if not allowed:
+        warn_counters["RATE_LIMITED"] += 1
+        return rate_limited_response(retry_after)
+
+    if not startup_state["sound_bank_loaded"]:
+        result = WarnErrorResponse(
+            status="ERROR",
+            error="Baza dźwięków jest jeszcze ładowana - sprawdź /ready",
+            total_files=sounds_database.total_files,
+            valid_files=0
+        )
+    else:
+        with playback_state.lock:
+            random_result = sounds_database.get_random_sound()
+            if random_result:
+                interrupted = stop_current_playback(reason="interrupt")
+                filename, sound_info = random_result
+                playback_id = playback_state.start_playback(filename, sound_info.length)
+        result = (play_warning(filename, sound_info, requested_at, playback_id, interrupted)
+                  if random_result else no_sounds_error())
+    warn_counters[result.status] += 1
+    return result
+
+@app.post("/warn/sequence", response_model=Union[SequenceResponse, WarnErrorResponse])
+async def warn_sequence_endpoint(pattern: SequenceRequest, request: Request, response: Response):
+    """
+    Endpoint odtwarzający sekwencję szczeknięć (np. "zły pies": kilka szczeknięć z krótkimi przerwami)
+    jako jeden dźwięk - bufor PCM sklejany w pamięci, odtwarzany bez przerw między szczeknięciami.
+
+    Wzorzec: kroki (nazwa pliku lub dźwięk losowy, powtórzenia, przerwa), powtórzenia całości,
+    losowe odchylenie przerw (jitter_ms) i seed dla powtarzalnego losowania. Ujemna przerwa
+    nakłada szczeknięcia z przenikaniem. Wyrenderowane sekwencje są zapamiętywane.
+
+    Jak /warn: gdy coś jest odtwarzane - BUSY (z Retry-After); podlega limitowi żądań.
+    """
+    requested_at = time.perf_counter()
+    client = request.client.host if request.client else "default"
+
+    allowed, retry_after = warn_limiter.acquire(client)
+    if not allowed:
+        warn_counters["RATE_LIMITED"] += 1
+        return rate_limited_response(retry_after)
+
+    result = play_sequence(pattern, response, requested_at)
+    warn_counters[result.status] += 1
+    return result
+
+def sequence_error(error: str) -> WarnErrorResponse:
+    """Odpowiedź /warn/sequence, gdy sekwencji nie da się odtworzyć"""
+    return WarnErrorResponse(
+        status="ERROR",
+        error=error,
+        total_files=sounds_database.total_files,
+        valid_files=sounds_database.get_valid_sounds_count()
+    )
+
+def valid_sound_names() -> List[str]:
+    """Posortowane nazwy poprawnych dźwięków (losowanie z seed) - raz na wersję bazy"""
+    return sounds_database.cached("valid_names", lambda: sorted(
+        filename for filename, record in sounds_database.get_all_sounds().items()
+        if record.status == AudioStatus.OK))
+
+def play_sequence(pattern: SequenceRequest, response: Response, requested_at: float):
+    """Obsługa /warn/sequence po przejściu limitu żądań"""
+    if not startup_state["sound_bank_loaded"]:
+        return sequence_error("Baza dźwięków jest jeszcze ładowana - sprawdź /ready")
+    if not audio_engine.is_ready:
+        return sequence_error("Sekwencje wymagają silnika audio (numpy i otwarte wyjście audio)")
+
+    # Z seed - losowanie dźwięków i odchyleń powtarzalne (ta sama sekwencja z pamięci podręcznej)
+    rng = random.Random(pattern.seed) if pattern.seed is not None else random.Random()
+    try:
+        barks = expand_pattern(pattern, rng)
+    except SequenceError as e:
+        return sequence_error(str(e))
+
+    def choose():
+        """Dźwięki sekwencji i jej długość (przy wolnym slocie): (etykieta, długość, nazwy, rekordy, przerwy)"""
+        records = []
+        for sound, _ in barks:
+            if sound is None and pattern.seed is not None:
+                names = valid_sound_names()
+                if not names:
+                    raise SequenceError("Brak dostępnych dźwięków do odtworzenia")
+                sound = names[rng.randrange(len(names))]
+                picked = (sound, sounds_database.get_sound(sound))
+            elif sound is None:
+                # Bez seed - silnik wyboru (tryb i historia jak w /warn)
+                picked = sounds_database.get_random_sound()
+                if picked is None:
+                    raise SequenceError("Brak dostępnych dźwięków do odtworzenia")
+            else:
+                record = sounds_database.get_sound(sound)
+                if record is None or record.status != AudioStatus.OK:
+                    raise SequenceError(f"Nieznany lub uszkodzony dźwięk: {sound}")
+                picked = (sound, record)
+            records.append(picked)
+
+        gaps = gaps_to_frames([gap for _, gap in barks[:-1]], audio_engine.sample_rate)
+        duration = sum(record.length or 0.0 for _, record in records) + sum(gaps) / audio_engine.sample_rate
+        if duration > SEQUENCE_MAX_SECONDS:
+            raise SequenceError(f"Sekwencja trwałaby {duration:.1f}s - limit to {SEQUENCE_MAX_SECONDS:.0f}s")
+        filenames = [filename for filename, _ in records]
+        label = f"sekwencja: {filenames[0]} (+{len(filenames) - 1})"
+        return label, max(duration, 0.0), filenames, records, gaps
+
+    with playback_state.lock:
+        try:
+            claimed = playback_state.try_claim(choose)
+        except SequenceError as e:
+            return sequence_error(str(e))
+        if claimed is None:
+            remaining = playback_state.get_remaining_time() or 0.0
+            response.headers["Retry-After"] = str(max(1, math.ceil(remaining)))
+            return SequenceResponse(
+                status="BUSY",
+                message=f"Aktualnie odtwarzany jest plik: {playback_state.filename}. Spróbuj ponownie za chwilę.",
+                estimated_end_time=playback_state.end_time
+            )
+    playback_id, (label, duration, filenames, records, gaps) = claimed
+
+    played = audio_engine.play_sequence([record.path for _, record in records], gaps, requested_at)
+    if played is None:
+        finish_playback(playback_id)
+        return sequence_error("Nie udało się przygotować sekwencji")
+    duration = played["frames"] / float(audio_engine.sample_rate)
+    playback_start_latency.observe(played["latency_ms"] / 1000.0)
+    spawn_playback_task(playback_id, audio_engine.play_seq)
+    publish_playback_event("started", playback_id, label, duration=duration,
+                           estimated_end_time=playback_state.end_time,
+                           latency_ms=round(played["latency_ms"], 2), sequence=filenames)
+    source = "z pamięci podręcznej" if played["cached"] else f"render {played['render_ms']:.1f} ms"
+    print(f"Rozpoczynam odtwarzanie sekwencji: {len(filenames)} szczeknięć (długość: {duration:.2f}s, "
+          f"{source}, opóźnienie: {played['latency_ms']:.1f} ms)")
+    return SequenceResponse(
+        status="PLAYING",
+        filenames=filenames,
+        message=f"Rozpoczynam odtwarzanie sekwencji: {len(filenames)} szczeknięć (długość: {duration:.2f}s)",
+        duration=round(duration, 4),
+        estimated_end_time=time.time() + duration,
+        latency_ms=round(played["latency_ms"], 2),
+        render_ms=round(played["render_ms"], 2),
+        cached=played["cached"]
+    )
+
+@app.api_route("/stop", methods=["GET", "POST"], response_model=StopResponse)
+async def stop_endpoint(clear_queue: bool = True):
+    """
+    Endpoint przerywający bieżące odtwarzanie - slot zwalniany jest od razu,
+    kolejne /warn może zacząć odtwarzanie bez czekania.
+    Domyślnie usuwa też oczekujące wpisy kolejki (?clear_queue=false je zachowuje).
+    """
+    cleared = playback_queue.clear() if clear_queue else 0
+    filename = stop_current_playback()
+    if filename:
+        message = f"Przerwano odtwarzanie pliku: {filename}"
+    else:
+        message = "Nic nie było odtwarzane"
+    if cleared:
+        message += f" (usunięto z kolejki: {cleared})"
+    return StopResponse(
+        status="STOPPED" if filename else "IDLE",
+        filename=filename,
+        cleared_queue=cleared,
+        message=message
+    )
+
+@app.get("/warn/stats")
+async def get_warn_stats():
+    """
+    Endpoint zwracający liczniki odpowiedzi /warn (w tym odrzuceń) i konfigurację limitu żądań
+    """
+    return {
+        "responses": dict(warn_counters),
+        "rejected": sum(count for status, count in warn_counters.items()
+                        if status in ("BUSY", "RATE_LIMITED", "QUEUE_FULL", "DROPPED")),
+        "rate_limit": warn_limiter.describe(),
+    }
+
+def no_sounds_error() -> WarnErrorResponse:
+    """Odpowiedź /warn, gdy nie ma dźwięków do odtworzenia"""
+    stats = sounds_database.get_stats()
+    return WarnErrorResponse(
+        status="ERROR",
+        error="Brak dostępnych dźwięków do odtworzenia",
+        total_files=stats["total_files"],
+        valid_files=stats["valid_sounds_count"]
+    )
+
+def enqueue_warning(trigger: str, priority: int, requested_at: float):
+    """
+    Obsługa /warn w trybie kolejki.
+    Pod blokadą stanu odtwarzania tylko scalenie lub losowanie i zajęcie slotu - odtwarzanie
+    (dekodowanie, uruchomienie odtwarzacza) startuje po jej zwolnieniu, jak w trybie BUSY.
+    """
+    with playback_state.lock:
+        item = playback_queue.find_coalescable(trigger)
+        if item is not None:
+            playback_queue.coalesce(item, priority)
+            status = "COALESCED"
+        else:
+            random_result = sounds_database.get_random_sound()
+            if not random_result:
+                return no_sounds_error()
+            filename, sound_info = random_result
+            status, item = playback_queue.submit(filename, sound_info, priority, trigger, requested_at)
+
+    if status == "COALESCED":
+        message = f"Wyzwolenie scalone z wpisem #{item.id} ({item.filename}, wyzwolenia: {item.hits})"
+    elif status == "REJECTED":
+        return WarnErrorResponse(
+            status="QUEUE_FULL",
+            error=f"Kolejka odtwarzania jest pełna ({playback_queue.maxsize} wpisów) - spróbuj ponownie później",
+            total_files=sounds_database.total_files,
+            valid_files=sounds_database.get_valid_sounds_count()
+        )
+    elif status == "DROPPED":
+        return WarnResponse(
+            status="DROPPED",
+            filename=filename,
+            info=sound_info.to_model(),
+            message=f"Kolejka odtwarzania jest pełna - wyzwolenie pominięte ({filename})"
+        )
+    elif status == "PLAYING":
+        playback_queue.begin(item)
+        message = f"Rozpoczynam odtwarzanie pliku: {filename} (długość: {item.duration:.2f}s)"
+    else:
+        message = f"Dodano do kolejki: {filename} (pozycja: {playback_queue.position(item)})"
+        event_hub.publish("queued", queue_id=item.id, filename=filename, priority=item.priority,
+                          trigger=trigger, position=playback_queue.position(item),
+                          estimated_start_time=playback_queue.estimated_start_time(item))
+
+    start_time = playback_queue.estimated_start_time(item)
+    return WarnResponse(
+        status=status,
+        filename=item.filename,
+        info=item.info.to_model(),
+        message=message,
+        estimated_end_time=start_time + item.duration if start_time is not None else None,
+        latency_ms=round(item.latency_ms, 2) if item.latency_ms is not None else None,
+        queue_position=playback_queue.position(item),
+        estimated_start_time=start_time
+    )
+
+@app.get("/playback/queue")
+async def get_playback_queue():
+    """
+    Endpoint zwracający stan kolejki odtwarzania
+    """
+    info = playback_queue.describe()
+    info["mode"] = PLAYBACK_MODE
+    return info
+
+@app.get("/playback/state")
+async def get_playback_state():
+    """
+    Endpoint zwracający slot odtwarzania; przy wspólnym stanie workerów także podłączone procesy,
+    wersję biblioteki i liczbę wyborów
+    """
+    if playback_state.shared:
+        info = playback_state.describe()
+    else:
+        info = {"playback": {"playback_id": playback_state.playback_id,
+                             "is_playing": playback_state.is_currently_playing(),
+                             "filename": playback_state.filename,
+                             "end_time": playback_state.end_time}}
+    info["shared"] = playback_state.shared
+    info["pid"] = os.getpid()
+    # Wersja biblioteki naniesiona na bazę tego procesu (przy wspólnym stanie może chwilę odstawać)
+    info["library_version_applied"] = library_state["version"]
+    return info
+
+def events_snapshot() -> Event:
+    """Pierwszy komunikat dla nowego subskrybenta: bieżący stan odtwarzania, kolejki i biblioteki"""
+    with playback_state.lock:
+        playing = is_audio_playing()
+        data = {
+            "is_playing": playing,
+            "playback_id": playback_state.playback_id,
+            "filename": playback_state.filename if playing else None,
+            "estimated_end_time": playback_state.end_time if playing else None,
+        }
+    data.update(queue_length=len(playback_queue), total_files=sounds_database.total_files,
+                etag=database_etag(), time=time.time())
+    return Event(None, "state", data)
+
+@app.get("/events")
+async def events_stream():
+    """
+    Strumień zdarzeń (Server-Sent Events): started, finished, cancelled, queued, library-changed.
+    Pierwsze zdarzenie (state) opisuje bieżący stan - klient nie musi odpytywać /warn.
+    Klient, który nie nadąża z odbiorem, traci najstarsze zdarzenia i dostaje zdarzenie dropped.
+    """
+    if event_hub.full:
+        return Response(content=json_bytes({"error": "Za dużo subskrybentów zdarzeń"}), status_code=503,
+                        media_type="application/json", headers={"Retry-After": "5"})
+
+    async def stream():
+        subscriber = event_hub.subscribe()
+        try:
+            yield events_snapshot().sse
+            while True:
+                events, dropped = await subscriber.get(EVENTS_KEEPALIVE_SECONDS)
+                if not events:
+                    yield SSE_KEEPALIVE
+                    continue
+                chunks = [dropped_event(dropped).sse] if dropped else []
+                chunks.extend(event.sse for event in events)
+                yield b"".join(chunks)
+        finally:
+            event_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/events/ws")
+async def events_websocket(websocket: WebSocket):
+    """
+    Te same zdarzenia co /events przez WebSocket - każda wiadomość to JSON {"id", "event", "data"}.
+    Wiadomości od klienta są ignorowane.
+    """
+    if event_hub.full:
+        # 1013 - spróbuj ponownie później
+        await websocket.close(code=1013)
+        return
+    await websocket.accept()
+    subscriber = event_hub.subscribe()
+
+    async def wait_closed():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    closed = asyncio.ensure_future(wait_closed())
+    try:
+        await websocket.send_text(events_snapshot().text)
+        while not closed.done():
+            events, dropped = await subscriber.get(EVENTS_KEEPALIVE_SECONDS)
+            if dropped:
+                await websocket.send_text(dropped_event(dropped).text)
+            for event in events:
+                await websocket.send_text(event.text)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        event_hub.unsubscribe(subscriber)
+        closed.cancel()
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Endpoint z metrykami w formacie tekstowym Prometheusa
+    """
+    return Response(content=metrics.render(), media_type=metrics.content_type)
+
+@app.get("/audio/engine")
+async def get_audio_engine_status():
+    """
+    Endpoint zwracający stan silnika audio i statystyki opóźnienia od żądania do pierwszej ramki
+    """
+    return audio_engine.get_status()
+
+@app.get("/audio/volume")
+async def get_audio_volume():
+    """
+    Endpoint zwracający głośność globalną i ustawienia wyrównania głośności (LUFS)
+    """
+    return audio_engine.get_volume()
+
+@app.post("/audio/volume")
+async def set_audio_volume(config: VolumeConfigRequest, response: Response):
+    """
+    Endpoint zmieniający głośność globalną (0-1), poziom docelowy w LUFS lub wyrównanie głośności.
+    Zmiana działa od następnego odtworzenia - pliki nie są ponownie kodowane.
+    Odrzucone ustawienie - 400 (głośność bez zmian).
+    """
+    try:
+        audio_engine.set_volume(volume=config.volume, target=config.target_lufs, normalize=config.normalize)
+    except ValueError as e:
+        response.status_code = 400
+        return ErrorResponse(error=str(e))
+    return audio_engine.get_volume()
+
+@app.get("/audio/backends")
+async def get_audio_backends():
+    """
+    Endpoint zwracający wyniki sprawdzenia wyjść audio przy starcie i wybrane wyjście
+    """
+    return {
+        "selected": audio_engine.driver,
+        "simulated": audio_engine.simulated,
+        "backends": audio_engine.probes,
+    }
+
+@app.get("/audio/zones")
+async def get_audio_zones():
+    """
+    Endpoint zwracający stan stref (tryb wielostrefowy, BARKING_DOG_ZONES):
+    wynik sprawdzenia przy starcie, kompensację opóźnienia i ostatnie odtworzenie w każdej strefie
+    """
+    backend = audio_engine.backend
+    active = backend.describe() if isinstance(backend, MultiZoneBackend) else None
+    return {
+        "enabled": active is not None,
+        "configured": audio_engine.zone_probes,
+        "last_skew_ms": active["last_skew_ms"] if active else None,
+        "zones": active["zones"] if active else [],
+    }
+
@@ -0,0 +1,148 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Profil startu aplikacji i leniwe importy opcjonalnych zależności.
+
+Profil działa jak `python -X importtime`, tylko w podziale na fazy startu:
+importy (grupami), przygotowanie aplikacji, skan biblioteki, silnik audio.
+Leniwe importy (pygame, numpy, soundfile) zapisują się w profilu w chwili,
+w której faktycznie nastąpiły. Tabela trafia do logu po załadowaniu bazy.
+
+Opcjonalne moduły ładowane są przy pierwszym użyciu przez wybrane wyjście
+lub funkcję - o dostępności decyduje `is_available` (bez importu modułu).
+"""
+
+import os
+import sys
+import time
+import importlib
+import importlib.util
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def process_age() -> Optional[float]:
+    """Czas od uruchomienia procesu w sekundach (Linux: /proc) lub None"""
+    try:
+        with open("/proc/self/stat", "r") as f:
+            # Pola po nazwie procesu (w nawiasach); starttime to pole 22 (w taktach zegara od startu systemu)
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupProfile:
+    """Fazy startu: (nazwa, początek od startu procesu [s], czas [s])"""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        # Start interpretera, uvicorn i importy przed pierwszym modułem aplikacji
+        self.before_app = process_age()
+        self.phases: List[Tuple[str, float, float]] = []
+        self._last_mark = self.origin
+        self._lock = threading.Lock()
+        self.reported = False
+
+    def offset(self, t: Optional[float] = None) -> float:
+        """Czas od startu procesu (lub od importu profilu, gdy nie jest znany) w sekundach"""
+        return (self.before_app or 0.0) + ((time.perf_counter() if t is None else t) - self.origin)
+
+    def record(self, name: str, start: float, seconds: float) -> None:
+        """Zapisuje fazę zmierzoną przez wywołującego (`start` - perf_counter)"""
+        with self._lock:
+            self.phases.append((name, self.offset(start), seconds))
+
+    def mark(self, name: str) -> None:
+        """Zamyka fazę trwającą od poprzedniego znacznika (np. grupę importów modułu)"""
+        now = time.perf_counter()
+        self.record(name, self._last_mark, now - self._last_mark)
+        self._last_mark = now
+
+    @contextmanager
+    def phase(self, name: str):
+        """Mierzy blok kodu jako fazę startu"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "before_app_ms": round(self.before_app * 1000.0, 1) if self.before_app is not None else None,
+            "phases": [{"name": name, "start_ms": round(start * 1000.0, 1), "duration_ms": round(seconds * 1000.0, 1)}
+                       for name, start, seconds in sorted(self.phases, key=lambda phase: phase[1])],
+        }
+
+    def report(self) -> None:
+        """Wypisuje tabelę faz do logu"""
+        self.reported = True
+        print("=" * 60)
+        print("PROFIL STARTU")
+        print("=" * 60)
+        print(f"{'FAZA':<36} {'START [ms]':>10} {'CZAS [ms]':>10}")
+        print("-" * 60)
+        if self.before_app is not None:
+            print(f"{'interpreter + uvicorn':<36} {0.0:>10.1f} {self.before_app * 1000.0:>10.1f}")
+        for name, start, seconds in sorted(self.phases, key=lambda phase: phase[1]):
+            print(f"{name:<36} {start * 1000.0:>10.1f} {seconds * 1000.0:>10.1f}")
+        print("-" * 60)
+        print(f"{'razem (od startu procesu)':<36} {'':>10} {self.offset() * 1000.0:>10.1f}")
+        print("=" * 60)
+
+
+# Profil bieżącego procesu - tworzony przy pierwszym imporcie modułu (jak najwcześniej w start.py)
+startup_profile = StartupProfile()
+
+_modules: Dict[str, Any] = {}
+_available: Dict[str, bool] = {}
+_import_lock = threading.Lock()
+
+
+def is_available(name: str) -> bool:
+    """Czy moduł jest zainstalowany - sprawdzane bez jego importu"""
+    if name not in _available:
+        try:
+            _available[name] = name in sys.modules or importlib.util.find_spec(name) is not None
+        except (ImportError, ValueError):
+            _available[name] = False
+    return _available[name]
+
+
+def optional_import(name: str) -> Optional[Any]:
+    """
+    Importuje moduł przy pierwszym użyciu (raz na proces); None, gdy nie jest dostępny.
+    Czas importu trafia do profilu startu.
+    """
+    module = _modules.get(name)
+    if module is not None or (name in _available and not _available[name]):
+        return module
+    with _import_lock:
+        if name in _modules:
+            return _modules[name]
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            _available[name] = False
+            return None
+        _available[name] = True
+        _modules[name] = module
+        startup_profile.record(f"import {name} (leniwy)", start, time.perf_counter() - start)
+        return module
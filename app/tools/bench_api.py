@@ -0,0 +1,309 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark obciążeniowy API na syntetycznej bibliotece dźwięków.
+
+Tryby:
+    inprocess - aplikacja w tym procesie, żądania ASGI bez sieci (mierzy sam kod aplikacji)
+    http      - serwer uvicorn uruchamiany jako podproces na wolnym porcie
+    --url     - już działający serwer (np. na Pi Zero)
+
+Raport: p50/p95/p99 opóźnienia, przepustowość i szczytowe RSS dla każdego
+endpointu i poziomu współbieżności. Działa bez karty dźwiękowej (tryb
+symulacji silnika audio). Wynik można zapisać jako JSON (--json) i
+porównywać między wersjami.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python -m app.tools.bench_api --files 1000 --concurrency 1 8 32
+    python -m app.tools.bench_api --mode http --files 10000 --requests 500
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import urllib.request
+import urllib.error
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_ENDPOINTS = ["/warn", "/sounds/database", "/sounds/random/get", "/sounds/refresh"]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentyl metodą najbliższej rangi"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(endpoint: str, concurrency: int, latencies: List[float], statuses: Dict[int, int],
+              elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+def configure_environment(args, library: Path) -> Dict[str, str]:
+    """Środowisko aplikacji: syntetyczna biblioteka, symulacja audio, bez limitu żądań i dźwięku startowego"""
+    env = {
+        "BARKING_DOG_SOUNDS_DIR": str(library),
+        "BARKING_DOG_INDEX_FILE": str(library.parent / f"index-{library.name}.json"),
+        "BARKING_DOG_STARTUP_DELAY": "86400",
+        "BARKING_DOG_RATE_LIMIT": "0",
+        "BARKING_DOG_AUDIO_BACKEND": "null",
+    }
+    if not args.index:
+        # Bez indeksu każde odświeżenie czyta metadane wszystkich plików
+        Path(env["BARKING_DOG_INDEX_FILE"]).unlink(missing_ok=True)
+    os.environ.update(env)
+    return env
+
+
+# --- Tryb w procesie: wywołania ASGI bez sieci ---
+
+async def asgi_get(app, path: str) -> int:
+    """Minimalne żądanie GET do aplikacji ASGI; zwraca kod statusu (treść jest odrzucana)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    status = [0]
+    request_sent = [False]
+
+    async def receive():
+        if not request_sent[0]:
+            request_sent[0] = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status[0] = message["status"]
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+async def run_inprocess(args, endpoints: List[str]) -> List[dict]:
+    from app import start
+
+    results = []
+    async with start.lifespan(start.app):
+        while not start.startup_state["sound_bank_loaded"]:
+            await asyncio.sleep(0.05)
+        for endpoint in endpoints:
+            requests = refresh_requests(args, endpoint)
+            for concurrency in args.concurrency:
+                latencies: List[float] = []
+                statuses: Dict[int, int] = {}
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def one():
+                    async with semaphore:
+                        begin = time.perf_counter()
+                        code = await asgi_get(start.app, endpoint)
+                        latencies.append(time.perf_counter() - begin)
+                        statuses[code] = statuses.get(code, 0) + 1
+
+                begin = time.perf_counter()
+                await asyncio.gather(*(one() for _ in range(requests)))
+                results.append(summarize(endpoint, concurrency, latencies, statuses, time.perf_counter() - begin))
+                print_row(results[-1])
+    return results
+
+
+# --- Tryb HTTP: serwer jako podproces lub podany adres ---
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def http_get(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code
+
+
+def wait_ready(base_url: str, timeout: float = 300.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if http_get(f"{base_url}/ready") == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Serwer {base_url} nie zgłosił gotowości w {timeout:.0f}s")
+
+
+def server_peak_rss_kb(pid: int) -> Optional[int]:
+    """Szczytowe RSS procesu serwera (VmHWM, Linux)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def run_http(args, endpoints: List[str], base_url: str) -> List[dict]:
+    results = []
+    for endpoint in endpoints:
+        requests = refresh_requests(args, endpoint)
+        for concurrency in args.concurrency:
+            latencies: List[float] = []
+            statuses: Dict[int, int] = {}
+
+            def one(_):
+                begin = time.perf_counter()
+                code = http_get(f"{base_url}{endpoint}")
+                return time.perf_counter() - begin, code
+
+            begin = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                for latency, code in executor.map(one, range(requests)):
+                    latencies.append(latency)
+                    statuses[code] = statuses.get(code, 0) + 1
+            results.append(summarize(endpoint, concurrency, latencies, statuses, time.perf_counter() - begin))
+            print_row(results[-1])
+    return results
+
+
+def refresh_requests(args, endpoint: str) -> int:
+    """Odświeżenie bazy jest ciężkie - mierzone mniejszą liczbą żądań"""
+    return max(1, args.requests // 10) if endpoint == "/sounds/refresh" else args.requests
+
+
+def report_line(text: str) -> None:
+    """Wiersz raportu - zawsze na terminal, także gdy komunikaty aplikacji są wyciszone"""
+    print(text, file=sys.__stdout__, flush=True)
+
+
+def print_header() -> None:
+    report_line(f"{'ENDPOINT':<20} {'WSP.':>5} {'ZADAN':>6} {'P50 [ms]':>10} {'P95 [ms]':>10} {'P99 [ms]':>10} "
+                f"{'RPS':>9}  STATUSY")
+    report_line("-" * 96)
+
+
+def print_row(row: dict) -> None:
+    report_line(f"{row['endpoint']:<20} {row['concurrency']:>5} {row['requests']:>6} {row['p50_ms']:>10.2f} "
+                f"{row['p95_ms']:>10.2f} {row['p99_ms']:>10.2f} {row['throughput_rps']:>9.1f}  {row['statuses']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark obciążeniowy API Barking's Dog")
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess", help="Sposób uruchomienia aplikacji")
+    parser.add_argument("--url", default=None, help="Adres działającego serwera (pomija generowanie biblioteki)")
+    parser.add_argument("--files", type=int, default=1000, help="Liczba plików w syntetycznej bibliotece")
+    parser.add_argument("--mp3-ratio", type=float, default=0.1, help="Udział plików MP3")
+    parser.add_argument("--requests", type=int, default=200, help="Liczba żądań na endpoint i poziom współbieżności")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Poziomy współbieżności")
+    parser.add_argument("--endpoints", nargs="+", default=DEFAULT_ENDPOINTS, help="Mierzone endpointy")
+    parser.add_argument("--no-index", dest="index", action="store_false",
+                        help="Usuń indeks metadanych przed startem (zimny skan)")
+    parser.add_argument("--workdir", default=None, help="Katalog na biblioteki (domyślnie katalog tymczasowy)")
+    parser.add_argument("--json", default=None, help="Zapisz wyniki do pliku JSON")
+    parser.add_argument("--verbose", action="store_true", help="Pokazuj komunikaty aplikacji (tryb w procesie)")
+    args = parser.parse_args()
+
+    report = {
+        "mode": "url" if args.url else args.mode,
+        "files": None if args.url else args.files,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.time(),
+    }
+    server = None
+
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        from app.tools.synthetic_library import generate_library
+
+        workdir = Path(args.workdir or tempfile.gettempdir()) / "barking-dog-bench"
+        library = generate_library(workdir / f"api-{args.files}", args.files, mp3_ratio=args.mp3_ratio)
+        env = configure_environment(args, library)
+        if args.mode == "http":
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.start:app", "--host", "127.0.0.1", "--port", str(port),
+                 "--log-level", "warning"],
+                env={**os.environ, **env}, stdout=None if args.verbose else subprocess.DEVNULL,
+            )
+
+    print_header()
+    start_time = time.perf_counter()
+    try:
+        if args.url or server is not None:
+            wait_ready(base_url)
+            report["startup_s"] = round(time.perf_counter() - start_time, 3)
+            report["results"] = run_http(args, args.endpoints, base_url)
+            if server is not None:
+                report["peak_rss_kb"] = server_peak_rss_kb(server.pid)
+        elif args.verbose:
+            report["results"] = asyncio.run(run_inprocess(args, args.endpoints))
+        else:
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                report["results"] = asyncio.run(run_inprocess(args, args.endpoints))
+            # ru_maxrss jest w KB na Linuksie (w bajtach na macOS)
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            report["peak_rss_kb"] = rss // 1024 if sys.platform == "darwin" else rss
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    print("-" * 96)
+    if report.get("peak_rss_kb"):
+        print(f"Szczytowe RSS serwera: {report['peak_rss_kb'] / 1024:.1f} MB")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wyniki zapisane: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
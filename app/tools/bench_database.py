@@ -0,0 +1,157 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Mikro-benchmark bazy dźwięków: ładowanie, losowanie i statystyki.
+
+Dodatkowo porównanie reprezentacji wpisów przy --compare wpisach: modele
+Pydantic SoundInfo (dawny magazyn) i zwarte rekordy SoundRecord - pamięć
+(tracemalloc), budowa z wpisów indeksu, odczyt pól, porównanie przy
+odświeżeniu i serializacja całej bazy do JSON.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python -m app.tools.bench_database --sizes 10 1000 100000
+    python -m app.tools.bench_database --sizes 1000 --compare 100000
+"""
+
+import gc
+import time
+import argparse
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+import pydantic_core
+from pydantic import TypeAdapter
+
+from app.models import SoundsDatabase, SoundInfo, SoundRecord, AudioStatus, AudioType
+
+
+def make_sound_dict(i: int) -> Dict[str, Any]:
+    """Syntetyczny wpis bazy w formacie indeksu (co 20. plik z błędem, co 4. w formacie MP3)"""
+    ok = i % 20 != 0
+    return {
+        "length": 0.5 + (i % 100) / 100.0 if ok else None,
+        "sample_rate": int("22050") if ok else None,  # osobny obiekt int - jak z dekodera
+        "size_bytes": 20000 + i if ok else None,
+        "type": AudioType.MP3.value if i % 4 == 0 else AudioType.WAV.value,
+        "path": f"/sounds/bark-{i:06d}.wav",
+        "status": AudioStatus.OK.value if ok else AudioStatus.ERROR.value,
+        "error": None if ok else "synthetic error",
+    }
+
+
+def make_sound_info(i: int) -> SoundRecord:
+    return SoundRecord.from_dict(make_sound_dict(i))
+
+
+def per_call_us(func, calls: int) -> float:
+    """Średni czas pojedynczego wywołania w mikrosekundach"""
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def timed_ms(func: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000.0
+
+
+def measure_store(name: str, rows: List[Tuple[str, Dict[str, Any]]], build: Callable[[Dict[str, Any]], Any],
+                  dump: Callable[[Dict[str, Any]], bytes]) -> Dict[str, Any]:
+    """Pamięć i czasy operacji dla jednej reprezentacji wpisów"""
+    store, build_ms = timed_ms(lambda: {filename: build(data) for filename, data in rows})
+    del store
+    gc.collect()
+    tracemalloc.start()
+    store = {filename: build(data) for filename, data in rows}
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Odczyt pól jak przy statystykach i /warn (status, długość, ścieżka)
+    _, read_ms = timed_ms(lambda: sum(len(entry.path) + (entry.length or 0.0)
+                                      for entry in store.values() if entry.status == AudioStatus.OK))
+    # Odświeżenie: porównanie każdego wpisu z nowo odczytanym (apply_sound_changes)
+    fresh = {filename: build(data) for filename, data in rows}
+    _, compare_ms = timed_ms(lambda: sum(store[filename] != entry for filename, entry in fresh.items()))
+    body, dump_ms = timed_ms(lambda: dump(store))
+    return {"name": name, "memory": memory, "build_ms": build_ms, "read_ms": read_ms,
+            "compare_ms": compare_ms, "dump_ms": dump_ms, "json_bytes": len(body)}
+
+
+def compare_representations(size: int) -> None:
+    """Pydantic SoundInfo vs SoundRecord przy `size` wpisach"""
+    rows = [(f"bark-{i:06d}.wav", make_sound_dict(i)) for i in range(size)]
+    adapter = TypeAdapter(Dict[str, SoundInfo])
+    results = [
+        measure_store("Pydantic SoundInfo", rows, lambda data: SoundInfo(**data), adapter.dump_json),
+        measure_store("SoundRecord", rows, SoundRecord.from_dict,
+                      lambda store: pydantic_core.to_json({k: v.to_dict() for k, v in store.items()})),
+    ]
+
+    print(f"\nPorównanie reprezentacji wpisów ({size} wpisów):")
+    print(f"{'REPREZENTACJA':<20} {'PAMIĘĆ [MB]':>12} {'B/WPIS':>8} {'BUDOWA [ms]':>12} {'ODCZYT [ms]':>12} "
+          f"{'PORÓWN. [ms]':>13} {'JSON [ms]':>10}")
+    print("-" * 93)
+    for result in results:
+        print(f"{result['name']:<20} {result['memory'] / 1048576:>12.1f} {result['memory'] / size:>8.0f} "
+              f"{result['build_ms']:>12.0f} {result['read_ms']:>12.1f} {result['compare_ms']:>13.1f} "
+              f"{result['dump_ms']:>10.0f}")
+    legacy, compact = results
+    print("-" * 93)
+    print(f"SoundRecord: pamięć {legacy['memory'] / compact['memory']:.1f}x mniej, "
+          f"budowa {legacy['build_ms'] / compact['build_ms']:.1f}x, odczyt {legacy['read_ms'] / compact['read_ms']:.1f}x, "
+          f"porównanie {legacy['compare_ms'] / compact['compare_ms']:.1f}x, JSON {legacy['dump_ms'] / compact['dump_ms']:.1f}x "
+          f"(JSON identyczny: {'tak' if legacy['json_bytes'] == compact['json_bytes'] else 'NIE'})")
+
+    # Koszt na granicy API: model odpowiedzi budowany dla jednego wpisu
+    record = SoundRecord.from_dict(rows[1][1])
+    start = time.perf_counter()
+    for _ in range(10000):
+        record.to_model()
+    print(f"Konwersja rekordu do SoundInfo (na odpowiedź): {(time.perf_counter() - start) / 10000 * 1e6:.2f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mikro-benchmark SoundsDatabase")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000], help="Liczby wpisów")
+    parser.add_argument("--calls", type=int, default=2000, help="Liczba wywołań losowania/statystyk")
+    parser.add_argument("--compare", type=int, default=100000,
+                        help="Liczba wpisów w porównaniu Pydantic / SoundRecord (0 - pomiń)")
+    args = parser.parse_args()
+
+    print(f"{'WPISY':>8} {'LADOWANIE [ms]':>16} {'ADD [us]':>10} {'RANDOM [us]':>12} {'STATS [us]':>11}")
+    print("-" * 62)
+
+    for size in args.sizes:
+        infos = [(f"bark-{i:06d}.wav", make_sound_info(i)) for i in range(size)]
+        database = SoundsDatabase()
+
+        start = time.perf_counter()
+        for filename, info in infos:
+            database.add_sound(filename, info)
+        load_ms = (time.perf_counter() - start) * 1000.0
+        add_us = load_ms * 1000.0 / size
+
+        random_us = per_call_us(database.get_random_sound, args.calls)
+        stats_us = per_call_us(database.get_stats, args.calls)
+        print(f"{size:>8} {load_ms:>16.2f} {add_us:>10.2f} {random_us:>12.2f} {stats_us:>11.2f}")
+
+    if args.compare:
+        compare_representations(args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Test obciążeniowy strumienia zdarzeń /events (SSE) na jednym workerze uvicorn.
+
+1. Bez subskrybentów: czas odpowiedzi /warn (pary /warn + /stop).
+2. N bezczynnych subskrybentów: pamięć serwera na połączenie i zużycie CPU
+   w bezczynności (tylko komunikaty podtrzymujące).
+3. Rozgłaszanie: czas od wysłania /warn do odebrania zdarzenia started
+   przez wszystkich subskrybentów i czas odpowiedzi /warn przy N połączeniach.
+4. Zalegający klienci: część połączeń w ogóle nie czyta. Seria zdarzeń nie może
+   spowolnić pozostałych. Zalegający tracą najstarsze zdarzenia (zdarzenie dropped)
+   dopiero po zapełnieniu buforów gniazda - na loopback to megabajty.
+5. EventHub w procesie: koszt publikacji przy N nieczytających subskrybentach
+   i ograniczenie ich buforów (odrzucanie najstarszych zdarzeń).
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python -m app.tools.bench_events
+    python -m app.tools.bench_events --subscribers 1000 --events 50 --lagging 50
+"""
+
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Tuple
+
+from app.events import EventHub
+from app.tools.stress_warn import start_workers
+from app.tools.synthetic_library import generate_library
+
+
+def process_stats(pid: int) -> Tuple[float, float]:
+    """(pamięć RSS w MB, czas CPU w s) procesu serwera z /proc"""
+    with open(f"/proc/{pid}/status") as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return rss_kb / 1024.0, cpu
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HttpClient:
+    """Minimalny klient HTTP/1.1 na jednym połączeniu keep-alive (bez przeskoków między wątkami)"""
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def get(self, path: str) -> bytes:
+        try:
+            return await self._get(path)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # Serwer zamyka połączenie bezczynne dłużej niż keep-alive (np. w trakcie pomiaru bezczynności)
+            await self.connect()
+            return await self._get(path)
+
+    async def _get(self, path: str) -> bytes:
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\n\r\n".encode())
+        length = 0
+        if not await self.reader.readline():
+            raise ConnectionResetError("połączenie zamknięte przez serwer")
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        return await self.reader.readexactly(length)
+
+
+class Subscriber:
+    """Połączenie SSE; zapisuje czas odebrania każdego zdarzenia started"""
+
+    def __init__(self, lagging: bool = False):
+        self.lagging = lagging
+        self.started: List[float] = []
+        self.dropped = 0
+        self.ready = asyncio.Event()
+
+    async def run(self, host: str, port: int):
+        sock = None
+        if self.lagging:
+            # Mały bufor odbiorczy - zalegający klient szybko zatyka połączenie
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            sock.setblocking(False)
+            await asyncio.get_running_loop().sock_connect(sock, (host, port))
+            reader, writer = await asyncio.open_connection(sock=sock)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        writer.write(f"GET /events HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                if line.startswith(b"event: state"):
+                    self.ready.set()
+                    if self.lagging:
+                        # Nie czyta nic więcej (połączenie zostaje otwarte)
+                        await asyncio.Event().wait()
+                elif line == b"event: started\n":
+                    self.started.append(time.perf_counter())
+                elif line == b"event: dropped\n":
+                    self.dropped += 1
+        finally:
+            writer.close()
+
+
+async def warn_round(client: HttpClient, subscribers: List[Subscriber], index: int,
+                     timeout: float = 10.0) -> Tuple[float, List[float]]:
+    """/warn, czekanie aż wszyscy odbiorą started, /stop. Zwraca (czas odpowiedzi /warn, opóźnienia zdarzeń)"""
+    sent = time.perf_counter()
+    await client.get("/warn")
+    response = time.perf_counter() - sent
+    deadline = sent + timeout
+    while any(len(s.started) <= index for s in subscribers) and time.perf_counter() < deadline:
+        await asyncio.sleep(0.001)
+    await client.get("/stop")
+    delays = [s.started[index] - sent for s in subscribers if len(s.started) > index]
+    return response, delays
+
+
+async def metric(client: HttpClient, name: str) -> float:
+    for line in (await client.get("/metrics")).decode().splitlines():
+        if line.startswith(name + " "):
+            return float(line.split()[1])
+    return 0.0
+
+
+async def bench(args, pid: int, host: str, port: int):
+    client = HttpClient(host, port)
+    await client.connect()
+
+    # 1. Bez subskrybentów
+    baseline = []
+    for _ in range(args.events):
+        response, _ = await warn_round(client, [], 0)
+        baseline.append(response * 1000)
+    print(f"/warn bez subskrybentów:      p50 {statistics.median(baseline):6.2f} ms, "
+          f"p99 {percentile(baseline, 0.99):6.2f} ms")
+
+    # 2. Bezczynni subskrybenci
+    rss_before, _ = process_stats(pid)
+    subscribers = [Subscriber() for _ in range(args.subscribers)]
+    tasks = []
+    for start in range(0, len(subscribers), 100):
+        batch = subscribers[start:start + 100]
+        tasks.extend(asyncio.create_task(s.run(host, port)) for s in batch)
+        await asyncio.wait_for(asyncio.gather(*(s.ready.wait() for s in batch)), 30)
+    connected = await metric(client, "barking_dog_event_subscribers")
+    rss_after, cpu_before = process_stats(pid)
+    await asyncio.sleep(args.idle)
+    _, cpu_after = process_stats(pid)
+    print(f"Subskrybenci: {int(connected)} połączonych, pamięć serwera +{rss_after - rss_before:.1f} MB "
+          f"({(rss_after - rss_before) * 1024 / max(1, len(subscribers)):.1f} kB na połączenie)")
+    print(f"Bezczynność {args.idle:.0f}s: CPU serwera {cpu_after - cpu_before:.2f}s "
+          f"({(cpu_after - cpu_before) / args.idle * 100:.1f}%)")
+
+    # 3. Rozgłaszanie do wszystkich
+    responses, delays, complete = [], [], []
+    for index in range(args.events):
+        response, round_delays = await warn_round(client, subscribers, index)
+        responses.append(response * 1000)
+        delays.extend(delay * 1000 for delay in round_delays)
+        complete.append(max(round_delays) * 1000 if round_delays else float("inf"))
+    delivered = len(delays) / (args.events * len(subscribers)) * 100
+    print(f"/warn przy {len(subscribers)} subskr.:  p50 {statistics.median(responses):6.2f} ms, "
+          f"p99 {percentile(responses, 0.99):6.2f} ms")
+    print(f"started -> subskrybent:       p50 {statistics.median(delays):6.2f} ms, "
+          f"p99 {percentile(delays, 0.99):6.2f} ms, wszyscy (p50) {statistics.median(complete):6.2f} ms, "
+          f"dostarczono {delivered:.1f}%")
+
+    # 4. Zalegający klienci
+    ok = delivered == 100.0
+    if args.lagging:
+        lagging = [Subscriber(lagging=True) for _ in range(args.lagging)]
+        tasks.extend(asyncio.create_task(s.run(host, port)) for s in lagging)
+        await asyncio.wait_for(asyncio.gather(*(s.ready.wait() for s in lagging)), 30)
+        dropped_before = await metric(client, "barking_dog_events_dropped_total")
+        base = len(subscribers[0].started)
+        burst = []
+        for index in range(args.burst):
+            response, _ = await warn_round(client, subscribers, base + index)
+            burst.append(response * 1000)
+        dropped = await metric(client, "barking_dog_events_dropped_total") - dropped_before
+        fast_missing = sum(max(0, base + args.burst - len(s.started)) for s in subscribers)
+        fast_dropped = sum(s.dropped for s in subscribers)
+        print(f"Zalegający ({args.lagging}, nie czytają), seria {args.burst} x /warn+/stop:")
+        print(f"  /warn p50 {statistics.median(burst):6.2f} ms, p99 {percentile(burst, 0.99):6.2f} ms; "
+              f"odrzucone zdarzenia (bufory zalegających): {int(dropped)}"
+              f"{' - seria zmieściła się w buforach gniazd' if not dropped else ''}")
+        print(f"  czytający subskrybenci: brakujących started {fast_missing}, zdarzeń dropped {fast_dropped}")
+        ok = ok and fast_missing == 0 and fast_dropped == 0
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return ok and hub_bench(args.subscribers, args.hub_events)
+
+
+def hub_bench(subscribers: int, events: int) -> bool:
+    """Publikacja do N subskrybentów, którzy nic nie odbierają - czas na zdarzenie i rozmiar buforów"""
+    async def run():
+        hub = EventHub()
+        queues = [hub.subscribe() for _ in range(subscribers)]
+        start = time.perf_counter()
+        for index in range(events):
+            hub.publish("started", playback_id=index, filename="bark-000001.wav", duration=1.0)
+        elapsed = time.perf_counter() - start
+        largest = max(len(queue.buffer) for queue in queues)
+        expected = subscribers * max(0, events - hub.buffer_size)
+        print(f"EventHub w procesie: {subscribers} nieczytających subskrybentów, {events} zdarzeń: "
+              f"{elapsed / events * 1e6:.0f} µs na zdarzenie, największy bufor {largest}/{hub.buffer_size}, "
+              f"odrzucone {hub.dropped} (oczekiwane {expected})")
+        return largest <= hub.buffer_size and hub.dropped == expected
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test obciążeniowy strumienia zdarzeń /events (SSE)")
+    parser.add_argument("--subscribers", type=int, default=1000, help="Liczba bezczynnych subskrybentów")
+    parser.add_argument("--events", type=int, default=30, help="Liczba rozgłaszanych /warn")
+    parser.add_argument("--idle", type=float, default=20.0, help="Czas pomiaru bezczynności [s]")
+    parser.add_argument("--lagging", type=int, default=20, help="Liczba klientów, którzy nie czytają (0 - pomiń)")
+    parser.add_argument("--burst", type=int, default=300, help="Liczba par /warn + /stop w serii dla zalegających")
+    parser.add_argument("--hub-events", type=int, default=1000, help="Liczba zdarzeń w teście EventHub w procesie")
+    parser.add_argument("--workdir", default=None, help="Katalog na syntetyczną bibliotekę")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir or tempfile.gettempdir()) / "barking-dog-bench-events"
+    library = generate_library(workdir / "sounds", count=8, min_duration=5.0, max_duration=5.0)
+    process, base = start_workers(SimpleNamespace(workers=1), workdir, library)
+    try:
+        host, port = base.rsplit("/", 1)[1].split(":")
+        ok = asyncio.run(bench(args, process.pid, host, int(port)))
+    finally:
+        process.terminate()
+        process.wait()
+    print("WYNIK:", "OK - wszyscy czytający subskrybenci dostali wszystkie zdarzenia" if ok else "BLAD")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
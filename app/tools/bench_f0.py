@@ -0,0 +1,142 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Porównanie estymatorów F0: YIN (NumPy, app/tools/f0.py) vs librosa.pyin.
+
+Dla każdego nagrania: mediana F0 obu metod, różnica w centach (zgodność
+= najwyżej pół tonu, 100 centów) i czas obliczeń (najlepszy z --repeat).
+Dodatkowo dokładność YIN na syntetycznych tonach harmonicznych o znanym F0.
+Bez librosa mierzony jest tylko YIN (dekodowanie przez soundfile).
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python -m app.tools.bench_f0
+    python -m app.tools.bench_f0 --input app/sounds/originals --repeat 5
+"""
+
+import time
+import argparse
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from app.tools.f0 import yin_f0
+
+try:
+    import librosa
+    LIBROSA_AVAILABLE = True
+except ImportError:
+    LIBROSA_AVAILABLE = False
+
+SR = 22050
+DEFAULT_INPUT = Path(__file__).resolve().parent.parent / "sounds" / "originals"
+
+
+def load(path: Path) -> np.ndarray:
+    """Dekodowanie jak w optimize.py (mono, 22050 Hz, obcięta cisza)"""
+    if LIBROSA_AVAILABLE:
+        y, _ = librosa.load(str(path), sr=SR, mono=True)
+        y, _ = librosa.effects.trim(y, top_db=40)
+        return y
+    data, sr = sf.read(str(path), always_2d=True)
+    y = data.mean(axis=1)
+    if sr != SR:
+        n_out = int(round(len(y) * SR / float(sr)))
+        y = np.interp(np.linspace(0, len(y) - 1, n_out), np.arange(len(y)), y)
+    return y.astype(np.float32)
+
+
+def pyin_f0(y: np.ndarray, sr: int) -> Optional[float]:
+    f0, _, _ = librosa.pyin(y, fmin=70, fmax=600, frame_length=2048, sr=sr)
+    f0 = f0[~np.isnan(f0)]
+    return float(np.median(f0)) if f0.size else None
+
+
+def timed(estimate: Callable, y: np.ndarray, repeat: int) -> Tuple[Optional[float], float]:
+    """Wynik i najlepszy czas z `repeat` powtórzeń (s)"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = estimate(y, SR)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def cents(f0: Optional[float], reference: Optional[float]) -> Optional[float]:
+    if not f0 or not reference:
+        return None
+    return 1200.0 * np.log2(f0 / reference)
+
+
+def synthetic_accuracy() -> List[Tuple[float, float]]:
+    """YIN na tonach harmonicznych ze słabą podstawową i szumem - (F0 prawdziwe, błąd w centach)"""
+    rng = np.random.default_rng(0)
+    t = np.arange(SR) / SR
+    results = []
+    for f0 in (75.0, 110.0, 220.0, 331.5, 440.0, 590.0):
+        y = sum(amp * np.sin(2 * np.pi * f0 * k * t + k) for k, amp in enumerate((0.3, 1.0, 0.8, 0.5, 0.3), 1))
+        y = y + 0.05 * rng.standard_normal(len(t))
+        estimate = yin_f0(y, SR)
+        results.append((f0, cents(estimate, f0) if estimate else float("nan")))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Porównanie estymatorów F0 (YIN vs pyin)")
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT, help="Katalog z nagraniami")
+    parser.add_argument("--repeat", type=int, default=3, help="Liczba powtórzeń pomiaru czasu")
+    args = parser.parse_args()
+
+    files = sorted(p for p in args.input.iterdir() if p.suffix.lower() in (".mp3", ".wav"))
+    if LIBROSA_AVAILABLE and files:
+        # Pierwsze wywołanie pyin kompiluje funkcje numba - poza pomiarem
+        pyin_f0(load(files[0])[:SR], SR)
+    else:
+        print("Brak librosa - mierzony jest tylko YIN")
+
+    print(f"{'PLIK':<42} {'PYIN [Hz]':>10} {'YIN [Hz]':>10} {'RÓŻNICA':>10} {'PYIN [ms]':>10} {'YIN [ms]':>9} {'PRZYSP.':>8}")
+    print("-" * 106)
+    agree = compared = 0
+    pyin_total = yin_total = 0.0
+    for path in files:
+        y = load(path)
+        f0_yin, t_yin = timed(yin_f0, y, args.repeat)
+        yin_total += t_yin
+        f0_pyin, t_pyin = timed(pyin_f0, y, args.repeat) if LIBROSA_AVAILABLE else (None, 0.0)
+        pyin_total += t_pyin
+        diff = cents(f0_yin, f0_pyin)
+        if diff is not None:
+            compared += 1
+            agree += abs(diff) <= 100.0
+        print(f"{path.name[:42]:<42} {f0_pyin or float('nan'):>10.1f} {f0_yin or float('nan'):>10.1f} "
+              f"{'-' if diff is None else f'{diff:+.0f} ct':>10} {t_pyin * 1000:>10.1f} {t_yin * 1000:>9.1f} "
+              f"{t_pyin / t_yin if t_pyin else float('nan'):>7.1f}x")
+    print("-" * 106)
+    if LIBROSA_AVAILABLE:
+        print(f"Zgodność (±100 ct) na plikach z F0 obu metod: {agree}/{compared}")
+        print(f"Łączny czas: pyin {pyin_total * 1000:.0f} ms, YIN {yin_total * 1000:.0f} ms, "
+              f"przyspieszenie {pyin_total / yin_total:.1f}x")
+    else:
+        print(f"Łączny czas YIN: {yin_total * 1000:.0f} ms")
+
+    print("\nYIN na tonach syntetycznych (F0 -> błąd):")
+    for f0, error in synthetic_accuracy():
+        print(f"  {f0:>7.1f} Hz  {error:+.2f} ct")
+
+
+if __name__ == "__main__":
+    main()
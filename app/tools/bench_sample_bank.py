@@ -0,0 +1,145 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark banku próbek: pamięć i czas ładowania dźwięków w kilku procesach (jak workery uvicorn).
+
+Tryb "private" - każdy proces dekoduje bibliotekę do własnej pamięci.
+Tryb "bank" - pierwszy proces buduje bank próbek, wszystkie mapują ten sam plik.
+Dla każdego procesu mierzony jest przyrost pamięci prywatnej i PSS (Linux,
+/proc/self/smaps_rollup) po załadowaniu dźwięków, gdy wszystkie procesy działają naraz.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python -m app.tools.bench_sample_bank
+    python -m app.tools.bench_sample_bank --files 1000 --workers 4
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import contextlib
+import multiprocessing as mp
+from pathlib import Path
+from typing import Dict, List
+
+from app.tools.synthetic_library import generate_library
+
+
+def memory_kb() -> Dict[str, int]:
+    """Pamięć procesu z /proc/self/smaps_rollup (kB): Pss, prywatna i współdzielona"""
+    values: Dict[str, int] = {}
+    with open("/proc/self/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "pss": values.get("Pss", 0),
+        "private": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+        "shared": values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0),
+    }
+
+
+def worker(database, bank_path, ready, release, results) -> None:
+    """Jeden proces serwera: ładuje dźwięki, czeka na pozostałe, mierzy pamięć"""
+    from app.audio_engine import AudioEngine
+
+    # Log silnika audio z każdego procesu zaciemniłby tabelę wyników
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        engine = AudioEngine(bank_path=Path(bank_path) if bank_path else None)
+        engine.start()
+        before = memory_kb()
+        start = time.perf_counter()
+        engine.preload(database)
+        elapsed = time.perf_counter() - start
+    # Dotknij każdej strony buforów - jak przy odtwarzaniu wszystkich dźwięków
+    for pcm in engine._buffers.values():
+        int(pcm[::1024].sum())
+    ready.put(os.getpid())
+    release.wait()
+    after = memory_kb()
+    results.put({
+        "pid": os.getpid(),
+        "preload_ms": elapsed * 1000.0,
+        "private_mb": (after["private"] - before["private"]) / 1024.0,
+        "pss_mb": (after["pss"] - before["pss"]) / 1024.0,
+        "shared_mb": (after["shared"] - before["shared"]) / 1024.0,
+        "buffers": len(engine._buffers),
+    })
+
+
+def run(mode: str, database, workers: int, bank_path: Path) -> List[dict]:
+    context = mp.get_context("spawn")
+    ready, results, release = context.Queue(), context.Queue(), context.Event()
+    processes = []
+    for index in range(workers):
+        process = context.Process(target=worker, args=(database, str(bank_path) if mode == "bank" else None,
+                                                       ready, release, results))
+        process.start()
+        processes.append(process)
+        if index == 0:
+            # Pierwszy proces buduje bank (pozostałe i tak czekałyby na blokadę)
+            ready.get()
+    for _ in range(workers - 1):
+        ready.get()
+    release.set()
+    rows = [results.get() for _ in range(workers)]
+    for process in processes:
+        process.join()
+    # Kolejność startu: pierwszy wiersz to proces, który (w trybie "bank") zbudował bank
+    order = [process.pid for process in processes]
+    return sorted(rows, key=lambda row: order.index(row["pid"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pamięć i czas ładowania dźwięków: dekodowanie vs bank próbek")
+    parser.add_argument("--files", type=int, default=500, help="Liczba plików biblioteki")
+    parser.add_argument("--workers", type=int, default=4, help="Liczba procesów")
+    parser.add_argument("--library", type=Path, default=None, help="Katalog biblioteki (domyślnie tymczasowy)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("BARKING_DOG_AUDIO_BACKEND", "null")
+    from app.models import SoundsDatabase
+    from app.sound_scanner import list_audio_files, probe_sound_files
+
+    with tempfile.TemporaryDirectory() as tmp:
+        library = generate_library(args.library or Path(tmp) / "library", args.files)
+        files = list_audio_files(library)
+        database = SoundsDatabase()
+        for audio_file, record in zip(files, probe_sound_files([(f, None) for f in files])):
+            database.add_sound(audio_file.name, record)
+        bank_path = Path(tmp) / "sample_bank.bin"
+
+        print(f"{'TRYB':<8} {'PROCES':>6} {'ŁADOWANIE [ms]':>15} {'PRYWATNA [MB]':>14} "
+              f"{'WSPÓLNA [MB]':>13} {'PSS [MB]':>9}")
+        print("-" * 70)
+        totals = {}
+        for mode in ("private", "bank"):
+            rows = run(mode, database, args.workers, bank_path)
+            for index, row in enumerate(rows, 1):
+                print(f"{mode:<8} {index:>6} {row['preload_ms']:>15.1f} {row['private_mb']:>14.1f} "
+                      f"{row['shared_mb']:>13.1f} {row['pss_mb']:>9.1f}")
+            totals[mode] = sum(row["pss_mb"] for row in rows)
+            print("-" * 70)
+
+        print(f"Łącznie (PSS, {args.workers} procesów, {len(files)} plików): "
+              f"private {totals['private']:.1f} MB, bank {totals['bank']:.1f} MB "
+              f"({totals['private'] / max(totals['bank'], 0.1):.1f}x mniej)")
+        print(f"Bank próbek: {bank_path.stat().st_size / (1024 * 1024):.1f} MB na dysku "
+              f"(proces 1 trybu bank budował go - zwolnione bufory dekodowania zostają w jego stercie)")
+
+
+if __name__ == "__main__":
+    main()
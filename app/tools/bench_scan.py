@@ -0,0 +1,91 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark skanu metadanych: sekwencyjnie vs równolegle.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python -m app.tools.bench_scan --sizes 1000 10000 --workers 4
+"""
+
+import os
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+from app.sound_scanner import list_audio_files, probe_sound_files
+from app.tools.synthetic_library import generate_library
+
+
+def drop_page_cache() -> bool:
+    """Opróżnia cache stron systemu (Linux, wymaga roota) - symulacja zimnego startu"""
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+        return True
+    except OSError:
+        return False
+
+
+def timed_scan(directory: Path, workers: int, pool: str, cold: bool = False):
+    """Pełny skan katalogu (listowanie + odczyt metadanych). Zwraca (czas w s, wyniki)."""
+    if cold:
+        drop_page_cache()
+    start = time.perf_counter()
+    files = list_audio_files(directory)
+    results = probe_sound_files([(f, None) for f in files], workers=workers, pool=pool)
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark skanu metadanych biblioteki dźwięków")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="Rozmiary bibliotek")
+    parser.add_argument("--workers", type=int, default=4, help="Liczba równoległych zadań")
+    parser.add_argument("--pool", choices=["thread", "process"], default="thread", help="Rodzaj puli")
+    parser.add_argument("--mp3-ratio", type=float, default=0.1, help="Udział plików MP3 w bibliotece")
+    parser.add_argument("--repeat", type=int, default=3, help="Liczba powtórzeń (wynik = najlepszy czas)")
+    parser.add_argument("--cold", action="store_true", help="Opróżniaj cache stron przed każdym skanem (Linux, root)")
+    parser.add_argument("--workdir", default=None, help="Katalog na biblioteki (domyślnie katalog tymczasowy)")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir or tempfile.gettempdir()) / "barking-dog-bench"
+    if args.cold and not drop_page_cache():
+        print("Uwaga: brak uprawnień do /proc/sys/vm/drop_caches - pomiar z ciepłym cache")
+        args.cold = False
+    elif not args.cold:
+        print("Pomiar z ciepłym cache systemu (--cold symuluje pierwszy odczyt z karty SD)")
+    print(f"{'PLIKI':>8} {'SEKWENCYJNIE [s]':>18} {'ROWNOLEGLE [s]':>16} {'PRZYSPIESZENIE':>15} {'ZGODNE':>8}")
+    print("-" * 70)
+
+    for size in args.sizes:
+        directory = generate_library(workdir / f"lib-{size}", size, mp3_ratio=args.mp3_ratio)
+        # Rozgrzewka - pliki trafiają do cache systemu, oba warianty startują z tych samych warunków
+        timed_scan(directory, 1, args.pool)
+
+        seq_times, par_times = [], []
+        for _ in range(args.repeat):
+            t_seq, seq_results = timed_scan(directory, 1, args.pool, args.cold)
+            t_par, par_results = timed_scan(directory, args.workers, args.pool, args.cold)
+            seq_times.append(t_seq)
+            par_times.append(t_par)
+
+        same = seq_results == par_results
+        best_seq, best_par = min(seq_times), min(par_times)
+        print(f"{size:>8} {best_seq:>18.3f} {best_par:>16.3f} {best_seq / best_par:>14.2f}x {str(same):>8}")
+
+
+if __name__ == "__main__":
+    main()
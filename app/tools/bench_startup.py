@@ -0,0 +1,178 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pomiar zimnego startu serwera: czas do pierwszej odpowiedzi i do gotowości.
+
+Każda próba uruchamia nowy proces uvicorn (nowy interpreter, bez importów
+w pamięci), odpytuje GET / aż do pierwszej odpowiedzi, potem GET /ready.
+Mediana czasu do pierwszej odpowiedzi porównywana jest z celem - przekroczenie
+kończy program kodem 1 (kontrola regresji, np. w CI lub po aktualizacji na Pi).
+Na końcu wypisywany jest profil startu (fazy) z logu ostatniej próby.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python -m app.tools.bench_startup
+    python -m app.tools.bench_startup --runs 5 --target-ms 1500 --importtime
+
+Uwaga: pamięć podręczna systemu plików nie jest czyszczona między próbami -
+pierwszy start po restarcie urządzenia (zimne SD) będzie wolniejszy.
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import statistics
+import subprocess
+import http.client
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Cel dla czasu do pierwszej odpowiedzi (mediana) - nadpisywany przez --target-ms
+DEFAULT_TARGET_MS = float(os.environ.get("BARKING_DOG_STARTUP_TARGET_MS", "1500"))
+
+PROFILE_HEADER = "PROFIL STARTU"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port: int, path: str, timeout: float, expect_ok: bool) -> Optional[float]:
+    """Odpytuje endpoint co 5 ms; zwraca perf_counter pierwszej (udanej) odpowiedzi lub None"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", path)
+            status = conn.getresponse().status
+            conn.close()
+            if not expect_ok or status == 200:
+                return time.perf_counter()
+        except OSError:
+            pass
+        time.sleep(0.005)
+    return None
+
+
+def cold_start(env: dict, timeout: float) -> Tuple[Optional[float], Optional[float], str]:
+    """Jedna próba: (ms do pierwszej odpowiedzi, ms do gotowości, log serwera)"""
+    port = free_port()
+    with tempfile.TemporaryFile(mode="w+", encoding="utf-8") as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.start:app", "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning"],
+            stdout=log, stderr=subprocess.STDOUT, env=env)
+        try:
+            first = wait_for(port, "/", timeout, expect_ok=False)
+            ready = wait_for(port, "/ready", timeout, expect_ok=True) if first else None
+            # Profil wypisywany jest po załadowaniu bazy - chwila na opróżnienie bufora
+            time.sleep(0.2)
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        log.seek(0)
+        output = log.read()
+    to_ms = lambda t: (t - start) * 1000.0 if t is not None else None
+    return to_ms(first), to_ms(ready), output
+
+
+def profile_block(output: str) -> List[str]:
+    """Wycina tabelę profilu startu z logu serwera"""
+    lines = output.splitlines()
+    for index, line in enumerate(lines):
+        if PROFILE_HEADER in line:
+            # Ramka "=" nad i pod nagłówkiem, tabela kończy się kolejną ramką
+            block = lines[index - 1:]
+            end = next((i for i, l in enumerate(block[3:], start=3) if l.startswith("=")), len(block) - 1)
+            return block[:end + 1]
+    return []
+
+
+def import_profile(top: int) -> List[Tuple[int, str]]:
+    """`python -X importtime` dla app.start: najdroższe moduły (czas skumulowany w us)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.start"],
+                            capture_output=True, text=True, env=dict(os.environ, BARKING_DOG_AUDIO_BACKEND="null"))
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if cumulative_us.strip().isdigit():
+            rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Czas zimnego startu serwera (kontrola regresji)")
+    parser.add_argument("--runs", type=int, default=5, help="Liczba prób (nowy proces za każdym razem)")
+    parser.add_argument("--target-ms", type=float, default=DEFAULT_TARGET_MS,
+                        help="Cel: mediana czasu do pierwszej odpowiedzi [ms]")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Limit czasu jednej próby [s]")
+    parser.add_argument("--importtime", action="store_true", help="Pokaż najdroższe importy (-X importtime)")
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parents[2]
+    env = dict(os.environ,
+               PYTHONPATH=str(root),
+               BARKING_DOG_AUDIO_BACKEND=os.environ.get("BARKING_DOG_AUDIO_BACKEND", "null"),
+               BARKING_DOG_STARTUP_DELAY="3600")
+    os.chdir(root)
+
+    firsts, readies = [], []
+    output = ""
+    print(f"{'PRÓBA':>6} {'PIERWSZA ODP. [ms]':>20} {'GOTOWOŚĆ [ms]':>15}")
+    print("-" * 44)
+    for run in range(1, args.runs + 1):
+        first, ready, output = cold_start(env, args.timeout)
+        if first is None:
+            print(f"{run:>6} {'brak odpowiedzi':>20}")
+            print(output[-2000:])
+            sys.exit(1)
+        firsts.append(first)
+        if ready is not None:
+            readies.append(ready)
+        print(f"{run:>6} {first:>20.0f} {ready if ready is not None else float('nan'):>15.0f}")
+    print("-" * 44)
+
+    median_first = statistics.median(firsts)
+    median_ready = statistics.median(readies) if readies else float("nan")
+    print(f"Mediana: pierwsza odpowiedź {median_first:.0f} ms, gotowość {median_ready:.0f} ms "
+          f"(min {min(firsts):.0f} ms, max {max(firsts):.0f} ms)")
+
+    block = profile_block(output)
+    if block:
+        print("\nProfil startu (ostatnia próba, z logu serwera):")
+        print("\n".join(block))
+
+    if args.importtime:
+        print("\nNajdroższe importy app.start (czas skumulowany):")
+        for cumulative_us, name in import_profile(15):
+            print(f"  {cumulative_us / 1000:>8.1f} ms  {name}")
+
+    passed = median_first <= args.target_ms
+    print(f"\nCel: pierwsza odpowiedź <= {args.target_ms:.0f} ms - {'OK' if passed else 'REGRESJA'}")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
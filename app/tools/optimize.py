@@ -12,60 +12,285 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import os, numpy as np, librosa, soundfile as sf
-import pyrubberband as rb
+"""
+Optymalizator dźwięków: dostraja wysokość (F0) nagrań do pliku wzorcowego.
 
-IN_DIR = "../sounds/originals"
-OUT_DIR = "../sounds/optimized"
+Potok:
+    1. hash      - skrót SHA-256 zawartości każdego pliku wejściowego
+    2. wzorzec   - F0 pliku wzorcowego (z pamięci podręcznej, jeśli plik się nie zmienił)
+    3. pliki     - w puli procesów: dekodowanie, F0, zmiana wysokości, zapis WAV
 
-os.makedirs(OUT_DIR, exist_ok=True)
+F0 liczy librosa.pyin (domyślnie) lub szybki YIN w NumPy (--f0 yin, app/tools/f0.py) -
+zalecany na Pi Zero.
+
+Pamięć podręczna (domyślnie <wyjście>/.optimize_cache.json) przechowuje F0
+per skrót zawartości i opis każdego wyniku. Niezmienione pliki z aktualnym
+wynikiem są pomijane - dodanie jednego nagrania przetwarza tylko to nagranie.
+Zmiana wzorca lub parametrów przetwarza pliki ponownie, ale bez liczenia F0.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python -m app.tools.optimize
+    python -m app.tools.optimize --input nagrania/ --output app/sounds/optimized --reference bark.mp3 --workers 4
+    python -m app.tools.optimize --f0 yin
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import librosa
+import soundfile as sf
+
+try:
+    import pyrubberband as rb
+except ImportError:
+    rb = None
+
+from app.tools.f0 import yin_f0
+
+TOOLS_DIR = Path(__file__).resolve().parent
+DEFAULT_INPUT = TOOLS_DIR.parent / "sounds" / "originals"
+DEFAULT_OUTPUT = TOOLS_DIR.parent / "sounds" / "optimized"
+DEFAULT_REFERENCE = "dog-bark-type-03-293293.mp3"
 
 SR = 22050          # wspólna częstotliwość próbkowania
-F0_REF_FILE = "dog-bark-type-03-293293.mp3"   # <<--- tu wpisujesz nazwę pliku wzorcowego
+CACHE_VERSION = 1
+INPUT_EXTENSIONS = (".mp3", ".wav")
+F0_METHODS = ("pyin", "yin")
+
 
-def estimate_f0(y, sr):
+def estimate_f0(y, sr, method="pyin"):
+    if method == "yin":
+        return yin_f0(y, sr, fmin=70, fmax=600, frame_length=2048)
     f0, _, _ = librosa.pyin(y, fmin=70, fmax=600, frame_length=2048, sr=sr)
     f0 = f0[~np.isnan(f0)]
     return float(np.median(f0)) if f0.size else None
 
-# 1) wczytaj wszystkie pliki mp3
-if not os.path.isdir(IN_DIR):
-    print(f"Katalog wejściowy '{IN_DIR}' nie istnieje. Utwórz go i dodaj pliki .mp3.")
-    exit(1)
-
-files = [f for f in os.listdir(IN_DIR) if f.lower().endswith(".mp3")]
-records = []
-for name in files:
-    y, sr = librosa.load(os.path.join(IN_DIR, name), sr=SR, mono=True)
-    y, _ = librosa.effects.trim(y, top_db=40)
-    f0 = estimate_f0(y, SR)
-    records.append((name, y, f0))
-
-# 2) znajdź F0 wzorcowego
-ref = next((r for r in records if r[0] == F0_REF_FILE), None)
-if not ref or not ref[2]:
-    raise ValueError(f"Nie udało się wyznaczyć F0 dla pliku wzorcowego {F0_REF_FILE}")
-f0_target = ref[2]
-print(f"Wzorzec: {F0_REF_FILE}, F0 ≈ {f0_target:.1f} Hz")
-
-# 3) pitch-shift pozostałych plików
-for name, y, f0 in records:
-    if name == F0_REF_FILE:
-        y_out = y  # wzorzec zostaje bez zmian
-    elif not f0:
-        y_out = y  # brak detekcji — zapis bez zmian
-    else:
-        n_steps = 12.0 * np.log2(f0_target / f0)
+
+def content_hash(path: Path) -> str:
+    """SHA-256 zawartości pliku (odporny na zmianę nazwy i mtime)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_audio(path: Path, sr: int, top_db: float):
+    """Dekoduje plik do mono w częstotliwości `sr` i obcina ciszę na brzegach"""
+    y, _ = librosa.load(str(path), sr=sr, mono=True)
+    y, _ = librosa.effects.trim(y, top_db=top_db)
+    return y
+
+
+def shift_pitch(y, sr: int, f0: Optional[float], f0_target: Optional[float]):
+    """Przesuwa wysokość do F0 wzorca (bez zmian dla wzorca i plików bez wykrytego F0)"""
+    if not f0 or not f0_target:
+        return y
+    n_steps = 12.0 * np.log2(f0_target / f0)
+    if abs(n_steps) < 1e-6:
+        return y
+    if rb is not None:
         try:
-            y_out = rb.pitch_shift(y, SR, n_steps=n_steps, formant=True)
+            return rb.pitch_shift(y, sr, n_steps=n_steps, formant=True)
         except Exception:
-            y_out = librosa.effects.pitch_shift(y=y, sr=SR, n_steps=n_steps)
+            pass
+    return librosa.effects.pitch_shift(y=y, sr=sr, n_steps=n_steps)
+
+
+def process_file(path: str, out_path: str, f0: Optional[float], f0_target: Optional[float],
+                 params: Dict[str, Any], progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Zadanie puli procesów: dekodowanie, F0 (gdy nie ma go w pamięci podręcznej),
+    zmiana wysokości, normalizacja i zapis. Zwraca F0 i czasy etapów.
+    `progress` dostaje nazwę rozpoczynanego etapu (decode, f0, shift, write).
+    """
+    report = progress or (lambda stage: None)
+    timings = {}
+    report("decode")
+    start = time.perf_counter()
+    y = load_audio(Path(path), params["sr"], params["top_db"])
+    timings["decode"] = time.perf_counter() - start
 
+    report("f0")
+    start = time.perf_counter()
+    f0_cached = f0 is not None
+    if not f0_cached:
+        f0 = estimate_f0(y, params["sr"], params["f0"])
+    timings["f0"] = time.perf_counter() - start
+
+    report("shift")
+    start = time.perf_counter()
+    y_out = shift_pitch(y, params["sr"], f0, f0_target)
     # normalizacja głośności
     peak = np.max(np.abs(y_out)) + 1e-9
-    y_out = y_out * (0.89 / peak)
+    y_out = y_out * (params["peak"] / peak)
+    timings["shift"] = time.perf_counter() - start
+
+    report("write")
+    start = time.perf_counter()
+    # Zapis przez plik tymczasowy - obserwator katalogu nie zobaczy niepełnego WAV
+    tmp_path = out_path + ".part"
+    sf.write(tmp_path, y_out, params["sr"], subtype="PCM_16", format="WAV")
+    os.replace(tmp_path, out_path)
+    timings["write"] = time.perf_counter() - start
+    return {"f0": f0, "f0_cached": f0_cached, "timings": timings}
+
+
+class OptimizeCache:
+    """Pamięć podręczna F0 (per skrót zawartości) i opisów wyników (per plik wyjściowy)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.f0: Dict[str, Optional[float]] = {}
+        self.outputs: Dict[str, Dict[str, Any]] = {}
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CACHE_VERSION:
+            return
+        self.f0 = data.get("f0", {})
+        self.outputs = data.get("outputs", {})
+
+    def save(self) -> None:
+        """Zapis atomowy (plik tymczasowy + rename)"""
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "f0": self.f0, "outputs": self.outputs}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def f0_key(self, sha: str, params: Dict[str, Any]) -> str:
+        # F0 zależy od zawartości, parametrów dekodowania i estymatora
+        return f"{sha}:{params['sr']}:{params['top_db']}:{params['f0']}"
+
+    def output_entry(self, sha: str, f0_target: Optional[float], params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"source": sha, "f0_target": round(f0_target, 3) if f0_target else None, "params": params}
+
+    def is_current(self, out_path: Path, entry: Dict[str, Any]) -> bool:
+        return out_path.exists() and self.outputs.get(out_path.name) == entry
+
+
+def print_stage(name: str, seconds: float, detail: str = "") -> None:
+    print(f"  {name:<26} {seconds * 1000:>10.0f} ms  {detail}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dostrojenie wysokości nagrań do pliku wzorcowego")
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT, help="Katalog z oryginalnymi nagraniami")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Katalog na dostrojone pliki WAV")
+    parser.add_argument("--reference", default=DEFAULT_REFERENCE, help="Nazwa pliku wzorcowego w katalogu wejściowym")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Liczba procesów (1 = sekwencyjnie)")
+    parser.add_argument("--cache", type=Path, default=None, help="Plik pamięci podręcznej (domyślnie w katalogu wyjściowym)")
+    parser.add_argument("--force", action="store_true", help="Przetwórz wszystkie pliki (ignoruj pamięć podręczną)")
+    parser.add_argument("--sr", type=int, default=SR, help="Częstotliwość próbkowania wyniku")
+    parser.add_argument("--top-db", type=float, default=40.0, help="Próg obcinania ciszy [dB]")
+    parser.add_argument("--peak", type=float, default=0.89, help="Szczyt po normalizacji (0-1)")
+    parser.add_argument("--f0", choices=F0_METHODS, default="pyin",
+                        help="Estymator F0: pyin (librosa) lub yin (szybki, NumPy)")
+    args = parser.parse_args()
+
+    if not args.input.is_dir():
+        print(f"Katalog wejściowy '{args.input}' nie istnieje. Utwórz go i dodaj pliki .mp3.")
+        sys.exit(1)
+    args.output.mkdir(parents=True, exist_ok=True)
+    params = {"sr": args.sr, "top_db": args.top_db, "peak": args.peak, "f0": args.f0}
+    cache = OptimizeCache(args.cache or args.output / ".optimize_cache.json")
+    if not args.force:
+        cache.load()
+    total_start = time.perf_counter()
+    print(f"Optymalizator: {args.input} -> {args.output} (procesy: {args.workers}, F0: {args.f0})")
+
+    # 1) skróty zawartości
+    start = time.perf_counter()
+    files = sorted(p for p in args.input.iterdir() if p.is_file() and p.suffix.lower() in INPUT_EXTENSIONS)
+    hashes = {path.name: content_hash(path) for path in files}
+    print_stage("hash", time.perf_counter() - start, f"{len(files)} plików")
+
+    # 2) F0 wzorca
+    start = time.perf_counter()
+    if args.reference not in hashes:
+        raise ValueError(f"Brak pliku wzorcowego {args.reference} w {args.input}")
+    ref_key = cache.f0_key(hashes[args.reference], params)
+    f0_target = cache.f0.get(ref_key)
+    if f0_target is None:
+        f0_target = estimate_f0(load_audio(args.input / args.reference, args.sr, args.top_db), args.sr, args.f0)
+        cache.f0[ref_key] = f0_target
+    if not f0_target:
+        raise ValueError(f"Nie udało się wyznaczyć F0 dla pliku wzorcowego {args.reference}")
+    print_stage("wzorzec", time.perf_counter() - start, f"{args.reference}, F0 ≈ {f0_target:.1f} Hz")
+
+    # 3) pliki do przetworzenia (niezmienione z aktualnym wynikiem są pomijane)
+    jobs = []
+    for path in files:
+        sha = hashes[path.name]
+        out_path = args.output / f"{path.stem}_aligned.wav"
+        # wzorzec zostaje bez zmian (tylko normalizacja)
+        target = None if path.name == args.reference else f0_target
+        entry = cache.output_entry(sha, target, params)
+        if cache.is_current(out_path, entry):
+            continue
+        jobs.append((path, out_path, cache.f0.get(cache.f0_key(sha, params)), target, entry))
+    skipped = len(files) - len(jobs)
+
+    start = time.perf_counter()
+    stage_totals = {"decode": 0.0, "f0": 0.0, "shift": 0.0, "write": 0.0}
+    f0_computed = failed = 0
+
+    def collect(job, result):
+        nonlocal f0_computed
+        path, out_path, _, _, entry = job
+        cache.f0[cache.f0_key(entry["source"], params)] = result["f0"]
+        cache.outputs[out_path.name] = entry
+        f0_computed += not result["f0_cached"]
+        for stage, seconds in result["timings"].items():
+            stage_totals[stage] += seconds
+        f0_text = f"{result['f0']:.1f} Hz" if result["f0"] else "brak F0"
+        print(f"    {path.name:<50} {f0_text:>10}  {sum(result['timings'].values()) * 1000:>7.0f} ms")
+
+    if args.workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futures = {executor.submit(process_file, str(job[0]), str(job[1]), job[2], job[3], params): job
+                       for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    collect(futures[future], future.result())
+                except Exception as e:
+                    failed += 1
+                    print(f"    {futures[future][0].name}: BŁĄD {e}")
+    else:
+        for job in jobs:
+            try:
+                collect(job, process_file(str(job[0]), str(job[1]), job[2], job[3], params))
+            except Exception as e:
+                failed += 1
+                print(f"    {job[0].name}: BŁĄD {e}")
+    files_elapsed = time.perf_counter() - start
+
+    # Wyniki plików usuniętych z wejścia nie są już śledzone
+    current_outputs = {f"{path.stem}_aligned.wav" for path in files}
+    cache.outputs = {name: entry for name, entry in cache.outputs.items() if name in current_outputs}
+    cache.save()
+
+    print_stage("pliki (ściana)", files_elapsed,
+                f"przetworzone: {len(jobs) - failed}, pominięte: {skipped}, błędy: {failed}, "
+                f"nowe F0: {f0_computed}")
+    for stage, seconds in stage_totals.items():
+        print_stage(f"  {stage} (suma procesów)", seconds)
+    print_stage("razem", time.perf_counter() - total_start)
+    print("Gotowe: wszystkie pliki dostrojone do wysokości wzorca.")
+    sys.exit(1 if failed else 0)
 
-    base = os.path.splitext(name)[0]
-    sf.write(os.path.join(OUT_DIR, f"{base}_aligned.wav"), y_out, SR, subtype="PCM_16")
 
-print("Gotowe: wszystkie pliki dostrojone do wysokości wzorca.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Test obciążeniowy /warn: równoległe żądania w kolejnych "slotach" odtwarzania.
+
+W każdej rundzie N wątków startuje jednocześnie (bariera) i wysyła /warn.
+Dokładnie jedno żądanie może dostać PLAYING, pozostałe BUSY. Dodatkowo
+sprawdzany jest limiter token bucket: z `burst` równoległych prób
+jednego klienta przechodzi dokładnie `burst`.
+
+Z `--workers N` serwer uruchamiany jest dwukrotnie: jako `uvicorn --workers N`
+i przez uvicorn.run(workers=N) z BARKING_DOG_SHARED_STATE=1 (bez --workers w argv;
+osobne procesy ze wspólnym stanem odtwarzania). Rundy wysyłają wtedy naprzemiennie
+/warn i /warn/sequence (każde żądanie nowym połączeniem, więc trafiają do różnych
+workerów) - obie ścieżki zajmują slot przez try_claim. Sprawdzane są też historia
+wyboru (tryb window - brak powtórzeń między workerami) i rozejście się zmiany
+biblioteki do wszystkich workerów.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python -m app.tools.stress_warn --rounds 20 --threads 32
+    python -m app.tools.stress_warn --workers 4 --rounds 30
+    python -m app.tools.stress_warn --url http://localhost:8000 --rounds 5
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import itertools
+import threading
+import subprocess
+import urllib.request
+import urllib.error
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Okno trybu window w teście wielu workerów (biblioteka ma 8 dźwięków)
+SELECTION_WINDOW = 3
+
+
+def concurrent_round(call, threads: int) -> Counter:
+    """Wysyła `threads` jednoczesnych żądań, zwraca liczniki statusów"""
+    barrier = threading.Barrier(threads)
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def worker():
+        barrier.wait()
+        status = call()
+        with lock:
+            statuses[status] += 1
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return statuses
+
+
+def run_rounds(call, wait_free, rounds: int, threads: int) -> bool:
+    """Rundy równoległych żądań; każda runda musi uruchomić dokładnie jedno odtwarzanie"""
+    ok = True
+    total = Counter()
+    for index in range(rounds):
+        wait_free()
+        statuses = concurrent_round(call, threads)
+        total.update(statuses)
+        if statuses["PLAYING"] != 1:
+            ok = False
+            print(f"  runda {index + 1}: BLAD - {dict(statuses)}")
+    print(f"  rund: {rounds}, watkow: {threads}, odpowiedzi: {dict(total)}")
+    return ok
+
+
+def check_limiter(threads: int, burst: int) -> bool:
+    """Równoległe pobieranie żetonów jednego klienta - przechodzi dokładnie `burst`"""
+    from app.rate_limit import TokenBucketLimiter
+
+    limiter = TokenBucketLimiter(rate=0.001, burst=burst)
+    statuses = concurrent_round(lambda: "OK" if limiter.acquire("client")[0] else "RATE_LIMITED",
+                                max(threads, burst * 2))
+    print(f"  limiter (burst {burst}): {dict(statuses)}")
+    return statuses["OK"] == burst
+
+
+def configure_in_process(args) -> None:
+    """Konfiguracja aplikacji w procesie - przed pierwszym importem modułów app (czytają env przy imporcie)"""
+    from app.tools.synthetic_library import generate_library
+
+    library = generate_library(Path(args.workdir or tempfile.gettempdir()) / "barking-dog-stress" / "sounds",
+                               count=8, min_duration=args.duration, max_duration=args.duration)
+    os.environ["BARKING_DOG_SOUNDS_DIR"] = str(library)
+    os.environ["BARKING_DOG_INDEX_FILE"] = str(library.parent / "index.json")
+    os.environ["BARKING_DOG_STARTUP_DELAY"] = "3600"
+    os.environ["BARKING_DOG_RATE_LIMIT"] = "0"
+    os.environ["BARKING_DOG_PLAYBACK_MODE"] = "busy"
+    os.environ.setdefault("BARKING_DOG_AUDIO_BACKEND", "null")
+
+
+def stress_in_process(args) -> bool:
+    """Aplikacja uruchomiona w tym procesie (TestClient) na syntetycznej bibliotece"""
+    from fastapi.testclient import TestClient
+    from app import start
+
+    with TestClient(start.app) as client:
+        while client.get("/ready").status_code != 200:
+            time.sleep(0.05)
+
+        def wait_free():
+            while start.is_audio_playing():
+                time.sleep(0.01)
+
+        return run_rounds(lambda: client.get("/warn").json()["status"], wait_free, args.rounds, args.threads)
+
+
+def stress_url(args) -> bool:
+    """Działający serwer (limit żądań serwera może odrzucać część prób)"""
+
+    def call():
+        try:
+            with urllib.request.urlopen(f"{args.url}/warn", timeout=10) as response:
+                return json.load(response)["status"]
+        except urllib.error.HTTPError as e:
+            return json.load(e)["status"] if e.code == 429 else f"HTTP {e.code}"
+
+    def wait_free():
+        # Serwer nie udostępnia stanu slotu - czekamy dłużej niż najdłuższy dźwięk
+        time.sleep(args.slot_wait)
+
+    return run_rounds(call, wait_free, args.rounds, args.threads)
+
+
+def http_get(base: str, path: str, method: str = "GET", body: Optional[dict] = None) -> Tuple[int, dict, dict]:
+    """Żądanie przez nowe połączenie (kolejne żądania trafiają do różnych workerów): (kod, JSON, nagłówki)"""
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(f"{base}{path}", data=data, method=method,
+                                     headers={"Content-Type": "application/json"} if data else {})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.load(response), dict(response.headers)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e), dict(e.headers)
+
+
+def start_workers(args, workdir: Path, library: Path, launcher: str = "cli") -> Tuple[subprocess.Popen, str]:
+    """
+    Uruchamia N workerów na syntetycznej bibliotece i czeka, aż wszystkie będą gotowe: `cli` to
+    `uvicorn --workers N` z jawnym BARKING_DOG_STATE_FILE, `run` to `uvicorn.run(workers=N)` bez
+    --workers w argv - wspólny stan wymuszony BARKING_DOG_SHARED_STATE=1, blok w domyślnym miejscu
+    """
+    from app.tools.bench_startup import free_port
+
+    port = free_port()
+    state_file = workdir / "playback.state"
+    state_file.unlink(missing_ok=True)
+    env = dict(os.environ,
+               PYTHONPATH=str(Path(__file__).resolve().parents[2]),
+               BARKING_DOG_SOUNDS_DIR=str(library),
+               BARKING_DOG_INDEX_FILE=str(workdir / "index.json"),
+               BARKING_DOG_SAMPLE_BANK_FILE=str(workdir / "sample_bank.bin"),
+               BARKING_DOG_STATE_FILE=str(state_file),
+               BARKING_DOG_STARTUP_DELAY="3600",
+               BARKING_DOG_RATE_LIMIT="0",
+               BARKING_DOG_PLAYBACK_MODE="busy",
+               BARKING_DOG_AUDIO_BACKEND=os.environ.get("BARKING_DOG_AUDIO_BACKEND", "null"))
+    if launcher == "run":
+        del env["BARKING_DOG_STATE_FILE"]
+        env.pop("WEB_CONCURRENCY", None)
+        env["BARKING_DOG_SHARED_STATE"] = "1"
+        command = [sys.executable, "-c",
+                   f"import uvicorn; uvicorn.run('app.start:app', host='127.0.0.1', port={port}, "
+                   f"workers={args.workers}, log_level='warning')"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app.start:app", "--host", "127.0.0.1", "--port", str(port),
+                   "--workers", str(args.workers), "--log-level", "warning"]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    streak = 0
+    # /ready odpowiada jeden (dowolny) worker - gotowe, gdy wiele kolejnych prób dostaje 200
+    while streak < 4 * args.workers:
+        if time.time() > deadline or process.poll() is not None:
+            process.kill()
+            raise RuntimeError("Serwer nie wystartował")
+        try:
+            streak = streak + 1 if http_get(base, "/ready")[0] == 200 else 0
+        except OSError:
+            streak = 0
+            time.sleep(0.1)
+    return process, base
+
+
+def check_history(picks: List[str], window: int) -> bool:
+    """Kolejne odtworzenia (ze wszystkich workerów) nie powtarzają dźwięku w oknie `window`"""
+    repeats = [index for index in range(len(picks)) if picks[index] in picks[max(0, index - window):index]]
+    print(f"  historia wyboru (window {window}): {len(picks)} odtworzen, powtorzen w oknie: {len(repeats)}")
+    return not repeats
+
+
+def check_library_sync(base: str, library: Path, workers: int) -> bool:
+    """Nowy plik + /sounds/refresh w jednym workerze - wszystkie workery widzą go z tym samym ETag"""
+    before = http_get(base, "/sounds/database")[1]["liczba_plikow"]
+    source = sorted(library.glob("*.wav"))[0]
+    shutil.copy(source, library / "extra-0001.wav")
+    start = time.time()
+    http_get(base, "/sounds/refresh")
+    streak, etags = 0, set()
+    while streak < 4 * workers and time.time() - start < 10:
+        status, body, headers = http_get(base, "/sounds/database")
+        if body["liczba_plikow"] == before + 1:
+            streak += 1
+            etags.add(headers.get("etag"))
+        else:
+            streak, etags = 0, set()
+    ok = streak >= 4 * workers and len(etags) == 1
+    print(f"  wersja biblioteki: {before} -> {before + 1} plikow we wszystkich workerach "
+          f"po {time.time() - start:.2f}s, ETag: {len(etags)} - {'OK' if ok else 'BLAD'}")
+    return ok
+
+
+def stress_workers(args) -> List[bool]:
+    """
+    Serwer z N workerami (osobne procesy): slot, historia wyboru i wersja biblioteki wspólne -
+    zarówno przy `uvicorn --workers N`, jak i przy uvicorn.run(workers=N) bez --workers w argv
+    """
+    from app.tools.synthetic_library import generate_library
+
+    workdir = Path(args.workdir or tempfile.gettempdir()) / "barking-dog-stress-workers"
+    # Runda (nowe połączenia do kilku procesów) musi zmieścić się w jednym odtworzeniu,
+    # inaczej późne żądanie legalnie zajmuje już wolny slot
+    duration = max(args.duration, 1.0)
+    library = generate_library(workdir / "sounds", count=8, min_duration=duration, max_duration=duration)
+    for extra in library.glob("extra-*.wav"):
+        extra.unlink()
+
+    results = []
+    for launcher in ("cli", "run"):
+        print(f"  uruchomienie: {launcher}")
+        results.extend(stress_launcher(args, workdir, library, launcher))
+    return results
+
+
+def stress_launcher(args, workdir: Path, library: Path, launcher: str) -> List[bool]:
+    """Rundy /warn i /warn/sequence, historia wyboru i biblioteka dla jednego sposobu uruchomienia workerów"""
+    results = []
+    process, base = start_workers(args, workdir, library, launcher)
+    paths = set()
+    try:
+        http_get(base, "/sounds/selection/mode", "POST", {"mode": "window", "window": SELECTION_WINDOW})
+        picks, pids = [], set()
+        lock = threading.Lock()
+        calls = itertools.count()
+
+        def call():
+            # Naprzemiennie /warn i jednoelementowa sekwencja (dźwięk z silnika wyboru, jak w /warn)
+            with lock:
+                sequence = next(calls) % 2
+            if sequence:
+                status, body, _ = http_get(base, "/warn/sequence", "POST", {"steps": [{"repeat": 1}]})
+            else:
+                status, body, _ = http_get(base, "/warn")
+            if body.get("status") == "PLAYING":
+                with lock:
+                    picks.append(body["filenames"][0] if sequence else body["filename"])
+            return body.get("status", f"HTTP {status}")
+
+        def wait_free():
+            while True:
+                state = http_get(base, "/playback/state")[1]
+                pids.add(state["pid"])
+                paths.add(state.get("path"))
+                if not state["playback"]["is_playing"]:
+                    return
+                time.sleep(0.01)
+
+        results.append(run_rounds(call, wait_free, args.rounds, args.threads))
+        print(f"  odpowiadajace procesy: {len(pids)} z {args.workers}")
+        # Wszystkie workery muszą wskazywać ten sam blok (None - stan lokalny procesu)
+        shared = None not in paths and len(paths) == 1
+        print(f"  wspolny blok stanu: {'OK' if shared else 'BLAD'} ({', '.join(map(str, sorted(paths, key=str)))})")
+        results.append(shared)
+        results.append(check_history(picks, SELECTION_WINDOW))
+        results.append(check_library_sync(base, library, args.workers))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        for extra in library.glob("extra-*.wav"):
+            extra.unlink()
+    # Ostatni odłączający się worker usuwa blok
+    leftovers = [path for path in paths if path and Path(path).exists()]
+    print(f"  blok usuniety po zamknieciu: {'BLAD ' + ', '.join(leftovers) if leftovers else 'OK'}")
+    results.append(not leftovers)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test obciążeniowy /warn i limitu żądań")
+    parser.add_argument("--rounds", type=int, default=20, help="Liczba slotów odtwarzania")
+    parser.add_argument("--threads", type=int, default=32, help="Liczba równoległych żądań na slot")
+    parser.add_argument("--duration", type=float, default=0.2, help="Długość syntetycznych dźwięków [s]")
+    parser.add_argument("--burst", type=int, default=10, help="Pojemność wiadra w teście limitera")
+    parser.add_argument("--url", default=None, help="Adres działającego serwera (domyślnie aplikacja w procesie)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Serwer uvicorn z N workerami (test wspólnego stanu między procesami)")
+    parser.add_argument("--slot-wait", type=float, default=6.0, help="Tryb --url: przerwa między rundami, dłuższa niż najdłuższy dźwięk [s]")
+    parser.add_argument("--workdir", default=None, help="Katalog na syntetyczną bibliotekę")
+    args = parser.parse_args()
+    if args.workers:
+        print(f"Wspolny stan, {args.workers} procesow:")
+        results = stress_workers(args)
+        print("WYNIK:", "OK - dokładnie jedno odtwarzanie na slot we wszystkich workerach"
+              if all(results) else "BLAD")
+        sys.exit(0 if all(results) else 1)
+    if not args.url:
+        configure_in_process(args)
+
+    results = []
+    print("Limiter token bucket:")
+    results.append(check_limiter(args.threads, args.burst))
+    print(f"/warn ({args.url or 'aplikacja w procesie'}):")
+    results.append(stress_url(args) if args.url else stress_in_process(args))
+
+    print("WYNIK:", "OK - dokładnie jedno odtwarzanie na slot" if all(results) else "BLAD")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
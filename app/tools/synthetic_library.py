@@ -0,0 +1,105 @@
+# Copyright 2025 Marcin Chuć ORCID: 0000-0002-8430-9763
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Generator syntetycznej biblioteki dźwięków do benchmarków.
+
+Tworzy krótkie "szczeknięcia" (szum w obwiedni) jako 16-bitowe pliki WAV
+oraz - jeśli libsndfile to obsługuje - część plików jako MP3.
+Wynik jest powtarzalny dla danego ziarna losowania.
+"""
+
+import os
+import wave
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import soundfile as sf
+    MP3_AVAILABLE = "MP3" in sf.available_formats()
+except ImportError:
+    MP3_AVAILABLE = False
+
+SR = 22050
+
+
+def make_bark(rng: np.random.Generator, duration: float, sr: int = SR) -> np.ndarray:
+    """Syntetyczne szczeknięcie: szum z wykładniczą obwiednią (int16, mono)"""
+    n = max(1, int(duration * sr))
+    t = np.arange(n) / sr
+    envelope = np.exp(-t * rng.uniform(6.0, 14.0))
+    tone = np.sin(2 * np.pi * rng.uniform(200.0, 500.0) * t)
+    y = (0.6 * tone + 0.4 * rng.standard_normal(n)) * envelope
+    return (y / (np.max(np.abs(y)) + 1e-9) * 0.89 * 32767).astype(np.int16)
+
+
+def write_wav(path: Path, samples: np.ndarray, sr: int = SR) -> None:
+    """Zapisuje próbki int16 (mono) jako plik WAV modułem wave"""
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sr)
+        wav_file.writeframes(samples.tobytes())
+
+
+def generate_library(directory: Path, count: int, mp3_ratio: float = 0.0,
+                     min_duration: float = 0.3, max_duration: float = 1.2,
+                     seed: int = 1234) -> Path:
+    """
+    Tworzy bibliotekę `count` plików w katalogu `directory`.
+    Istniejąca biblioteka o tej samej liczbie plików jest używana ponownie.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    marker = directory / ".synthetic"
+    signature = f"{count}:{mp3_ratio}:{min_duration}:{max_duration}:{seed}"
+    if marker.exists() and marker.read_text() == signature:
+        return directory
+
+    for old in directory.iterdir():
+        if old.is_file():
+            old.unlink()
+
+    rng = np.random.default_rng(seed)
+    n_mp3 = int(count * mp3_ratio) if MP3_AVAILABLE else 0
+    if mp3_ratio and not MP3_AVAILABLE:
+        print("Uwaga: libsndfile nie obsługuje MP3 - generuję tylko pliki WAV")
+
+    for i in range(count):
+        samples = make_bark(rng, rng.uniform(min_duration, max_duration))
+        if i < n_mp3:
+            sf.write(str(directory / f"bark-{i:06d}.mp3"), samples, SR, format="MP3")
+        else:
+            write_wav(directory / f"bark-{i:06d}.wav", samples)
+
+    marker.write_text(signature)
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generuje syntetyczną bibliotekę dźwięków")
+    parser.add_argument("directory", help="Katalog docelowy")
+    parser.add_argument("--count", type=int, default=1000, help="Liczba plików")
+    parser.add_argument("--mp3-ratio", type=float, default=0.0, help="Udział plików MP3 (0-1)")
+    parser.add_argument("--seed", type=int, default=1234, help="Ziarno losowania")
+    args = parser.parse_args()
+
+    generate_library(Path(args.directory), args.count, args.mp3_ratio, seed=args.seed)
+    print(f"Biblioteka gotowa: {args.directory} ({len(os.listdir(args.directory)) - 1} plików)")
+
+
+if __name__ == "__main__":
+    main()